@@ -0,0 +1,177 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+from collections import namedtuple
+
+"""
+Benchmark cases of the file transform steps.
+
+name: Unique name of the case
+cls: Step class name
+inputs: Dataset kinds (see generator.DATASETS) which the step reads.
+        All of them are generated in the same directory.
+arguments: Function which returns step arguments from the number of rows.
+           'src_dir' and 'dest_dir' are given by the runner.
+rows: Function which returns the number of input rows from the number of rows of a dataset
+"""
+Case = namedtuple("Case", ["name", "cls", "inputs", "arguments", "rows"])
+
+
+def _same(rows):
+    return rows
+
+
+CASES = [
+    Case(
+        "CsvConvert.csv_to_tsv",
+        "CsvConvert",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "after_format": "tsv"},
+        _same,
+    ),
+    Case(
+        "CsvConvert.tsv_to_csv",
+        "CsvConvert",
+        ["long_tsv"],
+        lambda n: {"src_pattern": r"long\.tsv", "before_format": "tsv", "after_format": "csv"},
+        _same,
+    ),
+    Case(
+        "CsvConvert.quoted",
+        "CsvConvert",
+        ["quoted"],
+        lambda n: {"src_pattern": r"quoted\.csv", "quote": "QUOTE_ALL"},
+        _same,
+    ),
+    Case(
+        "CsvConvert.cp932_to_utf8",
+        "CsvConvert",
+        ["long_cp932"],
+        lambda n: {"src_pattern": r"long_cp932\.csv", "before_enc": "cp932", "after_enc": "utf-8"},
+        _same,
+    ),
+    Case(
+        "CsvSort",
+        "CsvSort",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "order": ["id"]},
+        _same,
+    ),
+    Case(
+        "CsvMerge",
+        "CsvMerge",
+        ["long", "right"],
+        lambda n: {
+            "src1_pattern": r"long\.csv",
+            "src2_pattern": r"right\.csv",
+            "dest_name": "merged.csv",
+        },
+        lambda n: n + (n + 1) // 2,
+    ),
+    Case(
+        "CsvConcat",
+        "CsvConcat",
+        ["long", "long"],
+        lambda n: {"src_filenames": ["long.csv", "long.csv"], "dest_name": "concat.csv"},
+        lambda n: n * 2,
+    ),
+    Case(
+        "CsvColumnExtract.names",
+        "CsvColumnExtract",
+        ["wide"],
+        lambda n: {"src_pattern": r"wide\.csv", "columns": ["col0", "col10", "col20", "col30"]},
+        _same,
+    ),
+    Case(
+        "CsvColumnExtract.numbers",
+        "CsvColumnExtract",
+        ["wide"],
+        lambda n: {"src_pattern": r"wide\.csv", "column_numbers": "1,11,21,31"},
+        _same,
+    ),
+    Case(
+        "CsvColumnExtract.names_500",
+        "CsvColumnExtract",
+        ["wide_500"],
+        lambda n: {
+            "src_pattern": r"wide_500\.csv",
+            "columns": ["col%d" % i for i in range(0, 500, 10)],
+        },
+        _same,
+    ),
+    Case(
+        "CsvColumnExtract.numbers_500",
+        "CsvColumnExtract",
+        ["wide_500"],
+        lambda n: {
+            "src_pattern": r"wide_500\.csv",
+            "column_numbers": ",".join(str(i) for i in range(1, 501, 10)),
+        },
+        _same,
+    ),
+    Case(
+        "CsvColumnExtract.sets_500",
+        "CsvColumnExtract",
+        ["wide_500"],
+        lambda n: {
+            "src_pattern": r"wide_500\.csv",
+            "column_sets": [
+                {"suffix": "_%d" % k, "columns": ["col%d" % i for i in range(k, 500, 10)]}
+                for k in range(4)
+            ],
+        },
+        _same,
+    ),
+    Case(
+        "ColumnLengthAdjust",
+        "ColumnLengthAdjust",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "adjust": {"name": 5}},
+        _same,
+    ),
+    Case(
+        "DateFormatConvert",
+        "DateFormatConvert",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "columns": ["date"], "formatter": "%Y/%m/%d"},
+        _same,
+    ),
+    Case(
+        "FileDivide",
+        "FileDivide",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "divide_rows": max(n // 10, 1), "header": True},
+        _same,
+    ),
+    Case(
+        "FileCompress.gzip",
+        "FileCompress",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv", "format": "gzip"},
+        _same,
+    ),
+    Case(
+        "FileDecompress.gzip",
+        "FileDecompress",
+        ["long_gz"],
+        lambda n: {"src_pattern": r"long\.csv\.gz"},
+        _same,
+    ),
+    Case(
+        "CsvToJsonl",
+        "CsvToJsonl",
+        ["long"],
+        lambda n: {"src_pattern": r"long\.csv"},
+        _same,
+    ),
+]
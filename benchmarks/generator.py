@@ -0,0 +1,140 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import csv
+import gzip
+import os
+import random
+import shutil
+from datetime import date, timedelta
+
+"""
+Seeded generators of synthetic csv (tsv) files for the benchmarks.
+
+The same (kind, rows, seed) always generates the same file,
+so generated files are reused as long as they exist in the data directory.
+"""
+
+_NAMES = ["alice", "bob", "carol", "dave", "ellen", "frank", "grace", "heidi"]
+_JA_NAMES = ["山田", "佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "中村"]
+_CATEGORIES = ["food", "book", "music", "game", "sport", "travel"]
+
+LONG_HEADER = ["id", "name", "date", "amount", "category"]
+WIDE_COLUMNS = 50
+
+
+def _long_rows(rng, rows, names=_NAMES):
+    # ids are shuffled in blocks, so that the rows are not sorted by id
+    start = date(2000, 1, 1)
+    for head in range(0, rows, 10000):
+        ids = list(range(head, min(head + 10000, rows)))
+        rng.shuffle(ids)
+        for i in ids:
+            yield [
+                i,
+                "%s%d" % (rng.choice(names), rng.randint(0, 9999)),
+                (start + timedelta(days=rng.randint(0, 9000))).isoformat(),
+                "%.2f" % (rng.random() * 100000),
+                rng.choice(_CATEGORIES),
+            ]
+
+
+def _long(path, rows, seed, delimiter=",", encoding="utf-8", names=_NAMES):
+    rng = random.Random(seed)
+    with open(path, "w", encoding=encoding, newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(LONG_HEADER)
+        writer.writerows(_long_rows(rng, rows, names))
+
+
+def _right(path, rows, seed):
+    """
+    The other side of a join with 'long'. Has every second id of 'long'.
+    """
+    rng = random.Random(seed + 1)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "score", "rank"])
+        for i in range(0, rows, 2):
+            writer.writerow([i, rng.randint(0, 100), rng.choice("ABCDE")])
+
+
+def _wide(path, rows, seed, columns=WIDE_COLUMNS):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["col%d" % i for i in range(columns)])
+        for i in range(rows):
+            writer.writerow([i] + [rng.randint(0, 1000000) for _ in range(columns - 1)])
+
+
+def _quoted(path, rows, seed):
+    """
+    Fields which contain delimiters, quotes and line breaks.
+    """
+    rng = random.Random(seed)
+    texts = ['say "hello"', "a, b, c", "line1\nline2", "plain", "tab\tseparated"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["id", "text", "note"])
+        for i in range(rows):
+            writer.writerow([i, rng.choice(texts), rng.choice(texts)])
+
+
+def _gzip(path, rows, seed):
+    # compress the file of 'long' in the same directory
+    src = os.path.join(os.path.dirname(path), DATASETS["long"][0])
+    if not os.path.exists(src):
+        _long(src + ".tmp", rows, seed)
+        os.replace(src + ".tmp", src)
+    with open(src, "rb") as i, gzip.open(path, "wb") as o:
+        shutil.copyfileobj(i, o)
+
+
+"""
+kind: (file name, generator function)
+"""
+DATASETS = {
+    "long": ("long.csv", _long),
+    "long_tsv": ("long.tsv", lambda p, r, s: _long(p, r, s, delimiter="\t")),
+    "long_cp932": ("long_cp932.csv", lambda p, r, s: _long(p, r, s, encoding="cp932", names=_JA_NAMES)),  # noqa
+    "long_gz": ("long.csv.gz", _gzip),
+    "right": ("right.csv", _right),
+    "wide": ("wide.csv", _wide),
+    "wide_500": ("wide_500.csv", lambda p, r, s: _wide(p, r, s, columns=500)),
+    "quoted": ("quoted.csv", _quoted),
+}
+
+
+def generate(kind, rows, seed, data_dir):
+    """
+    Generate a dataset unless it already exists
+
+    Args:
+        kind (str): Key of DATASETS
+        rows (int): Number of data rows
+        seed (int): Seed of random values
+        data_dir (str): Directory of generated files
+
+    Returns:
+        str: Path of the generated file
+    """
+    name, func = DATASETS[kind]
+    dataset_dir = os.path.join(data_dir, "%d_%d" % (rows, seed))
+    os.makedirs(dataset_dir, exist_ok=True)
+    path = os.path.join(dataset_dir, name)
+    if not os.path.exists(path):
+        temp = path + ".tmp"
+        func(temp, rows, seed)
+        os.replace(temp, path)
+    return path
@@ -0,0 +1,223 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.cases import CASES
+from benchmarks.generator import generate
+
+"""
+Benchmarks of the file transform steps.
+
+Every case is executed in a new process, so that the peak memory of a case
+is not affected by the other cases. Results are compared with a baseline json,
+and the exit status is 1 if any case regressed more than the threshold.
+
+Usage (in the root directory of the repository):
+    python -m benchmarks.run [--rows 1e6] [--case CsvSort] [--save-baseline]
+"""
+
+_CASES = {c.name: c for c in CASES}
+_DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _execute(name, rows, src_dir, dest_dir, queue):
+    """
+    Execute a case in a child process, and put the result to the queue
+    """
+    try:
+        case = _CASES[name]
+        from cliboa.scenario import get_step_class
+        from cliboa.util.helper import Helper
+        from cliboa.util.lisboa_log import LisboaLog
+
+        instance = get_step_class(case.cls)()
+        arguments = {"src_dir": src_dir, "dest_dir": dest_dir}
+        arguments.update(case.arguments(rows))
+        for k, v in arguments.items():
+            Helper.set_property(instance, k, v)
+        Helper.set_property(instance, "step", case.name)
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        instance.execute()
+        seconds = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        queue.put({"seconds": seconds, "rss_before": rss_before, "rss_after": rss_after})
+    except Exception as e:
+        queue.put({"error": "%s: %s" % (e.__class__.__name__, e)})
+
+
+def _rss_mb(ru_maxrss):
+    # kilobytes on linux, bytes on macOS
+    return ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_case(case, rows, seed, data_dir, repeat):
+    """
+    Returns:
+        dict: The best result of the repeated executions
+    """
+    inputs = [generate(kind, rows, seed, data_dir) for kind in case.inputs]
+    src_dir = os.path.dirname(inputs[0])
+    input_bytes = sum(os.path.getsize(p) for p in inputs)
+
+    # 'spawn' so that the child does not inherit memory of the runner
+    ctx = multiprocessing.get_context("spawn")
+    best = None
+    for _ in range(repeat):
+        dest_dir = tempfile.mkdtemp(prefix="cliboa_bench_")
+        try:
+            queue = ctx.Queue()
+            p = ctx.Process(target=_execute, args=(case.name, rows, src_dir, dest_dir, queue))
+            p.start()
+            result = queue.get()
+            p.join()
+        finally:
+            shutil.rmtree(dest_dir, ignore_errors=True)
+        if "error" in result:
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+
+    seconds = max(best["seconds"], 1e-9)
+    return {
+        "class": case.cls,
+        "seconds": round(seconds, 6),
+        "rows": case.rows(rows),
+        "rows_per_sec": round(case.rows(rows) / seconds, 1),
+        "mb_per_sec": round(input_bytes / (1024 * 1024) / seconds, 3),
+        "peak_rss_mb": round(_rss_mb(best["rss_after"]), 1),
+        "peak_rss_delta_mb": round(_rss_mb(best["rss_after"] - best["rss_before"]), 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with the baseline
+
+    Args:
+        results (dict): {case name: result}
+        baseline (dict): {case name: result} of the baseline
+        threshold (float): Allowed ratio of regression. e.g. 0.2 allows 20% slower.
+
+    Returns:
+        list: Messages of the regressions
+    """
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b is None or "error" in r or "error" in b or b.get("rows") != r.get("rows"):
+            continue
+        if r["rows_per_sec"] < b["rows_per_sec"] * (1 - threshold):
+            regressions.append(
+                "%s: rows/s %.1f -> %.1f (%+.1f%%)"
+                % (name, b["rows_per_sec"], r["rows_per_sec"], _ratio(b, r, "rows_per_sec"))
+            )
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + threshold):
+            regressions.append(
+                "%s: peak memory %.1fMB -> %.1fMB (%+.1f%%)"
+                % (name, b["peak_rss_mb"], r["peak_rss_mb"], _ratio(b, r, "peak_rss_mb"))
+            )
+    return regressions
+
+
+def _ratio(base, result, key):
+    if not base[key]:
+        return 0.0
+    return (result[key] / base[key] - 1) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the file transform steps")
+    parser.add_argument(
+        "--rows", type=float, default=1e5, help="Rows of generated files. e.g. 1e5, 1e8"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Seed of generated files")
+    parser.add_argument("--case", help="Regular expression of case names to execute")
+    parser.add_argument("--repeat", type=int, default=1, help="Best of N executions")
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "cliboa_bench_data"),
+        help="Directory of generated files. Files are reused in the next execution.",
+    )
+    parser.add_argument("--baseline", default=_DEFAULT_BASELINE, help="Path of baseline json")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed ratio of regression"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Save results as baseline")
+    parser.add_argument("--output", help="Path of json to write results")
+    args = parser.parse_args()
+
+    rows = int(args.rows)
+    cases = [c for c in CASES if not args.case or re.search(args.case, c.name)]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    results = {}
+    print("%-28s %10s %14s %10s %10s" % ("case", "sec", "rows/s", "MB/s", "peak MB"))
+    for case in cases:
+        r = run_case(case, rows, args.seed, args.data_dir, args.repeat)
+        results[case.name] = r
+        if "error" in r:
+            print("%-28s %s" % (case.name, r["error"]))
+            continue
+        print(
+            "%-28s %10.3f %14.1f %10.3f %10.1f"
+            % (case.name, r["seconds"], r["rows_per_sec"], r["mb_per_sec"], r["peak_rss_mb"])
+        )
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": rows,
+        "seed": args.seed,
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        # keep cases which were not executed this time
+        baseline.update(results)
+        report["cases"] = baseline
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("Baseline is saved to %s" % args.baseline)
+        return 0
+
+    errors = [name for name, r in results.items() if "error" in r]
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print("REGRESSION %s" % r)
+    return 1 if errors or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -85,6 +85,11 @@ class CommandArgumentParser:
             default="yaml",
             help="Specify yaml or json as FORMAT. Default foramt is yaml",
         )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip steps which succeeded in the last unfinished execution",
+        )
         args = parser.parse_args()
         return args
 
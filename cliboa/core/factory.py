@@ -12,7 +12,14 @@
 # all copies or substantial portions of the Software.
 #
 from cliboa.core.manager import JsonScenarioManager, YamlScenarioManager  # noqa
-from cliboa.core.strategy import MultiProcExecutor, SingleProcExecutor
+from cliboa.core.step_dag import StepDag
+from cliboa.core.step_queue import StepBlock
+from cliboa.core.strategy import (
+    DagExecutor,
+    MultiProcExecutor,
+    MultiThreadExecutor,
+    SingleProcExecutor,
+)
 from cliboa.util.class_util import ClassUtil
 from importlib import import_module
 
@@ -43,15 +50,21 @@ class StepExecutorFactory(object):
     """
 
     @staticmethod
-    def create(obj):
+    def create(obj, pool=None):
         """
         Args:
             obj: queue which stores execution target steps
+            pool: StepWorkerPool shared in the scenario, or None
         Returns:
             step execution strategy instance
         """
+        if isinstance(obj, StepDag):
+            return DagExecutor(obj)
+
         if len(obj) > 1:
-            return MultiProcExecutor(obj)
+            if isinstance(obj, StepBlock) and obj.parallel_mode == StepBlock.THREAD:
+                return MultiThreadExecutor(obj)
+            return MultiProcExecutor(obj, pool)
 
         return SingleProcExecutor(obj)
 
@@ -11,17 +11,33 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import hashlib
+import json
 import os
+import pickle
+import tempfile
 import yaml
 
 from abc import abstractmethod
 from cliboa.core.validator import EssentialKeys, ScenarioYamlKey, ScenarioYamlType
+from cliboa.util.config import CliboaConfig
 from cliboa.util.lisboa_log import LisboaLog
 
+try:
+    # libyaml binding is much faster than the pure python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 class ScenarioParser(object):
     """
-    Base class of scenario file parser
+    Base class of scenario file parser.
+
+    The parsed and merged scenario is cached as a pickle file next to the project scenario file,
+    and is reused while modification time and contents of both scenario files are unchanged.
+    The cache is enabled in [scenario_cache] section of cliboa.ini.
+    It is loaded by pickle, so the project directory must not be writable by others.
     """
 
     def __init__(self, pj_scenario_file, cmn_scenario_file):
@@ -29,44 +45,106 @@ class ScenarioParser(object):
         self._pj_scenario_file = pj_scenario_file
         self._cmn_scenario_file = cmn_scenario_file
 
-    @abstractmethod
     def parse(self):
         """
-        Parse scenario file
-        """
+        Parse scenario files
 
+        Returns:
+            list: scenario of the project merged with the common scenario
+        """
+        file_name = os.path.basename(self._pj_scenario_file)
+        self._logger.info("Start to parse %s" % file_name)
 
-class YamlScenarioParser(ScenarioParser):
-    """
-    scenario.yml parser
-    """
-
-    def parse(self):
-        self._logger.info("Start to parse scenario.yml")
+        use_cache = CliboaConfig.getboolean("scenario_cache", "enabled")
+        if use_cache:
+            cache_key = self._cache_key()
+            scenario_list = self._load_cache(cache_key)
+            if scenario_list is not None:
+                self._logger.info("Finish to parse %s (cached)" % file_name)
+                return scenario_list
 
         # Load projet scenario file
-        with open(self._pj_scenario_file, "r") as pj_f:
-            pj_yaml_dict = yaml.safe_load(pj_f)
-            self._valid_scenario_yaml(pj_yaml_dict)
-            self._exists_ess_keys(pj_yaml_dict["scenario"])
+        pj_dict = self._load(self._pj_scenario_file)
+        self._valid_scenario_yaml(pj_dict)
+        self._exists_ess_keys(pj_dict["scenario"])
 
         # Load common scenario file (if exist)
-        cmn_yaml_dict = None
+        cmn_dict = None
         if os.path.isfile(self._cmn_scenario_file):
-            with open(self._cmn_scenario_file, "r") as cmn_f:
-                cmn_yaml_dict = yaml.safe_load(cmn_f)
-                self._valid_scenario_yaml(cmn_yaml_dict)
-                self._exists_ess_keys(cmn_yaml_dict["scenario"])
-
-        if cmn_yaml_dict:
-            yaml_list = self._merge_scenario_yaml(
-                pj_yaml_dict["scenario"], cmn_yaml_dict["scenario"]
+            cmn_dict = self._load(self._cmn_scenario_file)
+            self._valid_scenario_yaml(cmn_dict)
+            self._exists_ess_keys(cmn_dict["scenario"])
+
+        if cmn_dict:
+            scenario_list = self._merge_scenario_yaml(
+                pj_dict["scenario"], cmn_dict["scenario"]
             )
         else:
-            yaml_list = pj_yaml_dict.get("scenario")
+            scenario_list = pj_dict.get("scenario")
+
+        if use_cache:
+            self._save_cache(cache_key, scenario_list)
+
+        self._logger.info("Finish to parse %s" % file_name)
+        return scenario_list
+
+    @abstractmethod
+    def _load(self, path):
+        """
+        Load a scenario file to dict object
+        """
 
-        self._logger.info("Finish to parse scenario.yml")
-        return yaml_list
+    def _cache_file(self):
+        root, name = os.path.split(self._pj_scenario_file)
+        return os.path.join(root, ".%s.pickle" % name)
+
+    def _cache_key(self):
+        """
+        Returns:
+            tuple: parser class, and path, modification time and hash of the scenario files
+        """
+        key = [self.__class__.__name__]
+        for path in [self._pj_scenario_file, self._cmn_scenario_file]:
+            if not os.path.isfile(path):
+                key.append(None)
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            key.append((os.path.abspath(path), os.stat(path).st_mtime_ns, digest))
+        return tuple(key)
+
+    def _load_cache(self, cache_key):
+        """
+        Returns:
+            list: cached scenario. None if the cache does not exist or is outdated.
+        """
+        cache_file = self._cache_file()
+        if not os.path.isfile(cache_file):
+            return None
+        try:
+            with open(cache_file, "rb") as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            self._logger.warning("Failed to load the scenario cache. %s" % e)
+            return None
+        if cache.get("key") != cache_key:
+            return None
+        return cache.get("scenario")
+
+    def _save_cache(self, cache_key, scenario_list):
+        cache_file = self._cache_file()
+        try:
+            # Write to a temporary file and rename, since the same project may run concurrently
+            fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    {"key": cache_key, "scenario": scenario_list},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            self._logger.warning("Failed to save the scenario cache. %s" % e)
 
     def _valid_scenario_yaml(self, yaml_dict):
         """
@@ -82,25 +160,29 @@ class YamlScenarioParser(ScenarioParser):
         If the same class specification exists,
         scenario.yml of projet is taken priority.
         """
+        # If the same class is defined more than once in common scenario.yml, the first one is used
+        cmn_yaml_dict = {}
+        for d in cmn_yaml_list:
+            cmn_yaml_dict.setdefault(d.get("class"), d)
+
         for pj_yaml_dict in pj_yaml_list:
             # If same class exists, merge arguments
-            if pj_yaml_dict.get("parallel"):
-                for row in pj_yaml_dict.get("parallel"):
-                    self._merge(row, cmn_yaml_list)
+            rows = pj_yaml_dict.get("parallel") or pj_yaml_dict.get("pipeline")
+            if rows:
+                for row in rows:
+                    self._merge(row, cmn_yaml_dict)
             else:
-                self._merge(pj_yaml_dict, cmn_yaml_list)
+                self._merge(pj_yaml_dict, cmn_yaml_dict)
 
         return pj_yaml_list
 
-    def _merge(self, pj_yaml_dict, cmn_yaml_list):
-        cmn_yaml_dict_in_list = [
-            d for d in cmn_yaml_list if d.get("class") == pj_yaml_dict.get("class")
-        ]
-        if not cmn_yaml_dict_in_list:
+    def _merge(self, pj_yaml_dict, cmn_yaml_dict):
+        cmn = cmn_yaml_dict.get(pj_yaml_dict.get("class"))
+        if cmn is None:
             return
 
         pj_cls_attrs = pj_yaml_dict.get("arguments", "")
-        cmn_cls_attrs = cmn_yaml_dict_in_list[0].get("arguments")
+        cmn_cls_attrs = cmn.get("arguments")
 
         # Merge arguments
         if pj_cls_attrs and cmn_cls_attrs:
@@ -117,7 +199,21 @@ class YamlScenarioParser(ScenarioParser):
         valid()
 
 
-class JsonScenarioParser:
+class YamlScenarioParser(ScenarioParser):
+    """
+    scenario.yml parser
+    """
+
+    def _load(self, path):
+        with open(path, "r") as f:
+            return yaml.load(f, Loader=SafeLoader)
+
+
+class JsonScenarioParser(ScenarioParser):
     """
-    TODO: implement in the future
+    scenario.json parser
     """
+
+    def _load(self, path):
+        with open(path, "r") as f:
+            return json.load(f)
@@ -14,6 +14,7 @@
 from abc import abstractmethod
 
 from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.metrics import Metrics
 
 
 class BaseListener(object):
@@ -52,6 +53,7 @@ class StepListener(BaseListener):
     1. before a step is called.
     2. after a step is completed, or when error occured while executing the step.
     3. Very end of the step.
+    4. instead of 1-3, when the step is skipped since it succeeded in the resumed execution.
     """
 
     @abstractmethod
@@ -79,6 +81,11 @@ class StepListener(BaseListener):
         (no matter the step was successfully completed or ended with an error)
         """
 
+    def skip_step(self, *args, **kwargs):
+        """
+        Execute when a step is skipped since it succeeded in the resumed execution.
+        """
+
 
 class ScenarioStatusListener(BaseListener):
     """
@@ -86,11 +93,13 @@ class ScenarioStatusListener(BaseListener):
     """
 
     def before_scenario(self, worker):
+        Metrics.start(worker.project_name)
         self._logger.info(
             "Start scenario execution. %s" % (worker.get_scenario_queue_status())
         )
 
     def after_scenario(self, worker):
+        Metrics.write()
         self._logger.info(
             "Finish scenario execution. %s" % (worker.get_scenario_queue_status())
         )
@@ -103,10 +112,16 @@ class StepStatusListener(StepListener):
     """
 
     def before_step(self, *args, **kwargs):
+        Metrics.start_step()
         self._logger.info("Start step execution. %s" % args[0].__class__.__name__)
 
     def after_step(self, *args, **kwargs):
+        Metrics.succeed_step()
         self._logger.info("Finish step execution. %s" % args[0].__class__.__name__)
 
     def after_completion(self, *args, **kwargs):
+        Metrics.finish_step(args[0])
         self._logger.info("Complete step execution. %s" % args[0].__class__.__name__)
+
+    def skip_step(self, *args, **kwargs):
+        Metrics.skip_step(args[0])
@@ -14,39 +14,44 @@
 import json
 import os
 import re
-import subprocess
 from abc import abstractmethod
 
 from cliboa.conf import env
-from cliboa.core.file_parser import YamlScenarioParser
+from cliboa.core.file_parser import JsonScenarioParser, YamlScenarioParser
 from cliboa.core.listener import StepStatusListener
+from cliboa.core.profiler import ProfileReportListener, StepProfileListener
 from cliboa.core.scenario_queue import ScenarioQueue
-from cliboa.core.step_queue import StepQueue
+from cliboa.core.step_dag import StepDag
+from cliboa.core.step_queue import StepBlock, StepQueue
 from cliboa.core.validator import (
     ProjectDirectoryExistence,
     ScenarioFileExistence,
 )
-from cliboa.scenario import *  # noqa
+from cliboa.core.vars_resolver import VariableResolver
+from cliboa.scenario import get_step_class
 from cliboa.util.cache import StepArgument
 from cliboa.util.class_util import ClassUtil
-from cliboa.util.exception import CliboaException, InvalidParameter, ScenarioFileInvalid
+from cliboa.util.config import CliboaConfig
+from cliboa.util.exception import InvalidParameter, ScenarioFileInvalid
 from cliboa.util.helper import Helper
 from cliboa.util.lisboa_log import LisboaLog
 
 __all__ = ["YamlScenarioManager", "JsonScenarioManager"]
 
+_VARS_PATTERN = re.compile(r"{{(.*?)}}")
+
 
 class ScenarioManager(object):
     """
     Base class which is to create individual instances from scenario files,
     and push them to the executable queue.
-
-    Note : Currently only yaml format scenario file is implemented.
     """
 
     def __init__(self, cmd_args):
         self._logger = LisboaLog.get_logger(__name__)
         self._cmd_args = cmd_args
+        self._resolver = VariableResolver()
+        self._profile_spool = None
         self._pj_dir = os.path.join(env.PROJECT_DIR, cmd_args.project_name)
         self._pj_scenario_dir = os.path.join(
             env.PROJECT_DIR, cmd_args.project_name, env.SCENARIO_DIR_NAME
@@ -84,8 +89,18 @@ class ScenarioManager(object):
         if not scenario_list or isinstance(scenario_list, list) is False:
             raise ScenarioFileInvalid("scenario file is invalid.")
 
+        self._resolver = VariableResolver(self._with_vars_scope(scenario_list))
+        self._resolver.prefetch(self._with_vars_commands(scenario_list))
+        VariableResolver.set(self._resolver)
+
+        if self._profile_enabled(scenario_list):
+            self._profile_spool = ProfileReportListener.create_spool(
+                self._cmd_args.project_name
+            )
+
         self._logger.info("Start to create scenario queue")
         queue = StepQueue()
+        queue.profile = self._profile_spool
         self._add_queue(queue, scenario_list)
 
         # save queue to static area
@@ -114,10 +129,12 @@ class ScenarioManager(object):
 
     def _add_queue(self, queue, scenario_list):
         """
-        Add executable instance to the queue
+        Add executable instance to the queue.
+        If any step declares 'depends_on', all the steps are pushed as one StepDag.
         """
+        dag = StepDag() if self._has_dependencies(scenario_list) else None
         for block in scenario_list:
-            if "multi_process_count" in block.keys():
+            if "multi_process_count" in block.keys() and "parallel" not in block.keys():
                 Helper.set_property(
                     queue, "multi_proc_cnt", block.get("multi_process_count")
                 )
@@ -125,25 +142,97 @@ class ScenarioManager(object):
                 Helper.set_property(
                     queue, "force_continue", block.get("force_continue")
                 )
+            elif "with_vars_scope" in block.keys() or "profile" in block.keys():
+                continue
             else:
                 instance = self._create_executable_instances(block)
-                queue.push(instance)
+                if dag is None:
+                    queue.push(instance)
+                else:
+                    rows = block.get("parallel") or [block]
+                    dag.push(
+                        instance,
+                        [row.get("step") for row in rows],
+                        [row.get("depends_on") for row in rows],
+                    )
+
+        if dag is not None:
+            dag.build()
+            queue.push(dag)
 
         self._logger.info("Finish to create scenario queue")
 
+    def _profile_enabled(self, scenario_list):
+        """
+        Returns:
+            bool: True if 'profile: true' is in scenario.yml,
+                  or [profile] enabled=true in cliboa.ini
+        """
+        for block in scenario_list:
+            if "profile" in block.keys():
+                return block.get("profile") is True
+        return CliboaConfig.getboolean("profile", "enabled")
+
+    def _with_vars_scope(self, scenario_list):
+        """
+        Returns:
+            str: 'with_vars_scope' value of scenario.yml. 'scenario' by default.
+        """
+        for block in scenario_list:
+            if "with_vars_scope" in block.keys():
+                return block.get("with_vars_scope")
+        return VariableResolver.SCENARIO
+
+    def _with_vars_commands(self, scenario_list):
+        """
+        Returns:
+            list: tuples of (step key, command) of 'with_vars' which are referred from arguments
+        """
+        commands = []
+        for block in scenario_list:
+            for row in block.get("parallel") or block.get("pipeline") or [block]:
+                arguments = row.get("arguments")
+                if not isinstance(arguments, dict) or not arguments.get("with_vars"):
+                    continue
+                with_vars = arguments["with_vars"]
+                js = json.dumps({k: v for k, v in arguments.items() if k != "with_vars"})
+                for match in _VARS_PATTERN.findall(js):
+                    cmd = with_vars.get(match.strip())
+                    if cmd:
+                        commands.append((id(row), cmd))
+        return commands
+
+    def _has_dependencies(self, scenario_list):
+        """
+        Returns:
+            True if any step declares 'depends_on'
+        """
+        for block in scenario_list:
+            for row in block.get("parallel") or [block]:
+                if "depends_on" in row.keys():
+                    return True
+        return False
+
     def _create_executable_instances(self, s_dict):
         """
         Create executable instances
 
         Returns:
-            list: Executable instances
+            StepBlock: Executable instances
         """
-        instances = []
+        instances = StepBlock(
+            parallel_mode=s_dict.get("parallel_mode"),
+            multi_proc_cnt=s_dict.get("multi_process_count"),
+        )
         if "parallel" in s_dict.keys():
             for row in s_dict.get("parallel"):
                 instance = self._create_instance(row)
                 instances.append(instance)
                 StepArgument._put(row["step"], instance)
+        elif "pipeline" in s_dict.keys():
+            instance = self._create_pipeline(s_dict)
+            instances.append(instance)
+            StepArgument._put(s_dict["step"], instance)
         else:
             instance = self._create_instance(s_dict)
             instances.append(instance)
@@ -151,6 +240,23 @@ class ScenarioManager(object):
 
         return instances
 
+    def _create_pipeline(self, s_dict):
+        """
+        Create an instance which executes the steps of 'pipeline:' row by row
+        """
+        from cliboa.scenario.transform.pipeline import StepPipeline
+
+        steps = []
+        for row in s_dict.get("pipeline"):
+            instance = self._create_instance(row)
+            steps.append(instance)
+            StepArgument._put(row["step"], instance)
+
+        pipeline = StepPipeline()
+        Helper.set_property(pipeline, "steps", steps)
+        self._set_base_args(pipeline, s_dict, {})
+        return pipeline
+
     def _create_instance(self, s_dict):
         """
         Create instance
@@ -163,7 +269,11 @@ class ScenarioManager(object):
 
             instance = CustomInstanceFactory.create(cls_name)
         else:
-            cls = globals()[cls_name]
+            cls = get_step_class(cls_name)
+            if cls is None:
+                raise ScenarioFileInvalid(
+                    "scenario.yml is invalid. class %s does not exist." % cls_name
+                )
             instance = cls()
 
         cls_attrs_dict = {}
@@ -173,9 +283,13 @@ class ScenarioManager(object):
         values = {}
         if cls_attrs_dict:
             cls_attrs_dict, with_vars = self._split_class_vars(cls_attrs_dict)
-            ret = self._set_values(instance, cls_attrs_dict, with_vars)
+            ret = self._set_values(instance, cls_attrs_dict, with_vars, s_dict)
             values.update(ret)
 
+        self._set_base_args(instance, s_dict, values)
+        return instance
+
+    def _set_base_args(self, instance, s_dict, values):
         base_args = ["step", "symbol", "parallel", "io", "listeners"]
         for arg in base_args:
             if arg == "listeners":
@@ -189,8 +303,6 @@ class ScenarioManager(object):
             LisboaLog.get_logger(instance.__class__.__name__),
         )
 
-        return instance
-
     def _split_class_vars(self, arguments):
         """
         If "with_vars" exist in arguments of individual steps,
@@ -211,7 +323,7 @@ class ScenarioManager(object):
             del arguments["with_vars"]
         return arguments, with_vars
 
-    def _set_values(self, instance, arguments, with_vars):
+    def _set_values(self, instance, arguments, with_vars, s_dict=None):
         """
         Set parameters to the instance.
 
@@ -219,15 +331,19 @@ class ScenarioManager(object):
             instance (class): instance
             arguments (dict): Arguments of steps
             with_vars (dict): with_vars parameter
+            s_dict (dict): Step definition of scenario.yml
 
         Returns:
             dict: Dictionary of arguments which was set
         """
-        pattern = re.compile(r"{{(.*?)}}")
         values = {}
         for yaml_k, yaml_v in arguments.items():
+            if not self._has_vars(yaml_v):
+                Helper.set_property(instance, yaml_k, yaml_v)
+                values[yaml_k] = yaml_v
+                continue
             js = json.dumps(yaml_v)
-            matches = pattern.findall(js)
+            matches = _VARS_PATTERN.findall(js)
             for match in matches:
                 var_name = match.strip()
                 if not var_name:
@@ -238,21 +354,37 @@ class ScenarioManager(object):
                         "scenario file is invalid. 'with_vars' definition against %s does not exist."  # noqa
                         % var_name
                     )
-                js = self._replace_vars(js, var_name, cmd)
+                value = self._resolver.resolve(
+                    id(s_dict), (s_dict or {}).get("step"), var_name, cmd
+                )
+                js = self._replace_vars(js, var_name, value)
                 yaml_v = json.loads(js)
             Helper.set_property(instance, yaml_k, yaml_v)
             values[yaml_k] = yaml_v
         return values
 
-    def _replace_vars(self, yaml_v, var_name, cmd):
+    def _has_vars(self, yaml_v):
+        """
+        Returns:
+            bool: True if the value contains {{ xxx }}
         """
-        This method replaces the value of {{ xxx }} based on the result of the shell script.
+        if isinstance(yaml_v, str):
+            return "{{" in yaml_v
+        if isinstance(yaml_v, dict):
+            return any(self._has_vars(k) or self._has_vars(v) for k, v in yaml_v.items())
+        if isinstance(yaml_v, list):
+            return any(self._has_vars(v) for v in yaml_v)
+        return False
+
+    def _replace_vars(self, yaml_v, var_name, value):
+        """
+        This method replaces the value of {{ xxx }} with the result of the shell script.
 
         Ex.
           -- IN --
           yaml_v: /resources/{{ yyyyMMdd }}
           var_name: yyyyMMdd
-          cmd: date '+%Y%m%d'
+          value: 20210101
 
           -- OUT --
           /resources/20210101
@@ -260,24 +392,17 @@ class ScenarioManager(object):
         Args:
             yaml_v: Yaml value. Must contain {{ xxx }}
             var_name: Name of xxx
-            cmd: Shell script
+            value: Result of the shell script
 
         Returns:
             str: replaced value
         """
-        shell_output = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, shell=True
-        ).communicate()[0]
-        shell_output = shell_output.strip()
-        # remove head byte string
-        shell_output = re.sub("^b", "", str(shell_output))
-        # remove '
-        shell_output = re.sub("'", "", str(shell_output))
-
-        return re.sub(r"{{(\s?)%s(\s?)}}" % var_name, shell_output, yaml_v)
+        return re.sub(r"{{(\s?)%s(\s?)}}" % var_name, value, yaml_v)
 
     def _append_listeners(self, instance, args, values):
         listeners = [StepStatusListener()]
+        if self._profile_spool is not None:
+            listeners.append(StepProfileListener(self._profile_spool))
 
         if args is not None:
             from cliboa.core.factory import CustomInstanceFactory
@@ -313,4 +438,8 @@ class JsonScenarioManager(ScenarioManager):
     """
 
     def parse_file(self):
-        raise CliboaException("Not implemented yet")
+        """
+        Parse json format file to list object
+        """
+        parser = JsonScenarioParser(self._pj_scenario_file, self._cmn_scenario_file)
+        return parser.parse()
@@ -0,0 +1,176 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import math
+import os
+
+from cliboa.util.config import CliboaConfig
+from cliboa.util.constant import CostHint
+from cliboa.util.lisboa_log import LisboaLog
+
+__all__ = ["PoolSize"]
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+_MEMINFO = "/proc/meminfo"
+
+# cgroup v1 reports a huge number as the memory limit when it is not limited
+_UNLIMITED_MEMORY = 1 << 60
+
+
+class PoolSize(object):
+    """
+    Number of processes (or threads) which execute steps at once.
+
+    'multi_process_count: auto' is sized from the resources available to this process
+    and the cost hint of the steps (BaseStep.COST_HINT).
+        cpu: Number of available cpus
+        io: Number of available cpus * io_workers_per_cpu
+        memory: Number of workers which fit in the available memory,
+                memory_per_worker_mb for each, up to the number of available cpus
+    The smallest size among the hints of the steps is used, up to the number of steps.
+
+    Settings are in [multi_process] section of cliboa.ini.
+    """
+
+    AUTO = "auto"
+
+    _DEFAULT_IO_WORKERS_PER_CPU = 4
+    _DEFAULT_MEMORY_PER_WORKER_MB = 1024
+    _DEFAULT_MAX_WORKERS = 32
+
+    @staticmethod
+    def resolve(count, steps=()):
+        """
+        Args:
+            count: multi_process_count of scenario.yml. A positive integer or 'auto'.
+            steps: Steps which are executed in the pool
+
+        Returns:
+            int: Number of processes (or threads)
+        """
+        if count != PoolSize.AUTO:
+            return int(count)
+
+        cpus = PoolSize.available_cpus()
+        hints = {getattr(s, "COST_HINT", CostHint.CPU) for s in steps} or {CostHint.CPU}
+        sizes = []
+        for hint in hints:
+            if hint == CostHint.IO:
+                per_cpu = CliboaConfig.get("multi_process", "io_workers_per_cpu")
+                sizes.append(cpus * int(per_cpu or PoolSize._DEFAULT_IO_WORKERS_PER_CPU))
+            elif hint == CostHint.MEMORY:
+                per_worker = CliboaConfig.get("multi_process", "memory_per_worker_mb")
+                per_worker = int(per_worker or PoolSize._DEFAULT_MEMORY_PER_WORKER_MB)
+                memory = PoolSize.available_memory()
+                if memory is None:
+                    sizes.append(cpus)
+                else:
+                    sizes.append(min(cpus, memory // (per_worker * 1024 * 1024)))
+            else:
+                sizes.append(cpus)
+
+        max_workers = CliboaConfig.get("multi_process", "max_workers")
+        size = min(min(sizes), int(max_workers or PoolSize._DEFAULT_MAX_WORKERS))
+        if steps:
+            size = min(size, len(steps))
+        size = max(size, 1)
+        LisboaLog.get_logger(__name__).info(
+            "multi_process_count: auto is %s. cpus=%s, cost hints=%s" % (size, cpus, sorted(hints))
+        )
+        return size
+
+    @staticmethod
+    def available_cpus():
+        """
+        Returns:
+            int: Number of cpus this process can use, limited by cpu affinity and cgroup quota
+        """
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except AttributeError:
+            # not supported on macOS and Windows
+            cpus = os.cpu_count() or 1
+
+        quota = _cgroup_cpu_quota()
+        if quota is not None:
+            cpus = min(cpus, max(int(math.ceil(quota)), 1))
+        return cpus
+
+    @staticmethod
+    def available_memory():
+        """
+        Returns:
+            int: Bytes of memory this process can use, limited by cgroup memory limit.
+                 None if unknown.
+        """
+        available = None
+        content = _read(_MEMINFO)
+        if content:
+            for line in content.splitlines():
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+
+        limit = _cgroup_memory_available()
+        if limit is not None:
+            available = limit if available is None else min(available, limit)
+        return available
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_cpu_quota():
+    """
+    Returns:
+        float: Number of cpus of cgroup cpu quota. None if not limited.
+    """
+    # cgroup v2, e.g. "max 100000" or "200000 100000"
+    content = _read(os.path.join(_CGROUP_ROOT, "cpu.max"))
+    if content:
+        quota, period = content.split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+
+    # cgroup v1
+    for d in ("cpu", "cpu,cpuacct"):
+        quota = _read(os.path.join(_CGROUP_ROOT, d, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(_CGROUP_ROOT, d, "cpu.cfs_period_us"))
+        if quota and period:
+            if int(quota) <= 0:
+                return None
+            return int(quota) / int(period)
+    return None
+
+
+def _cgroup_memory_available():
+    """
+    Returns:
+        int: cgroup memory limit minus current usage. None if not limited.
+    """
+    # cgroup v2
+    limit = _read(os.path.join(_CGROUP_ROOT, "memory.max"))
+    usage = _read(os.path.join(_CGROUP_ROOT, "memory.current"))
+    if limit is None:
+        # cgroup v1
+        limit = _read(os.path.join(_CGROUP_ROOT, "memory", "memory.limit_in_bytes"))
+        usage = _read(os.path.join(_CGROUP_ROOT, "memory", "memory.usage_in_bytes"))
+    if not limit or limit == "max" or int(limit) >= _UNLIMITED_MEMORY:
+        return None
+    return max(int(limit) - int(usage or 0), 0)
@@ -0,0 +1,244 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import csv
+import json
+import os
+import resource
+import threading
+import time
+from datetime import datetime
+
+from cliboa.conf import env
+from cliboa.core.listener import ScenarioListener, StepListener
+from cliboa.util.config import CliboaConfig
+
+__all__ = ["StepProfileListener", "ProfileReportListener", "count_files"]
+
+_MATCHED_FILES = threading.local()
+
+_REPORT_COLUMNS = [
+    "step",
+    "class",
+    "status",
+    "pid",
+    "started_at",
+    "finished_at",
+    "wall_sec",
+    "cpu_user_sec",
+    "cpu_sys_sec",
+    "children_user_sec",
+    "children_sys_sec",
+    "max_rss_growth_kb",
+    "process_max_rss_kb",
+    "read_bytes",
+    "write_bytes",
+    "files",
+]
+
+
+def count_files(count):
+    """
+    Add the number of files which a step matched. Called from BaseStep.get_target_files.
+    """
+    _MATCHED_FILES.count = getattr(_MATCHED_FILES, "count", 0) + count
+
+
+def _io_counters():
+    """
+    Returns:
+        dict: read_bytes and write_bytes of /proc/self/io. Empty if unavailable.
+    """
+    counters = {}
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                k, v = line.split(":")
+                if k in ("read_bytes", "write_bytes"):
+                    counters[k] = int(v)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+def _usage():
+    # CPU time of the thread if the platform supports it,
+    # since steps of a parallel block may run in threads of the same process.
+    who = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+    return {
+        "wall": time.perf_counter(),
+        "self": resource.getrusage(who),
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN),
+        "io": _io_counters(),
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+class StepProfileListener(StepListener):
+    """
+    Record resource usage of a step, and append it to the spool file of the scenario.
+
+    The spool file is shared with the steps executed in the pool workers,
+    and is converted to a report by ProfileReportListener at the end of the scenario.
+    """
+
+    def __init__(self, spool):
+        super().__init__()
+        self._spool = spool
+        self._start = None
+        self._started_at = None
+        self._status = None
+
+    def before_step(self, *args, **kwargs):
+        _MATCHED_FILES.count = 0
+        self._status = "failed"
+        self._started_at = datetime.now().isoformat()
+        self._start = _usage()
+
+    def after_step(self, *args, **kwargs):
+        self._status = "succeeded"
+
+    def error_step(self, *args, **kwargs):
+        self._status = "failed"
+
+    def after_completion(self, *args, **kwargs):
+        if self._start is None:
+            return
+        end = _usage()
+        start = self._start
+        self._start = None
+        step = args[0]
+        record = {
+            "step": step._step,
+            "class": step.__class__.__name__,
+            "status": self._status,
+            "pid": os.getpid(),
+            "started_at": self._started_at,
+            "finished_at": datetime.now().isoformat(),
+            "wall_sec": round(end["wall"] - start["wall"], 6),
+            "cpu_user_sec": round(end["self"].ru_utime - start["self"].ru_utime, 6),
+            "cpu_sys_sec": round(end["self"].ru_stime - start["self"].ru_stime, 6),
+            "children_user_sec": round(
+                end["children"].ru_utime - start["children"].ru_utime, 6
+            ),
+            "children_sys_sec": round(
+                end["children"].ru_stime - start["children"].ru_stime, 6
+            ),
+            # ru_maxrss is the peak of the process lifetime, not of the step.
+            # How much the step raised it is the closest per-step value.
+            "max_rss_growth_kb": end["max_rss"] - start["max_rss"],
+            "process_max_rss_kb": end["max_rss"],
+            "read_bytes": self._diff(start["io"], end["io"], "read_bytes"),
+            "write_bytes": self._diff(start["io"], end["io"], "write_bytes"),
+            "files": getattr(_MATCHED_FILES, "count", 0),
+        }
+        self._write(record)
+
+    def skip_step(self, *args, **kwargs):
+        step = args[0]
+        now = datetime.now().isoformat()
+        record = dict.fromkeys(_REPORT_COLUMNS)
+        record.update(
+            {
+                "step": step._step,
+                "class": step.__class__.__name__,
+                "status": "skipped",
+                "pid": os.getpid(),
+                "started_at": now,
+                "finished_at": now,
+                "wall_sec": 0,
+                "files": 0,
+            }
+        )
+        self._write(record)
+
+    def _write(self, record):
+        try:
+            # One write call in append mode, so that lines of processes are not mixed
+            with open(self._spool, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            self._logger.warning("Failed to record the step profile. %s" % e)
+
+    def _diff(self, start, end, key):
+        if key not in start or key not in end:
+            return None
+        return end[key] - start[key]
+
+
+class ProfileReportListener(ScenarioListener):
+    """
+    Write the step profiles of a scenario execution to json and/or csv files.
+
+    Settings are in [profile] section of cliboa.ini.
+        report_dir: Directory of reports. Default is project/$project_name/profile
+        format: Comma separated formats of reports, json and/or csv. Default is json.
+    """
+
+    def __init__(self, spool, project_name):
+        super().__init__()
+        self._spool = spool
+        self._report_dir = CliboaConfig.get("profile", "report_dir") or os.path.join(
+            env.PROJECT_DIR, project_name, "profile"
+        )
+        self._formats = CliboaConfig.getlist("profile", "format") or ["json"]
+        self._project_name = project_name
+        self._started_at = None
+
+    @staticmethod
+    def create_spool(project_name):
+        """
+        Returns:
+            str: Path of a new spool file for a scenario execution
+        """
+        spool_dir = os.path.join(env.PROJECT_DIR, project_name)
+        return os.path.join(
+            spool_dir,
+            ".profile_%s_%s.jsonl" % (datetime.now().strftime("%Y%m%d%H%M%S%f"), os.getpid()),
+        )
+
+    def before_scenario(self, worker):
+        self._started_at = datetime.now()
+
+    def after_scenario(self, worker):
+        records = []
+        if os.path.exists(self._spool):
+            with open(self._spool, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            os.remove(self._spool)
+        records.sort(key=lambda r: r["started_at"])
+
+        os.makedirs(self._report_dir, exist_ok=True)
+        started_at = self._started_at or datetime.now()
+        name = "profile_%s" % started_at.strftime("%Y%m%d%H%M%S")
+        if "json" in self._formats:
+            path = os.path.join(self._report_dir, name + ".json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "project": self._project_name,
+                        "started_at": started_at.isoformat(),
+                        "finished_at": datetime.now().isoformat(),
+                        "steps": records,
+                    },
+                    f,
+                    indent=2,
+                )
+            self._logger.info("Profile report is written to %s" % path)
+        if "csv" in self._formats:
+            path = os.path.join(self._report_dir, name + ".csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=_REPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(records)
+            self._logger.info("Profile report is written to %s" % path)
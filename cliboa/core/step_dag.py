@@ -0,0 +1,167 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+from cliboa.util.exception import ScenarioFileInvalid
+
+__all__ = ["StepDag"]
+
+
+class StepDag(object):
+    """
+    Directed acyclic graph of steps.
+
+    Used instead of the linear block order when any step in scenario.yml declares
+    'depends_on'. A step which declares 'depends_on' waits only for the given steps.
+    A step which does not declare it waits for all the steps of the previous block,
+    same as a scenario without dependencies.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    SKIPPED = "skipped"
+
+    def __init__(self):
+        self._instances = []
+        self._names = []
+        self._depends_on = []
+        self._parents = []
+        self._children = []
+        self._status = []
+        self._prev_block = []
+
+    def __len__(self):
+        return len(self._instances)
+
+    def push(self, instances, names, depends_on):
+        """
+        Add one block of scenario.yml (a single step or steps of a parallel block)
+
+        Args:
+            instances (list): Step instances
+            names (list): Step names
+            depends_on (list): 'depends_on' value of each step. None if not declared.
+        """
+        block = []
+        for instance, name, deps in zip(instances, names, depends_on):
+            node = len(self._instances)
+            self._instances.append(instance)
+            self._names.append(name)
+            if deps is None:
+                self._depends_on.append(None)
+                self._parents.append(set(self._prev_block))
+            else:
+                self._depends_on.append([deps] if isinstance(deps, str) else list(deps))
+                self._parents.append(set())
+            self._children.append(set())
+            self._status.append(self.PENDING)
+            block.append(node)
+        self._prev_block = block
+
+    def build(self):
+        """
+        Resolve 'depends_on' names and validate the graph.
+        """
+        for node, deps in enumerate(self._depends_on):
+            if deps is None:
+                continue
+            for dep in deps:
+                candidates = [i for i, n in enumerate(self._names) if n == dep]
+                if not candidates:
+                    raise ScenarioFileInvalid(
+                        "scenario.yml is invalid. 'depends_on' step %s does not exist." % dep
+                    )
+                if len(candidates) > 1:
+                    raise ScenarioFileInvalid(
+                        "scenario.yml is invalid. 'depends_on' step %s is not unique." % dep
+                    )
+                if candidates[0] == node:
+                    raise ScenarioFileInvalid(
+                        "scenario.yml is invalid. step %s depends on itself." % dep
+                    )
+                self._parents[node].add(candidates[0])
+
+        for node, parents in enumerate(self._parents):
+            for parent in parents:
+                self._children[parent].add(node)
+
+        self._valid_acyclic()
+
+    def _valid_acyclic(self):
+        """
+        Kahn's algorithm. Every node must be reachable in a topological order.
+        """
+        in_degree = [len(p) for p in self._parents]
+        roots = [i for i, d in enumerate(in_degree) if d == 0]
+        visited = 0
+        while roots:
+            node = roots.pop()
+            visited += 1
+            for child in self._children[node]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    roots.append(child)
+        if visited != len(self._instances):
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'depends_on' has a circular reference."
+            )
+
+    def get(self, node):
+        """
+        Returns:
+            step instance of the node
+        """
+        return self._instances[node]
+
+    def ready(self):
+        """
+        Returns:
+            list: Nodes whose dependencies are all done, in scenario.yml order
+        """
+        return [
+            node
+            for node, status in enumerate(self._status)
+            if status == self.PENDING
+            and all(self._status[p] == self.DONE for p in self._parents[node])
+        ]
+
+    def start(self, node):
+        self._status[node] = self.RUNNING
+
+    def done(self, node):
+        self._status[node] = self.DONE
+
+    def skip(self, node):
+        """
+        Mark the node and all the nodes depend on it as skipped.
+
+        Returns:
+            list: Skipped nodes
+        """
+        skipped = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if self._status[n] == self.SKIPPED:
+                continue
+            self._status[n] = self.SKIPPED
+            skipped.append(n)
+            stack.extend(self._children[n])
+        return skipped
+
+    def is_done(self):
+        """
+        Returns:
+            True if there is no pending or running node
+        """
+        return all(s in (self.DONE, self.SKIPPED) for s in self._status)
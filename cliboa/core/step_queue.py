@@ -13,7 +13,7 @@
 #
 from queue import Queue
 
-__all__ = ["StepQueue"]
+__all__ = ["StepQueue", "StepBlock"]
 
 
 class StepQueue(Queue):
@@ -27,6 +27,7 @@ class StepQueue(Queue):
         super().__init__()
         self._multi_proc_cnt = self._DEFAULT_PARALLEL_CNT
         self._force_continue = False
+        self._profile = None
 
     @property
     def multi_proc_cnt(self):
@@ -44,6 +45,17 @@ class StepQueue(Queue):
     def force_continue(self, force_continue):
         self._force_continue = force_continue
 
+    @property
+    def profile(self):
+        """
+        Spool file of step profiles. None if profiling is disabled.
+        """
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile):
+        self._profile = profile
+
     def push(self, instance):
         self.put(instance)
 
@@ -70,3 +82,29 @@ class StepQueue(Queue):
             if queue is not empty: False
         """
         return self.empty()
+
+
+class StepBlock(list):
+    """
+    Steps which are executed at once (a single step or steps of a parallel block),
+    with the options given to the block.
+    """
+
+    PROCESS = "process"
+    THREAD = "thread"
+
+    def __init__(self, steps=(), parallel_mode=None, multi_proc_cnt=None):
+        super().__init__(steps)
+        self._parallel_mode = parallel_mode if parallel_mode else self.PROCESS
+        self._multi_proc_cnt = multi_proc_cnt
+
+    @property
+    def parallel_mode(self):
+        return self._parallel_mode
+
+    @property
+    def multi_proc_cnt(self):
+        """
+        multi_process_count of the block. None if the scenario-wide value is used.
+        """
+        return self._multi_proc_cnt
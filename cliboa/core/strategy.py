@@ -11,17 +11,29 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import os
+import time
 from abc import abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from importlib import import_module
 from multiprocessing import Pool
 
 import cloudpickle
 from multiprocessing_logging import install_mp_handler
 
+from cliboa.core.pool_size import PoolSize
 from cliboa.core.scenario_queue import ScenarioQueue
+from cliboa.util.cache import ObjectStore
 from cliboa.util.exception import StepExecutionFailed
 from cliboa.util.lisboa_log import LisboaLog
 
-__all__ = ["SingleProcExecutor", "MultiProcExecutor"]
+__all__ = [
+    "SingleProcExecutor",
+    "MultiProcExecutor",
+    "MultiThreadExecutor",
+    "DagExecutor",
+    "StepWorkerPool",
+]
 
 
 class StepExecutor(object):
@@ -44,6 +56,16 @@ class StepExecutor(object):
         Execute steps in scenario file
         """
 
+    def _multi_proc_cnt(self, steps):
+        """
+        Returns:
+            int: multi_process_count of the block, or of the scenario if the block has none
+        """
+        multi_proc_cnt = getattr(self._step, "multi_proc_cnt", None)
+        if multi_proc_cnt is None:
+            multi_proc_cnt = ScenarioQueue.step_queue.multi_proc_cnt
+        return PoolSize.resolve(multi_proc_cnt, steps)
+
 
 class SingleProcExecutor(StepExecutor):
     """
@@ -69,32 +91,233 @@ class MultiProcExecutor(StepExecutor):
     Execute steps in queue with multi process
     """
 
+    def __init__(self, obj, pool=None):
+        """
+        Args:
+            obj: queue which stores execution target steps
+            pool: StepWorkerPool shared in the scenario.
+                  If None, a process pool is created for the steps.
+        """
+        super().__init__(obj)
+        self._pool = pool
+
     @staticmethod
-    def _async_step_execute(cls):
+    def _async_step_execute(task):
+        """
+        Args:
+            task: Pickled step, and ObjectStore values of the parent process
+                  which a reused worker has not seen yet
+
+        Returns:
+            tuple: ("OK" or "NG", ObjectStore values which the step put)
+        """
         try:
+            cls, changes = task
+            ObjectStore.adopt(changes, own=False)
             clz = cloudpickle.loads(cls)
+            version = ObjectStore.version()
             clz.trigger()
-            return "OK"
+            # Values are passed as files, not through the result pipe
+            return "OK", ObjectStore.publish(version)
         except Exception as e:
             LisboaLog.get_logger(__name__).error(e)
+            return "NG", []
+
+    def execute_steps(self, args):
+        multi_proc_cnt = self._multi_proc_cnt(self._step)
+        self._logger.info("Multi process start. Execute step count=%s." % multi_proc_cnt)
+        packed = [cloudpickle.dumps(step) for step in self._step]
+
+        start = time.time()
+        try:
+            # A block which has its own multi_process_count does not use the shared pool
+            if self._pool is None or getattr(self._step, "multi_proc_cnt", None) is not None:
+                install_mp_handler()
+                with Pool(processes=multi_proc_cnt) as p:
+                    startup = time.time() - start
+                    tasks = [(step, []) for step in packed]
+                    self._wait_results(p.imap_unordered(self._async_step_execute, tasks))
+            else:
+                p = self._pool.get()
+                # Workers forked at the first block. Pass values put in this process after that
+                changes = self._pool.changes()
+                startup = time.time() - start
+                tasks = [(step, changes) for step in packed]
+                self._wait_results(p.imap_unordered(self._async_step_execute, tasks))
+        except Exception as e:
+            self._logger.error("Exception occurred during multi process execution.")
+            raise e
+
+        self._logger.info(
+            "Multi process finish. pool startup: %.3f sec, execution: %.3f sec."
+            % (startup, time.time() - start - startup)
+        )
+
+    def _wait_results(self, results):
+        for r, published in results:
+            ObjectStore.adopt(published)
+            if r == "NG":
+                if ScenarioQueue.step_queue.force_continue:
+                    self._logger.warning("Multi process response. %s" % r)
+                else:
+                    raise StepExecutionFailed("Multi process response. %s" % r)
+
+
+class StepWorkerPool(object):
+    """
+    Process pool which is created once in a scenario and reused by every parallel block.
+    Worker processes start when the pool is requested first time.
+    ObjectStore values which are put in the parent process after that are passed to
+    the workers by changes() before every block.
+    """
+
+    def __init__(self, processes, preload_modules=None):
+        """
+        Args:
+            processes: Number of worker processes
+            preload_modules: Modules imported before worker processes start,
+                             so that workers do not import them again.
+        """
+        self._logger = LisboaLog.get_logger(__name__)
+        self._processes = processes
+        self._preload_modules = preload_modules if preload_modules else []
+        self._pool = None
+        self._version = None
+
+    def get(self):
+        """
+        Returns:
+            multiprocessing.Pool
+        """
+        if self._pool is None:
+            start = time.time()
+            for mod in self._preload_modules:
+                import_module(mod)
+            install_mp_handler()
+            # workers inherit the values put so far
+            self._version = ObjectStore.version()
+            self._pool = Pool(processes=self._processes)
+            self._logger.info(
+                "Worker pool started. processes=%s, preload_modules=%s, %.3f sec."
+                % (self._processes, self._preload_modules, time.time() - start)
+            )
+        return self._pool
+
+    def changes(self):
+        """
+        Returns:
+            list: ObjectStore values which were put (or adopted from workers) in this process
+                  after the workers started, as arguments of ObjectStore.adopt().
+                  The files are kept by this process.
+        """
+        if self._pool is None:
+            return []
+        return ObjectStore.publish(self._version, owner_pid=os.getpid())
+
+    def close(self):
+        """
+        Terminate the workers, same as a process pool of a parallel block does at the end
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+class MultiThreadExecutor(StepExecutor):
+    """
+    Execute steps in queue with multi thread.
+    Suitable for steps which mostly wait for network I/O (e.g. SftpDownload, S3Download),
+    since steps are neither pickled nor executed in forked processes.
+    """
+
+    def _step_execute(self, cls, args):
+        try:
+            cls.trigger(args)
+            return "OK"
+        except Exception as e:
+            self._logger.error(e)
             return "NG"
 
     def execute_steps(self, args):
+        multi_proc_cnt = self._multi_proc_cnt(self._step)
         self._logger.info(
-            "Multi process start. Execute step count=%s."
-            % ScenarioQueue.step_queue.multi_proc_cnt
+            "Multi thread start. Execute step count=%s." % multi_proc_cnt
         )
-        install_mp_handler()
-        packed = [cloudpickle.dumps(step) for step in self._step]
 
         try:
-            with Pool(processes=ScenarioQueue.step_queue.multi_proc_cnt) as p:
-                for r in p.imap_unordered(self._async_step_execute, packed):
+            with ThreadPoolExecutor(max_workers=multi_proc_cnt) as executor:
+                futures = [
+                    executor.submit(self._step_execute, step, args) for step in self._step
+                ]
+                for f in as_completed(futures):
+                    r = f.result()
                     if r == "NG":
                         if ScenarioQueue.step_queue.force_continue:
-                            self._logger.warning("Multi process response. %s" % r)
+                            self._logger.warning("Multi thread response. %s" % r)
                         else:
-                            raise StepExecutionFailed("Multi process response. %s" % r)
+                            raise StepExecutionFailed("Multi thread response. %s" % r)
         except Exception as e:
-            self._logger.error("Exception occurred during multi process execution.")
+            self._logger.error("Exception occurred during multi thread execution.")
             raise e
+
+
+class DagExecutor(StepExecutor):
+    """
+    Execute steps of StepDag.
+    Every step whose dependencies are done is executed concurrently,
+    up to multi_process_count steps at once.
+    """
+
+    def execute_steps(self, args):
+        dag = self._step
+        multi_proc_cnt = self._multi_proc_cnt([dag.get(node) for node in range(len(dag))])
+        force_continue = ScenarioQueue.step_queue.force_continue
+        self._logger.info(
+            "Dag execution start. Execute step count=%s." % multi_proc_cnt
+        )
+
+        ret = None
+        error = None
+        running = {}
+        with ThreadPoolExecutor(max_workers=multi_proc_cnt) as executor:
+            while True:
+                if ret is None and error is None:
+                    for node in dag.ready():
+                        if len(running) >= multi_proc_cnt:
+                            break
+                        dag.start(node)
+                        future = executor.submit(dag.get(node).trigger, args)
+                        running[future] = node
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    cls = dag.get(node)
+                    try:
+                        r = future.result()
+                    except Exception as e:
+                        self._logger.error(
+                            "Exception occurred during %s execution. Error Message: %s"
+                            % (cls.__class__.__name__, str(e))
+                        )
+                        skipped = dag.skip(node)[1:]
+                        if skipped:
+                            self._logger.warning(
+                                "Dependent steps are skipped. %s"
+                                % [dag.get(n).__class__.__name__ for n in skipped]
+                            )
+                        if not force_continue and error is None:
+                            error = e
+                        continue
+
+                    dag.done(node)
+                    if r is not None and ret is None:
+                        ret = r
+
+        if error is not None:
+            raise error
+        return ret
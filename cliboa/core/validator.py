@@ -115,22 +115,85 @@ class EssentialKeys(object):
             raise ScenarioFileInvalid(
                 "scenario.yml is invalid. it wad not a list"
             )
+        self._valid_dependencies()
         for scenario_yaml_dict in self._scenario_yaml_list:
-            multi_proc_cnt = scenario_yaml_dict.get("multi_process_count")
             force_continue = scenario_yaml_dict.get("force_continue")
             parallel_steps = scenario_yaml_dict.get("parallel")
-            if multi_proc_cnt:
-                continue
+            if "multi_process_count" in scenario_yaml_dict.keys() and not parallel_steps:
+                self._valid_multi_process_count(scenario_yaml_dict)
             elif force_continue is not None:
                 continue
+            elif "with_vars_scope" in scenario_yaml_dict.keys():
+                self._valid_with_vars_scope(scenario_yaml_dict)
+            elif "profile" in scenario_yaml_dict.keys():
+                continue
             elif parallel_steps:
+                self._valid_parallel_mode(scenario_yaml_dict)
+                self._valid_multi_process_count(scenario_yaml_dict)
                 for s in parallel_steps:
                     self._exists_step(s)
                     self._exists_class(s)
+            elif "pipeline" in scenario_yaml_dict.keys():
+                self._exists_step(scenario_yaml_dict)
+                self._valid_pipeline(scenario_yaml_dict)
             else:
                 self._exists_step(scenario_yaml_dict)
                 self._exists_class(scenario_yaml_dict)
 
+    def _valid_dependencies(self):
+        """
+        If any step declares 'depends_on', every step is executed in the threads of one graph.
+        Settings of a parallel block can not be applied there.
+        """
+        has_dependencies = False
+        for scenario_yaml_dict in self._scenario_yaml_list:
+            for s in scenario_yaml_dict.get("parallel") or [scenario_yaml_dict]:
+                if isinstance(s, dict) and "depends_on" in s.keys():
+                    has_dependencies = True
+        if not has_dependencies:
+            return
+        for scenario_yaml_dict in self._scenario_yaml_list:
+            if not scenario_yaml_dict.get("parallel"):
+                continue
+            for key in ("parallel_mode", "multi_process_count"):
+                if key in scenario_yaml_dict.keys():
+                    raise ScenarioFileInvalid(
+                        "scenario.yml is invalid. '%s:' of a parallel block can not be used with 'depends_on'."  # noqa
+                        % key
+                    )
+
+    def _valid_parallel_mode(self, dict):
+        parallel_mode = dict.get("parallel_mode")
+        if parallel_mode is not None and parallel_mode not in ("process", "thread"):
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'parallel_mode:' must be either process or thread."
+            )
+
+    def _valid_multi_process_count(self, dict):
+        multi_proc_cnt = dict.get("multi_process_count")
+        if multi_proc_cnt is None or multi_proc_cnt == "auto":
+            return
+        if type(multi_proc_cnt) is not int or multi_proc_cnt < 1:
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'multi_process_count:' must be a positive integer or auto."  # noqa
+            )
+
+    def _valid_pipeline(self, dict):
+        pipeline_steps = dict.get("pipeline")
+        if not isinstance(pipeline_steps, list) or not pipeline_steps:
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'pipeline:' must be a list of steps."
+            )
+        for s in pipeline_steps:
+            self._exists_step(s)
+            self._exists_class(s)
+
+    def _valid_with_vars_scope(self, dict):
+        if dict.get("with_vars_scope") not in ("scenario", "step"):
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'with_vars_scope:' must be either scenario or step."
+            )
+
     def _exists_step(self, dict):
         if "step" not in dict.keys():
             raise ScenarioFileInvalid(
@@ -0,0 +1,130 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cliboa.util.lisboa_log import LisboaLog
+
+__all__ = ["VariableResolver"]
+
+global _VARIABLE_RESOLVER
+_VARIABLE_RESOLVER = None
+
+
+class VariableResolver(object):
+    """
+    Evaluate shell commands of 'with_vars'.
+
+    Each distinct command is executed once and the result is reused.
+    With 'scenario' scope (default), the same command returns the same value in all the steps.
+    With 'step' scope, the command is executed once per step.
+    Commands can be evaluated concurrently in advance by prefetch().
+
+    The values are kept per step name, and listeners can refer them by
+    VariableResolver.get().variables
+    """
+
+    SCENARIO = "scenario"
+    STEP = "step"
+
+    _MAX_WORKERS = 8
+
+    def __init__(self, scope=SCENARIO):
+        self._logger = LisboaLog.get_logger(__name__)
+        self._scope = scope
+        self._results = {}
+        self._variables = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get():
+        """
+        Returns:
+            VariableResolver used to create the current scenario
+        """
+        return _VARIABLE_RESOLVER
+
+    @staticmethod
+    def set(resolver):
+        global _VARIABLE_RESOLVER
+        _VARIABLE_RESOLVER = resolver
+
+    @property
+    def scope(self):
+        return self._scope
+
+    @property
+    def variables(self):
+        """
+        Returns:
+            dict: {step name: {variable name: value}}
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._variables.items()}
+
+    def prefetch(self, commands):
+        """
+        Execute commands concurrently, and keep the results
+
+        Args:
+            commands (list): tuples of (step key, command).
+                             step key identifies a step, and is only used with 'step' scope.
+        """
+        keys = {}
+        for step_key, cmd in commands:
+            key = self._key(step_key, cmd)
+            if key not in self._results:
+                keys[key] = cmd
+        if not keys:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(len(keys), self._MAX_WORKERS)) as executor:
+            futures = {key: executor.submit(self._execute, cmd) for key, cmd in keys.items()}
+        with self._lock:
+            for key, future in futures.items():
+                self._results[key] = future.result()
+
+    def resolve(self, step_key, step_name, var_name, cmd):
+        """
+        Returns:
+            str: Result of the command
+        """
+        key = self._key(step_key, cmd)
+        with self._lock:
+            exists = key in self._results
+            value = self._results.get(key)
+        if not exists:
+            value = self._execute(cmd)
+            with self._lock:
+                value = self._results.setdefault(key, value)
+
+        with self._lock:
+            self._variables.setdefault(step_name, {})[var_name] = value
+        return value
+
+    def _key(self, step_key, cmd):
+        return cmd if self._scope == self.SCENARIO else (step_key, cmd)
+
+    def _execute(self, cmd):
+        self._logger.debug("Execute with_vars command. %s" % cmd)
+        shell_output = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, shell=True
+        ).communicate()[0]
+        shell_output = shell_output.strip()
+        # remove head byte string
+        shell_output = re.sub("^b", "", str(shell_output))
+        # remove '
+        return re.sub("'", "", str(shell_output))
@@ -12,8 +12,13 @@
 # all copies or substantial portions of the Software.
 #
 from cliboa.core.factory import StepExecutorFactory
+from cliboa.core.pool_size import PoolSize
+from cliboa.core.profiler import ProfileReportListener
 from cliboa.core.scenario_queue import ScenarioQueue
+from cliboa.core.strategy import StepWorkerPool
+from cliboa.util.config import CliboaConfig
 from cliboa.util.constant import StepStatus
+from cliboa.util.journal import RunJournal
 from cliboa.util.lisboa_log import LisboaLog
 
 
@@ -31,6 +36,11 @@ class ScenarioWorker(object):
         self._scenario_queue = ScenarioQueue
         self._cmd_args = cmd_args
         self._listeners = []
+        self._pool = None
+
+    @property
+    def project_name(self):
+        return self._cmd_args.project_name
 
     def get_scenario_queue_status(self):
         """
@@ -61,13 +71,38 @@ class ScenarioWorker(object):
         self._listeners.append(listener)
 
     def execute_scenario(self):
+        spool = self._scenario_queue.step_queue.profile
+        if spool is not None:
+            self.register_listeners(
+                ProfileReportListener(spool, self._cmd_args.project_name)
+            )
         self._before_scenario()
+        if CliboaConfig.getboolean("multi_process", "reuse_pool"):
+            self._pool = StepWorkerPool(
+                PoolSize.resolve(self._scenario_queue.step_queue.multi_proc_cnt),
+                CliboaConfig.getlist("multi_process", "preload_modules"),
+            )
+        resume = getattr(self._cmd_args, "resume", False)
+        journal = RunJournal.create(self._cmd_args.project_name, resume)
+        if journal is not None:
+            journal.start_run(resume=resume)
+            RunJournal.set(journal)
+
+        succeeded = False
         try:
-            return self.__execute_steps()
+            res = self.__execute_steps()
+            succeeded = res == StepStatus.SUCCESSFUL_TERMINATION
+            return res
         except Exception as e:
             self._logger.error(e)
             raise e
         finally:
+            if journal is not None:
+                journal.finish_run(succeeded)
+                RunJournal.set(None)
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
             self._after_scenario()
 
     def __execute_steps(self):
@@ -76,7 +111,9 @@ class ScenarioWorker(object):
         """
         res = None
         while not self._scenario_queue.step_queue.is_empty():
-            strategy = StepExecutorFactory.create(self._scenario_queue.step_queue.pop())
+            strategy = StepExecutorFactory.create(
+                self._scenario_queue.step_queue.pop(), self._pool
+            )
             res = strategy.execute_steps(self._cmd_args)
             if res is None:
                 continue
@@ -1,4 +1,3 @@
-# flake8: noqa
 #
 # Copyright BrainPad Inc. All Rights Reserved.
 #
@@ -12,57 +11,102 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-from .base import Stdout
-from .extract.aws import S3Download
-from .extract.azure import AzureBlobDownload
-from .extract.file import CsvRead
-from .extract.ftp import FtpDownload, FtpDownloadFileDelete
-from .extract.gcp import (
-    BigQueryFileDownload,
-    BigQueryRead,
-    BigQueryReadCache,
-    FirestoreDocumentDownload,
-    GcsDownload,
-    GcsDownloadFileDelete
-)
-from .extract.http import HttpDownload, HttpDownloadViaBasicAuth
-from .extract.mysql import MysqlRead
-from .extract.sftp import SftpDelete, SftpDownload, SftpDownloadFileDelete
-from .extract.sqlite import SqliteRead, SqliteReadRow
-from .load.aws import S3Upload
-from .load.azure import AzureBlobUpload
-from .load.file import CsvWrite
-from .load.gcp import (
-    BigQueryCreate,
-    BigQueryWrite,
-    CsvReadBigQueryCreate,
-    FirestoreDocumentCreate,
-    GcsFileUpload,
-    GcsUpload
-)
-from .load.sftp import SftpFileLoad, SftpUpload
-from .load.sqlite import CsvReadSqliteCreate, SqliteCreation, SqliteImport
-from .sqlite import SqliteQueryExecute
-from .transform.csv import (
-    ColumnLengthAdjust,
-    CsvColumnConcat,
-    CsvColumnExtract,
-    CsvConcat,
-    CsvFormatChange,
-    CsvHeaderConvert,
-    CsvMerge,
-    CsvConvert,
-    CsvSort,
-    CsvToJsonl,
-)
-from .transform.file import (
-    DateFormatConvert,
-    ExcelConvert,
-    FileCompress,
-    FileConvert,
-    FileDecompress,
-    FileDivide,
-    FileRename,
-    FileArchive
-)
-from .transform.gpg import GpgGenerateKey, GpgEncrypt, GpgDecrypt
+import sys
+from importlib import import_module
+
+# Default step classes and the modules which define them.
+# A module is imported only when a scenario uses one of its classes,
+# so that heavy dependencies (pandas, google-cloud, boto3 ...) are not loaded in vain.
+STEP_CLASSES = {
+    "Stdout": "cliboa.scenario.base",
+    "S3Download": "cliboa.scenario.extract.aws",
+    "AzureBlobDownload": "cliboa.scenario.extract.azure",
+    "CsvRead": "cliboa.scenario.extract.file",
+    "FtpDownload": "cliboa.scenario.extract.ftp",
+    "FtpDownloadFileDelete": "cliboa.scenario.extract.ftp",
+    "BigQueryFileDownload": "cliboa.scenario.extract.gcp",
+    "BigQueryRead": "cliboa.scenario.extract.gcp",
+    "BigQueryReadCache": "cliboa.scenario.extract.gcp",
+    "FirestoreDocumentDownload": "cliboa.scenario.extract.gcp",
+    "GcsDownload": "cliboa.scenario.extract.gcp",
+    "GcsDownloadFileDelete": "cliboa.scenario.extract.gcp",
+    "HttpDownload": "cliboa.scenario.extract.http",
+    "HttpDownloadViaBasicAuth": "cliboa.scenario.extract.http",
+    "MysqlRead": "cliboa.scenario.extract.mysql",
+    "SftpDelete": "cliboa.scenario.extract.sftp",
+    "SftpDownload": "cliboa.scenario.extract.sftp",
+    "SftpDownloadFileDelete": "cliboa.scenario.extract.sftp",
+    "SqliteRead": "cliboa.scenario.extract.sqlite",
+    "SqliteReadRow": "cliboa.scenario.extract.sqlite",
+    "S3Upload": "cliboa.scenario.load.aws",
+    "AzureBlobUpload": "cliboa.scenario.load.azure",
+    "CsvWrite": "cliboa.scenario.load.file",
+    "BigQueryCreate": "cliboa.scenario.load.gcp",
+    "BigQueryWrite": "cliboa.scenario.load.gcp",
+    "CsvReadBigQueryCreate": "cliboa.scenario.load.gcp",
+    "FirestoreDocumentCreate": "cliboa.scenario.load.gcp",
+    "GcsFileUpload": "cliboa.scenario.load.gcp",
+    "GcsUpload": "cliboa.scenario.load.gcp",
+    "SftpFileLoad": "cliboa.scenario.load.sftp",
+    "SftpUpload": "cliboa.scenario.load.sftp",
+    "CsvReadSqliteCreate": "cliboa.scenario.load.sqlite",
+    "SqliteCreation": "cliboa.scenario.load.sqlite",
+    "SqliteImport": "cliboa.scenario.load.sqlite",
+    "SqliteQueryExecute": "cliboa.scenario.sqlite",
+    "ColumnLengthAdjust": "cliboa.scenario.transform.csv",
+    "CsvColumnConcat": "cliboa.scenario.transform.csv",
+    "CsvColumnExtract": "cliboa.scenario.transform.csv",
+    "CsvConcat": "cliboa.scenario.transform.csv",
+    "CsvFormatChange": "cliboa.scenario.transform.csv",
+    "CsvHeaderConvert": "cliboa.scenario.transform.csv",
+    "CsvMerge": "cliboa.scenario.transform.csv",
+    "CsvConvert": "cliboa.scenario.transform.csv",
+    "CsvSort": "cliboa.scenario.transform.csv",
+    "CsvToJsonl": "cliboa.scenario.transform.csv",
+    "DateFormatConvert": "cliboa.scenario.transform.file",
+    "ExcelConvert": "cliboa.scenario.transform.file",
+    "FileCompress": "cliboa.scenario.transform.file",
+    "FileConvert": "cliboa.scenario.transform.file",
+    "FileDecompress": "cliboa.scenario.transform.file",
+    "FileDivide": "cliboa.scenario.transform.file",
+    "FileRename": "cliboa.scenario.transform.file",
+    "FileArchive": "cliboa.scenario.transform.file",
+    "GpgGenerateKey": "cliboa.scenario.transform.gpg",
+    "GpgEncrypt": "cliboa.scenario.transform.gpg",
+    "GpgDecrypt": "cliboa.scenario.transform.gpg",
+}
+
+__all__ = list(STEP_CLASSES.keys())
+
+
+def get_step_class(cls_name):
+    """
+    Import the module of a default step class and returns the class
+
+    Args:
+        cls_name (str): Class name
+
+    Returns:
+        class: Step class. None if cls_name is not a default step class.
+    """
+    module = STEP_CLASSES.get(cls_name)
+    if module is None:
+        return None
+    return getattr(import_module(module), cls_name)
+
+
+def __getattr__(name):
+    # Keep 'from cliboa.scenario import CsvConvert' working (python 3.7+)
+    cls = get_step_class(name)
+    if cls is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return cls
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported before python 3.7. Import all the classes instead.
+    globals().update({name: get_step_class(name) for name in STEP_CLASSES})
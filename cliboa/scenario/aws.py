@@ -13,6 +13,7 @@
 #
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
+from cliboa.util.constant import CostHint
 
 
 class BaseAws(BaseStep):
@@ -20,6 +21,8 @@ class BaseAws(BaseStep):
     Base class of AWS related classes
     """
 
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._region = None
@@ -14,6 +14,7 @@
 
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
+from cliboa.util.constant import CostHint
 
 
 class BaseAzure(BaseStep):
@@ -21,6 +22,8 @@ class BaseAzure(BaseStep):
     Base class of Azure related classes
     """
 
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._account_url = None
@@ -18,10 +18,13 @@ import tempfile
 from abc import abstractmethod
 
 from cliboa.conf import env
+from cliboa.core.profiler import count_files
 from cliboa.scenario.validator import IOOutput
 from cliboa.util.cache import StepArgument, StorageIO
+from cliboa.util.constant import CostHint
 from cliboa.util.exception import FileNotFound, InvalidParameter
 from cliboa.util.file import File
+from cliboa.util.journal import RunJournal
 
 
 class BaseStep(object):
@@ -29,6 +32,10 @@ class BaseStep(object):
     Base class of all the step classes
     """
 
+    # Resource which the step mostly consumes, one of CostHint.
+    # Used to size the pool of 'multi_process_count: auto'.
+    COST_HINT = CostHint.CPU
+
     def __init__(self):
         self._s = StorageIO()
         self._step = None
@@ -57,6 +64,16 @@ class BaseStep(object):
         self._listeners = listeners
 
     def trigger(self, *args):
+        journal = RunJournal.get()
+        if journal is not None and journal.resume_step(self):
+            self._logger.info(
+                "Skip step execution. %s succeeded in the resumed execution."
+                % self.__class__.__name__
+            )
+            for listener in self._listeners:
+                listener.skip_step(self)
+            return None
+
         mask = None
         path = os.path.join(env.BASE_DIR, "conf", "cliboa.ini")
         if os.path.exists(path):
@@ -76,20 +93,28 @@ class BaseStep(object):
         try:
             for listener in self._listeners:
                 listener.before_step(self)
+            if journal is not None:
+                journal.start_step(self)
 
             ret = self.execute(args)
 
+            if journal is not None:
+                journal.succeed_step(self)
             for listener in self._listeners:
                 listener.after_step(self)
 
             return ret
 
         except Exception as e:
+            if journal is not None:
+                journal.fail_step(self)
             for listener in self._listeners:
                 listener.error_step(self, e)
 
             return self._exception_dispatcher(e)
         finally:
+            if journal is not None:
+                journal.complete_step(self)
             for listener in self._listeners:
                 listener.after_completion(self)
 
@@ -101,7 +126,9 @@ class BaseStep(object):
         """
         Search files either with regular expression
         """
-        return File().get_target_files(src_dir, src_pattern)
+        files = File().get_target_files(src_dir, src_pattern)
+        count_files(len(files))
+        return files
 
     def get_step_argument(self, name):
         """
@@ -166,6 +193,5 @@ class Stdout(BaseStep):
         output_valid = IOOutput(self._io)
         output_valid()
 
-        with open(self._s.cache_file, "r", encoding="utf-8") as f:
-            for l in f:
-                print(l)
+        for row in self._s.load():
+            print(row)
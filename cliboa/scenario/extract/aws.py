@@ -17,6 +17,7 @@ import re
 from cliboa.adapter.aws import S3Adapter
 from cliboa.scenario.aws import BaseS3
 from cliboa.scenario.validator import EssentialParameters
+from cliboa.util.metrics import Metrics
 
 
 class S3Download(BaseS3):
@@ -64,3 +65,4 @@ class S3Download(BaseS3):
                     continue
                 dest_path = os.path.join(self._dest_dir, filename)
                 client.download_file(self._bucket, path, dest_path)
+                Metrics.add_file_bytes(dest_path)
@@ -100,6 +100,7 @@ class CsvRead(FileRead):
                 for row in reader:
                     row_dict = dict(zip(header, row))
                     self._s.save(row_dict)
+        self._s.flush()
 
         # cache downloaded file names
         ObjectStore.put(self._step, files)
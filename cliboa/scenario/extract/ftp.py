@@ -17,11 +17,13 @@ import re
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
 from cliboa.util.cache import ObjectStore
-from cliboa.util.constant import StepStatus
+from cliboa.util.constant import CostHint, StepStatus
 from cliboa.util.ftp_util import FtpUtil
 
 
 class FtpExtract(BaseStep):
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._src_dir = None
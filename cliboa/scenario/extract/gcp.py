@@ -26,6 +26,7 @@ from cliboa.scenario.validator import EssentialParameters
 from cliboa.util.cache import ObjectStore
 from cliboa.util.exception import InvalidParameter
 from cliboa.util.gcp import BigQuery, Firestore, Gcs, ServiceAccount
+from cliboa.util.metrics import Metrics
 from cliboa.util.string import StringUtil
 
 
@@ -388,9 +389,9 @@ class GcsDownload(BaseGcs):
             if not r.fullmatch(blob.name):
                 continue
             dl_files.append(blob.name)
-            blob.download_to_filename(
-                os.path.join(self._dest_dir, os.path.basename(blob.name))
-            )
+            dest = os.path.join(self._dest_dir, os.path.basename(blob.name))
+            blob.download_to_filename(dest)
+            Metrics.add_file_bytes(dest)
 
         ObjectStore.put(self._step, dl_files)
 
@@ -15,11 +15,14 @@ import os
 
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
+from cliboa.util.constant import CostHint
 from cliboa.util.http import Download
 from requests.auth import HTTPBasicAuth
 
 
 class HttpExtract(BaseStep):
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._src_url = None
@@ -17,11 +17,14 @@ import re
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
 from cliboa.util.cache import ObjectStore
-from cliboa.util.constant import StepStatus
+from cliboa.util.constant import CostHint, StepStatus
+from cliboa.util.metrics import Metrics
 from cliboa.util.sftp import Sftp
 
 
 class SftpExtract(BaseStep):
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._src_dir = None
@@ -136,6 +139,8 @@ class SftpDownload(SftpExtract):
             return StepStatus.SUCCESSFUL_TERMINATION
 
         self._logger.info("Files downloaded %s" % files)
+        for f in files:
+            Metrics.add_file_bytes(os.path.join(self._dest_dir, f))
 
         # cache downloaded file names
         ObjectStore.put(self._step, files)
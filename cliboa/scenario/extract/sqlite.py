@@ -62,6 +62,7 @@ class SqliteRead(BaseSqlite):
         cur = self._sqlite_adptr.fetch(sql=self.__get_query(), row_factory=dict_factory)
         for r in cur:
             self._s.save(r)
+        self._s.flush()
 
     def __get_query(self):
         """
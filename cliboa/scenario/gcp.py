@@ -16,6 +16,7 @@ from google.oauth2 import service_account
 
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
+from cliboa.util.constant import CostHint
 
 
 class BaseGcp(BaseStep):
@@ -23,6 +24,8 @@ class BaseGcp(BaseStep):
     Base class of Gcp usage.
     """
 
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._project_id = None
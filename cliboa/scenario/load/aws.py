@@ -17,6 +17,7 @@ from cliboa.adapter.aws import S3Adapter
 from cliboa.scenario.aws import BaseS3
 from cliboa.scenario.validator import EssentialParameters
 from cliboa.util.constant import StepStatus
+from cliboa.util.metrics import Metrics
 
 
 class S3Upload(BaseS3):
@@ -61,6 +62,7 @@ class S3Upload(BaseS3):
                 bucket.upload_file(
                     Key=os.path.join(self._key, os.path.basename(f)), Filename=f
                 )
+                Metrics.add_file_bytes(f)
         else:
             self._logger.info(
                 "Files to upload do not exist. File pattern: {}".format(
@@ -11,7 +11,6 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-import ast
 import csv
 
 from cliboa.scenario.base import BaseStep
@@ -64,24 +63,14 @@ class CsvWrite(FileWrite):
         input_valid = IOOutput(self._io)
         input_valid()
 
-        with open(self._s.cache_file, "r", encoding=self._encoding) as i, open(
-            self._dest_path, self._mode, encoding=self._encoding
-        ) as o:
+        with open(self._dest_path, self._mode, encoding=self._encoding) as o:
             writer = csv.writer(o, quoting=csv.QUOTE_ALL)
 
-            # write csv header
-            head_dict = ast.literal_eval(i.readline())
-            header = []
-            for k in head_dict.keys():
-                header.append(k)
-            writer.writerow(header)
-
-            # write as csv per one line
-            i.seek(0)
-            for l_str in i:
-                l_dict = ast.literal_eval(l_str)
-                contents = []
-                for k, v in l_dict.items():
-                    contents.append(v)
-                writer.writerow(contents)
+            for i, l_dict in enumerate(self._s.load()):
+                # write csv header
+                if i == 0:
+                    writer.writerow(list(l_dict.keys()))
+
+                # write as csv per one line
+                writer.writerow(list(l_dict.values()))
         self._s.remove()
@@ -11,7 +11,6 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-import ast
 import csv
 import json
 import os
@@ -23,6 +22,7 @@ from cliboa.scenario.gcp import BaseBigQuery, BaseFirestore, BaseGcs
 from cliboa.scenario.load.file import FileWrite
 from cliboa.util.exception import FileNotFound, InvalidFileCount, InvalidFormat
 from cliboa.util.gcp import Firestore, Gcs, ServiceAccount
+from cliboa.util.metrics import Metrics
 
 
 class BigQueryWrite(BaseBigQuery, FileWrite):
@@ -224,30 +224,9 @@ class BigQueryCreate(BaseBigQuery):
         else:
             key_filepath = self._source_path_reader(self._credentials)
 
-        with open(self._s.cache_file, "r", encoding="utf-8") as f:
-            for i, l_str in enumerate(f):
-                l_dict = ast.literal_eval(l_str)
-                cache_list.append(l_dict)
-                if len(cache_list) == self.BULK_LINE_CNT:
-                    df = pandas.DataFrame(self.__create_insert_data(cache_list))
-                    if inserts is True:
-                        # if_exists after the first insert execution
-                        if_exists = self.APPEND
-                    dest_tbl = self._dataset + "." + self._tblname
-                    self._logger.info(
-                        "Start insert %s rows to %s" % (len(cache_list), dest_tbl)
-                    )
-                    df.to_gbq(
-                        dest_tbl,
-                        project_id=self._project_id,
-                        if_exists=if_exists,
-                        table_schema=self._table_schema,
-                        location=self._location,
-                        credentials=ServiceAccount.auth(key_filepath),
-                    )
-                    cache_list.clear()
-                    inserts = True
-            if len(cache_list) > 0:
+        for l_dict in self._s.load():
+            cache_list.append(l_dict)
+            if len(cache_list) == self.BULK_LINE_CNT:
                 df = pandas.DataFrame(self.__create_insert_data(cache_list))
                 if inserts is True:
                     # if_exists after the first insert execution
@@ -264,6 +243,23 @@ class BigQueryCreate(BaseBigQuery):
                     location=self._location,
                     credentials=ServiceAccount.auth(key_filepath),
                 )
+                cache_list.clear()
+                inserts = True
+        if len(cache_list) > 0:
+            df = pandas.DataFrame(self.__create_insert_data(cache_list))
+            if inserts is True:
+                # if_exists after the first insert execution
+                if_exists = self.APPEND
+            dest_tbl = self._dataset + "." + self._tblname
+            self._logger.info("Start insert %s rows to %s" % (len(cache_list), dest_tbl))
+            df.to_gbq(
+                dest_tbl,
+                project_id=self._project_id,
+                if_exists=if_exists,
+                table_schema=self._table_schema,
+                location=self._location,
+                credentials=ServiceAccount.auth(key_filepath),
+            )
         self._s.remove()
 
     def __create_insert_data(self, cache_list):
@@ -343,6 +339,7 @@ class GcsFileUpload(BaseGcs):
             self._logger.info("Start upload %s" % file)
             blob = bucket.blob(os.path.join(self._dest_dir, os.path.basename(file)))
             blob.upload_from_filename(file)
+            Metrics.add_file_bytes(file)
             self._logger.info("Finish upload %s" % file)
 
 
@@ -395,6 +392,7 @@ class GcsUpload(BaseGcs):
             self._logger.info("Start upload %s" % file)
             blob = bucket.blob(os.path.join(self._dest_dir, os.path.basename(file)))
             blob.upload_from_filename(file)
+            Metrics.add_file_bytes(file)
             self._logger.info("Finish upload %s" % file)
 
 
@@ -15,11 +15,14 @@ import os
 
 from cliboa.core.validator import EssentialParameters
 from cliboa.scenario.base import BaseStep
-from cliboa.util.constant import StepStatus
+from cliboa.util.constant import CostHint, StepStatus
+from cliboa.util.metrics import Metrics
 from cliboa.util.sftp import Sftp
 
 
 class SftpBaseLoad(BaseStep):
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._src_dir = ""
@@ -182,6 +185,7 @@ class SftpUpload(SftpBaseLoad):
                     os.path.join(self._dest_dir, os.path.basename(file)),
                     self._endfile_suffix,
                 )
+                Metrics.add_file_bytes(file)
                 self._logger.info("%s is successfully uploaded." % file)
         else:
             self._logger.info(
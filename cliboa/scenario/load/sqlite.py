@@ -11,7 +11,6 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-import ast
 import codecs
 import csv
 
@@ -85,28 +84,26 @@ class SqliteCreation(SqliteTransaction):
         def insert():
             self._logger.info("Start to insert")
             insert_rows = []
-            with open(self._s.cache_file, "r", encoding="utf-8") as f:
-                for i, l_str in enumerate(f, 1):
-                    l_dict = ast.literal_eval(l_str)
-                    insert_rows.append(l_dict)
+            for i, l_dict in enumerate(self._s.load(), 1):
+                insert_rows.append(l_dict)
 
-                    # Check only once
-                    if i == 1:
-                        self.__valid_column_def(column_def, l_dict)
+                # Check only once
+                if i == 1:
+                    self.__valid_column_def(column_def, l_dict)
 
-                    # execute bulk insert
-                    if i % self._insert_cnt == 0:
-                        self._sqlite_adptr.execute_many_insert(
-                            self._tblname, column_def, insert_rows, self._replace_into
-                        )
-                        insert_rows.clear()
-
-                if len(insert_rows) > 0:
+                # execute bulk insert
+                if i % self._insert_cnt == 0:
                     self._sqlite_adptr.execute_many_insert(
                         self._tblname, column_def, insert_rows, self._replace_into
                     )
                     insert_rows.clear()
 
+            if len(insert_rows) > 0:
+                self._sqlite_adptr.execute_many_insert(
+                    self._tblname, column_def, insert_rows, self._replace_into
+                )
+                insert_rows.clear()
+
             self._logger.info("Finish to insert")
 
         super().execute(insert)
@@ -15,6 +15,7 @@ import csv
 
 from cliboa.core.validator import EssentialParameters
 from cliboa.scenario.base import BaseStep
+from cliboa.util.constant import CostHint
 
 
 class BaseRdbms(BaseStep):
@@ -22,6 +23,8 @@ class BaseRdbms(BaseStep):
     Base class of relational database class.
     """
 
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
 
@@ -14,32 +14,38 @@
 
 import codecs
 import csv
-import jsonlines
+import io
 import os
-import pandas
 from cliboa.core.validator import EssentialParameters
 from cliboa.scenario.transform.file import FileBaseTransform
-from cliboa.util.csv import Csv
+from cliboa.util.constant import CostHint
+from cliboa.util.csv import Csv, CsvEngine
 from cliboa.util.exception import (
     FileNotFound,
     InvalidCount,
+    InvalidFormat,
     InvalidParameter,
 )
 from cliboa.util.file import File
-from cliboa.util.sqlite import SqliteAdapter
-from cliboa.util.string import StringUtil
-from datetime import datetime
+from cliboa.util.join import ExternalJoin
+from cliboa.util.metrics import Metrics
+from cliboa.util.parallel import ParallelMap
+from cliboa.util.sort import ExternalSort, SortKey
+from operator import itemgetter
 
 
 class CsvColumnExtract(FileBaseTransform):
     """
     Remove specific columns from csv file.
+    With 'column_sets', several files of different columns are created from a file at once.
     """
 
     def __init__(self):
         super().__init__()
         self._columns = None
         self._column_numbers = None
+        self._column_sets = None
+        self._engine = CsvEngine.STDLIB
 
     def columns(self, columns):
         self._columns = columns
@@ -47,12 +53,109 @@ class CsvColumnExtract(FileBaseTransform):
     def column_numbers(self, column_numbers):
         self._column_numbers = column_numbers
 
+    def column_sets(self, column_sets):
+        self._column_sets = column_sets
+
+    def engine(self, engine):
+        self._engine = engine
+
     def execute(self, *args):
         valid = EssentialParameters(
             self.__class__.__name__, [self._src_dir, self._src_pattern]
         )
         valid()
 
+        if self._column_sets:
+            self._valid_column_sets()
+        else:
+            self._valid_columns()
+
+        files = super().get_target_files(self._src_dir, self._src_pattern)
+        self.check_file_existence(files)
+
+        if self._column_sets:
+            if self._engine != CsvEngine.STDLIB:
+                self._logger.warning("'column_sets' is available only with stdlib engine.")
+            ParallelMap(self._max_workers, self._worker_mode).run(
+                self._extract_sets, [(f,) for f in files]
+            )
+        elif self._engine == CsvEngine.STDLIB:
+            super().io_map(files, self._extract)
+        else:
+            super().io_map(files, self._extract_by_engine)
+
+    def _extract_by_engine(self, fi, fo):
+        engine = CsvEngine.create(self._engine)
+        if self._columns:
+            columns = list(self._columns)
+        else:
+            columns = [n - 1 for n in sorted(set(self._remain_column_numbers()))]
+        rows = engine.convert(fi, fo, encoding=self._encoding, columns=columns)
+        Metrics.add_rows(rows)
+
+    def _extract(self, fi, fo):
+        if self._columns:
+            Csv.extract_columns_with_names(fi, fo, self._columns)
+        elif self._column_numbers:
+            Csv.extract_columns_with_numbers(fi, fo, self._remain_column_numbers())
+
+    def _extract_sets(self, fi):
+        """
+        Create a file of each column set, e.g. test.csv -> test_a.csv, test_b.csv
+        """
+        root, name = os.path.split(fi)
+        nameonly, ext = os.path.splitext(name)
+        dest_dir = self._dest_dir or root
+        outputs = []
+        column_sets = []
+        for c in self._column_sets:
+            output = os.path.join(dest_dir, nameonly + c["suffix"] + ext)
+            temp_file = os.path.join(
+                dest_dir, ".%s.%s.tmp" % (os.path.basename(output), os.getpid())
+            )
+            outputs.append((temp_file, output))
+            numbers = c.get("column_numbers")
+            if numbers is not None:
+                numbers = self._remain_column_numbers(numbers)
+            column_sets.append((temp_file, c.get("columns"), numbers))
+        try:
+            rows = Csv.extract_column_sets(fi, column_sets, self._encoding)
+            for temp_file, output in outputs:
+                os.replace(temp_file, output)
+                Metrics.add_file_bytes(output)
+        finally:
+            for temp_file, _ in outputs:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+        Metrics.add_rows(rows)
+        self._logger.info(
+            "Extract columns of %s into %s." % (fi, ", ".join(o for _, o in outputs))
+        )
+
+    def _remain_column_numbers(self, column_numbers=None):
+        if column_numbers is None:
+            column_numbers = self._column_numbers
+        if isinstance(column_numbers, int) is True:
+            return [column_numbers]
+        return [int(n) for n in column_numbers.split(",")]
+
+    def transform_rows(self, rows):
+        self._valid_columns()
+        if self._columns:
+            header = next(rows, None)
+            if header is None:
+                return
+            yield list(self._columns)
+            indexes = [header.index(c) for c in self._columns]
+        else:
+            numbers = self._remain_column_numbers()
+            indexes = [n - 1 for n in sorted(set(numbers)) if n >= 1]
+        project = Csv.projector(indexes)
+        for row in rows:
+            # rows can be changed by the next steps
+            yield list(project(row))
+
+    def _valid_columns(self):
         if not self._columns and not self._column_numbers:
             raise InvalidParameter(
                 "Specifying either 'column' or 'column_numbers' is essential."
@@ -60,20 +163,22 @@ class CsvColumnExtract(FileBaseTransform):
         if self._columns and self._column_numbers:
             raise InvalidParameter("Cannot specify both 'column' and 'column_numbers'.")
 
-        files = super().get_target_files(self._src_dir, self._src_pattern)
-        self.check_file_existence(files)
-
-        for fi, fo in super().io_files(files):
-            if self._columns:
-                Csv.extract_columns_with_names(fi, fo, self._columns)
-            elif self._column_numbers:
-                if isinstance(self._column_numbers, int) is True:
-                    remain_column_numbers = []
-                    remain_column_numbers.append(self._column_numbers)
-                else:
-                    column_numbers = self._column_numbers.split(",")
-                    remain_column_numbers = [int(n) for n in column_numbers]
-                Csv.extract_columns_with_numbers(fi, fo, remain_column_numbers)
+    def _valid_column_sets(self):
+        if self._columns or self._column_numbers:
+            raise InvalidParameter(
+                "Cannot specify 'column_sets' with 'columns' or 'column_numbers'."
+            )
+        suffixes = set()
+        for c in self._column_sets:
+            if not isinstance(c, dict) or "suffix" not in c:
+                raise InvalidParameter("Each of 'column_sets' must have 'suffix'.")
+            if c["suffix"] in suffixes:
+                raise InvalidParameter("'suffix' of 'column_sets' must be unique.")
+            suffixes.add(c["suffix"])
+            if bool(c.get("columns")) == bool(c.get("column_numbers")):
+                raise InvalidParameter(
+                    "Each of 'column_sets' must have either 'columns' or 'column_numbers'."
+                )
 
 
 class CsvColumnConcat(FileBaseTransform):
@@ -110,27 +215,23 @@ class CsvColumnConcat(FileBaseTransform):
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
 
-        for fi, fo in super().io_files(files):
-            df = pandas.read_csv(
-                fi,
-                dtype=str,
-                encoding=self._encoding,
-            )
+        super().io_map(files, self._concat)
 
-            dest_str = None
-            for c in self._columns:
-                if dest_str is None:
-                    dest_str = df[c].astype(str)
-                else:
-                    dest_str = dest_str + self._sep + df[c].astype(str)
-                df = df.drop(columns=[c])
-            df[self._dest_column_name] = dest_str
+    def _concat(self, fi, fo):
+        super().write_csv_chunks(
+            super().read_csv_chunks(fi, dtype=str), fo, self._concat_columns, index=False
+        )
 
-            df.to_csv(
-                fo,
-                encoding=self._encoding,
-                index=False,
-            )
+    def _concat_columns(self, df):
+        dest_str = None
+        for c in self._columns:
+            if dest_str is None:
+                dest_str = df[c].astype(str)
+            else:
+                dest_str = dest_str + self._sep + df[c].astype(str)
+            df = df.drop(columns=[c])
+        df[self._dest_column_name] = dest_str
+        return df
 
 
 class ColumnLengthAdjust(FileBaseTransform):
@@ -184,29 +285,62 @@ class ColumnLengthAdjust(FileBaseTransform):
         else:
             files = super().get_target_files(self._src_dir, self._src_pattern)
             self.check_file_existence(files)
-            for fi, fo in super().io_writers(files, encoding=self._encoding):
-                reader = csv.DictReader(fi)
-                writer = csv.DictWriter(fo, reader.fieldnames)
-                writer.writeheader()
-
-                for row in reader:
-                    for k, v in self._adjust.items():
-                        f1 = row.get(k)
-                        if len(f1) > v:
-                            row[k] = f1[:v]
-                    writer.writerow(row)
-                fo.flush()
+            super().io_map(files, self._adjust_file)
+
+    def _adjust_file(self, fi, fo):
+        with open(fi, mode="r", encoding=self._encoding, newline="") as i, open(
+            fo, mode="w", encoding=self._encoding, newline=""
+        ) as o:
+            reader = csv.reader(i)
+            writer = csv.writer(o)
+            writer.writerows(self.transform_rows(reader))
+
+    def transform_rows(self, rows):
+        header = next(rows, None)
+        if header is None:
+            return
+        yield header
+
+        adjust = [(header.index(k), v) for k, v in self._adjust.items()]
+        for row in self.fill_rows(rows, len(header)):
+            for i, v in adjust:
+                if len(row[i]) > v:
+                    row[i] = row[i][:v]
+            yield row
 
 
 class CsvMerge(FileBaseTransform):
     """
     Merge two csv files
+
+    Rows are joined by ExternalJoin, so that files larger than memory can be merged.
+    Keys are columns of 'on' (or 'left_on' and 'right_on'), or common columns of the files
+    if not given.
     """
 
+    COST_HINT = CostHint.MEMORY
+
     def __init__(self):
         super().__init__()
         self._src1_pattern = None
         self._src2_pattern = None
+        self._on = None
+        self._left_on = None
+        self._right_on = None
+        self._how = ExternalJoin.INNER
+        self._memory_budget_mb = 256
+
+    def on(self, on):
+        self._on = on
+
+    def left_on(self, left_on):
+        self._left_on = left_on
+
+    def right_on(self, right_on):
+        self._right_on = right_on
+
+    def how(self, how):
+        self._how = how
 
     def src1_pattern(self, src1_pattern):
         self._src1_pattern = src1_pattern
@@ -236,8 +370,8 @@ class CsvMerge(FileBaseTransform):
             valid = EssentialParameters(self.__class__.__name__, [self._dest_name])
             valid()
 
-        target1_files = File().get_target_files(self._src_dir, self._src1_pattern)
-        target2_files = File().get_target_files(self._src_dir, self._src2_pattern)
+        target1_files = super().get_target_files(self._src_dir, self._src1_pattern)
+        target2_files = super().get_target_files(self._src_dir, self._src2_pattern)
         if len(target1_files) == 0:
             raise InvalidCount(
                 "An input file %s does not exist."
@@ -256,19 +390,27 @@ class CsvMerge(FileBaseTransform):
             raise InvalidCount("Input files must be only one.")
 
         self._logger.info("Merge %s and %s." % (target1_files[0], target2_files[0]))
-        df1 = pandas.read_csv(
-            os.path.join(self._src_dir, target1_files[0]),
-            dtype=str,
-            encoding=self._encoding,
-        )
-        df2 = pandas.read_csv(
-            os.path.join(self._src_dir, target2_files[0]),
-            dtype=str,
-            encoding=self._encoding,
-        )
-        df = pandas.merge(df1, df2)
-        if "Unnamed: 0" in df.index:
-            del df["Unnamed: 0"]
+        joiner = ExternalJoin(self._how, self._memory_budget_mb)
+        file1 = os.path.join(self._src_dir, target1_files[0])
+        file2 = os.path.join(self._src_dir, target2_files[0])
+        header1 = self._header(file1)
+        header2 = self._header(file2)
+        left_on, right_on = self._keys(header1, header2)
+        left_idx = [header1.index(c) for c in left_on]
+        right_idx = [header2.index(c) for c in right_on]
+
+        # Key columns of the same names are merged into the left ones
+        merged = [
+            (li, ri)
+            for li, ri, lc, rc in zip(left_idx, right_idx, left_on, right_on)
+            if lc == rc
+        ]
+        merged_right = [ri for _, ri in merged]
+        right_columns = [i for i in range(len(header2)) if i not in merged_right]
+        right_names = [header2[i] for i in right_columns]
+        header = [c + "_x" if c in right_names else c for c in header1]
+        if self._how != ExternalJoin.ANTI:
+            header += [c + "_y" if c in header1 else c for c in right_names]
 
         # TODO All the statements inside 'if' block will be deleted in the near future.
         if self._dest_pattern:
@@ -276,25 +418,101 @@ class CsvMerge(FileBaseTransform):
         else:
             dest_name = self._dest_name
 
-        df.to_csv(
+        with open(
             os.path.join(self._dest_dir, dest_name),
+            mode="w",
             encoding=self._encoding,
-            index=False,
-        )
+            newline="",
+        ) as o:
+            writer = csv.writer(o, lineterminator="\n")
+            writer.writerow(header)
+            lines = 0
+            for left, right in joiner.join(
+                lambda: self._rows(file1, len(header1)),
+                lambda: self._rows(file2, len(header2)),
+                itemgetter(*left_idx),
+                itemgetter(*right_idx),
+            ):
+                if left is None:
+                    left = [""] * len(header1)
+                    for li, ri in merged:
+                        left[li] = right[ri]
+                if self._how != ExternalJoin.ANTI:
+                    if right is None:
+                        left = left + [""] * len(right_columns)
+                    else:
+                        left = left + [right[i] for i in right_columns]
+                writer.writerow(left)
+                lines += 1
+            Metrics.add_rows(lines)
+
+    def _keys(self, header1, header2):
+        """
+        Returns:
+            tuple: (key columns of src1, key columns of src2)
+        """
+        if self._on:
+            left_on = right_on = self._on
+        elif self._left_on or self._right_on:
+            left_on = self._left_on
+            right_on = self._right_on
+            if not left_on or not right_on:
+                raise InvalidParameter("Both 'left_on' and 'right_on' are required.")
+        else:
+            left_on = right_on = [c for c in header1 if c in header2]
+            if not left_on:
+                raise InvalidParameter("No common columns to merge on.")
+        left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+        right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+        if len(left_on) != len(right_on):
+            raise InvalidParameter("'left_on' and 'right_on' must have the same length.")
+        for c in left_on:
+            if c not in header1:
+                raise InvalidParameter("Column %s does not exist in %s." % (c, self._src1_pattern))
+        for c in right_on:
+            if c not in header2:
+                raise InvalidParameter("Column %s does not exist in %s." % (c, self._src2_pattern))
+        return left_on, right_on
+
+    def _header(self, path):
+        with open(path, mode="r", encoding=self._encoding, newline="") as i:
+            return next(csv.reader(i), [])
+
+    def _rows(self, path, columns):
+        with open(path, mode="r", encoding=self._encoding, newline="") as i:
+            reader = csv.reader(i)
+            # skip a header
+            next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < columns:
+                    row += [""] * (columns - len(row))
+                yield row
 
 
 class CsvConcat(FileBaseTransform):
     """
     Concat csv files
+
+    If all the files have the same header, the header of the first file is written,
+    and the rest of the files are copied as they are.
+    Otherwise, rows are written in the columns of all the files, in the order of appearance.
     """
 
+    COST_HINT = CostHint.IO
+
     def __init__(self):
         super().__init__()
         self._src_filenames = None
+        self._engine = CsvEngine.STDLIB
 
     def src_filenames(self, src_filenames):
         self._src_filenames = src_filenames
 
+    def engine(self, engine):
+        self._engine = engine
+
     def execute(self, *args):
         # essential parameters check
         valid = EssentialParameters(
@@ -321,7 +539,7 @@ class CsvConcat(FileBaseTransform):
             )
 
         if self._src_pattern:
-            files = File().get_target_files(self._src_dir, self._src_pattern)
+            files = super().get_target_files(self._src_dir, self._src_pattern)
         else:
             files = []
             for file in self._src_filenames:
@@ -332,32 +550,76 @@ class CsvConcat(FileBaseTransform):
         elif len(files) == 1:
             self._logger.warning("Two or more input files are required.")
 
-        file = files.pop(0)
-        df1 = pandas.read_csv(
-            file,
-            dtype=str,
-            encoding=self._encoding,
-        )
-
-        for file in files:
-            df2 = pandas.read_csv(
-                file,
-                dtype=str,
-                encoding=self._encoding,
-            )
-            df1 = pandas.concat([df1, df2])
-
         # TODO All the statements inside 'if' block will be deleted in the near future.
         if self._dest_pattern:
             dest_name = self._dest_pattern
         else:
             dest_name = self._dest_name
+        dest = os.path.join(self._dest_dir, dest_name)
 
-        df1.to_csv(
-            os.path.join(self._dest_dir, dest_name),
-            encoding=self._encoding,
-            index=False,
-        )
+        headers = [self._header(f) for f in files]
+        # write to a temporary file, as the output file can be one of the input files
+        temp_file = os.path.join(self._dest_dir, ".%s.%s.tmp" % (dest_name, os.getpid()))
+        try:
+            columns = [h[0] for h in headers if h is not None]
+            if self._copyable() and all(c == columns[0] for c in columns):
+                self._logger.info("Headers are the same. Copy files as they are.")
+                self._copy(files, headers, temp_file)
+            else:
+                self._logger.info("Headers are different. Concat rows by columns.")
+                engine = CsvEngine.create(self._engine)
+                rows = engine.concat(files, temp_file, encoding=self._encoding)
+                Metrics.add_rows(rows)
+            os.replace(temp_file, dest)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        Metrics.add_file_bytes(dest)
+
+    def _copyable(self):
+        """
+        Whether files can be copied in bytes, i.e. newlines and quotes are ascii
+        """
+        return '\n"'.encode(self._encoding) == b'\n"'
+
+    def _header(self, path):
+        """
+        Returns:
+            tuple: (columns, header in bytes). None if the file is empty.
+        """
+        with open(path, mode="rb") as f:
+            header = b""
+            while True:
+                line = f.readline()
+                header += line
+                # a newline in quotes
+                if not line or header.count(b'"') % 2 == 0:
+                    break
+        if not header.strip():
+            return None
+        text = header.decode(self._encoding).lstrip("\ufeff")
+        return next(csv.reader(io.StringIO(text, newline=""))), header
+
+    def _copy(self, files, headers, dest):
+        file = File()
+        with open(dest, mode="wb") as o:
+            newline = None
+            for f, h in zip(files, headers):
+                if h is None:
+                    continue
+                header = h[1]
+                if newline is None:
+                    o.write(header)
+                    newline = header.endswith((b"\n", b"\r"))
+                body = os.path.getsize(f) - len(header)
+                if body <= 0:
+                    continue
+                if not newline:
+                    o.write(b"\r\n" if header.endswith(b"\r\n") else b"\n")
+                file.append_file(f, o, offset=len(header))
+                with open(f, mode="rb") as i:
+                    i.seek(-1, os.SEEK_END)
+                    newline = i.read(1) in (b"\n", b"\r")
 
 
 class CsvHeaderConvert(FileBaseTransform):
@@ -371,10 +633,14 @@ class CsvHeaderConvert(FileBaseTransform):
     def __init__(self):
         super().__init__()
         self._headers = []
+        self._engine = CsvEngine.STDLIB
 
     def headers(self, headers):
         self._headers = headers
 
+    def engine(self, engine):
+        self._engine = engine
+
     def execute(self, *args):
         self._logger.warning("Deprecated. Please Use CsvConvert instead.")
 
@@ -441,17 +707,17 @@ class CsvHeaderConvert(FileBaseTransform):
             files = super().get_target_files(self._src_dir, self._src_pattern)
             self.check_file_existence(files)
 
-            for fi, fo in super().io_writers(files, encoding=self._encoding):
-                self._logger.info(
-                    "Convert header of %s. An output file is %s." % (fi, fo)
-                )
-                reader = csv.reader(fi)
-                writer = csv.writer(fo, quoting=csv.QUOTE_ALL)
-                headers = next(reader, None)
-                new_headers = self._replace_headers(headers)
-                writer.writerow(new_headers)
-                for r in reader:
-                    writer.writerow(r)
+            super().io_map(files, self._convert_header)
+
+    def _convert_header(self, fi, fo):
+        CsvEngine.create(self._engine).convert(
+            fi,
+            fo,
+            encoding=self._encoding,
+            quoting=csv.QUOTE_ALL,
+            headers={k: v for h in self._headers for k, v in h.items()},
+        )
+        return "Convert header of %s. An output file is %s." % (fi, fo)
 
     def _replace_headers(self, old_headers):
         """
@@ -587,25 +853,25 @@ class CsvFormatChange(FileBaseTransform):
             files = super().get_target_files(self._src_dir, self._src_pattern)
             self.check_file_existence(files)
 
-            for fi, fo in super().io_files(files, ext=self._after_format):
-                with open(fi, mode="rt", encoding=self._before_enc) as i:
-                    reader = csv.reader(
-                        i, delimiter=Csv.delimiter_convert(self._before_format)
-                    )
-                    with open(
-                        fo,
-                        mode="wt",
-                        newline="",
-                        encoding=self._after_enc,
-                    ) as o:
-                        writer = csv.writer(
-                            o,
-                            delimiter=Csv.delimiter_convert(self._after_format),
-                            quoting=Csv.quote_convert(self._quote),
-                            lineterminator=Csv.newline_convert(self._after_nl),
-                        )
-                        for line in reader:
-                            writer.writerow(line)
+            super().io_map(files, self._change_format, ext=self._after_format)
+
+    def _change_format(self, fi, fo):
+        with open(fi, mode="rt", encoding=self._before_enc) as i:
+            reader = csv.reader(i, delimiter=Csv.delimiter_convert(self._before_format))
+            with open(
+                fo,
+                mode="wt",
+                newline="",
+                encoding=self._after_enc,
+            ) as o:
+                writer = csv.writer(
+                    o,
+                    delimiter=Csv.delimiter_convert(self._after_format),
+                    quoting=Csv.quote_convert(self._quote),
+                    lineterminator=Csv.newline_convert(self._after_nl),
+                )
+                for line in reader:
+                    writer.writerow(line)
 
 
 class CsvConvert(FileBaseTransform):
@@ -623,6 +889,9 @@ class CsvConvert(FileBaseTransform):
         self._after_enc = None
         self._after_nl = "LF"
         self._quote = "QUOTE_MINIMAL"
+        self._engine = CsvEngine.STDLIB
+        self._split_workers = 1
+        self._split_size_mb = 64
 
     def headers(self, headers):
         self._headers = headers
@@ -648,6 +917,15 @@ class CsvConvert(FileBaseTransform):
     def quote(self, quote):
         self._quote = quote
 
+    def engine(self, engine):
+        self._engine = engine
+
+    def split_workers(self, split_workers):
+        self._split_workers = split_workers
+
+    def split_size_mb(self, split_size_mb):
+        self._split_size_mb = split_size_mb
+
     def execute(self, *args):
         # essential parameters check
         valid = EssentialParameters(
@@ -669,26 +947,59 @@ class CsvConvert(FileBaseTransform):
         if self._after_enc is None:
             self._after_enc = self._before_enc
 
-        for fi, fo in super().io_files(files, ext=self._after_format):
-            with open(fi, mode="rt", encoding=self._before_enc) as i:
-                reader = csv.reader(
-                    i, delimiter=Csv.delimiter_convert(self._before_format)
-                )
-                with open(fo, mode="wt", newline="", encoding=self._after_enc) as o:
-                    writer = csv.writer(
-                        o,
-                        delimiter=Csv.delimiter_convert(self._after_format),
-                        quoting=Csv.quote_convert(self._quote),
-                        lineterminator=Csv.newline_convert(self._after_nl),
-                    )
-
-                    for i, line in enumerate(reader):
-                        if i == 0:
-                            if self._headers_existence is False:
-                                continue
-                            writer.writerow(self._replace_headers(line))
-                        else:
-                            writer.writerow(line)
+        super().io_map(files, self._convert, ext=self._after_format)
+
+    def _convert(self, fi, fo):
+        engine = CsvEngine.create(self._engine)
+        kwargs = {
+            "encoding": self._before_enc,
+            "delimiter": Csv.delimiter_convert(self._before_format),
+            "dest_encoding": self._after_enc,
+            "dest_delimiter": Csv.delimiter_convert(self._after_format),
+            "quoting": Csv.quote_convert(self._quote),
+            "lineterminator": Csv.newline_convert(self._after_nl),
+            "headers": {k: v for h in self._headers for k, v in h.items()},
+            "header": self._headers_existence is not False,
+        }
+        if int(self._split_workers or 1) <= 1:
+            rows = engine.convert(fi, fo, **kwargs)
+        elif self._engine != CsvEngine.STDLIB:
+            self._logger.warning("'split_workers' is available only with stdlib engine.")
+            rows = engine.convert(fi, fo, **kwargs)
+        else:
+            rows = engine.convert_parallel(
+                fi,
+                fo,
+                int(self._split_workers),
+                split_size_mb=self._split_size_mb,
+                worker_mode=self._worker_mode,
+                **kwargs
+            )
+        Metrics.add_rows(rows)
+
+    def transform_rows(self, rows):
+        header = next(rows, None)
+        if header is None:
+            return
+        if self._headers_existence is not False:
+            yield self._replace_headers(header)
+        for row in rows:
+            yield row
+
+    def pipeline_input(self, path):
+        return self._before_enc, {"delimiter": Csv.delimiter_convert(self._before_format)}
+
+    def pipeline_output(self):
+        after_format = self._after_format or self._before_format
+        return (
+            after_format,
+            self._after_enc or self._before_enc,
+            {
+                "delimiter": Csv.delimiter_convert(after_format),
+                "quoting": Csv.quote_convert(self._quote),
+                "lineterminator": Csv.newline_convert(self._after_nl),
+            },
+        )
 
     def _replace_headers(self, old_headers):
         """
@@ -713,6 +1024,9 @@ class CsvConvert(FileBaseTransform):
 class CsvSort(FileBaseTransform):
     """
     Sort csv.
+
+    Files are sorted by an external merge sort, so that files larger than memory can be sorted.
+    If 'dest_name' is given, all the target files are sorted into one file.
     """
 
     def __init__(self):
@@ -720,6 +1034,7 @@ class CsvSort(FileBaseTransform):
         self._order = []
         self._quote = "QUOTE_MINIMAL"
         self._no_duplicate = False
+        self._buffer_size_mb = 256
 
     def order(self, order):
         self._order = order
@@ -730,6 +1045,9 @@ class CsvSort(FileBaseTransform):
     def no_duplicate(self, no_duplicate):
         self._no_duplicate = no_duplicate
 
+    def buffer_size_mb(self, buffer_size_mb):
+        self._buffer_size_mb = buffer_size_mb
+
     def execute(self, *args):
         # essential parameters check
         valid = EssentialParameters(
@@ -745,30 +1063,102 @@ class CsvSort(FileBaseTransform):
 
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
+        if not files:
+            return
 
-        ymd_hms = datetime.now().strftime("%Y%m%d%H%M%S%f")
-        dbname = ".%s_%s.db" % (ymd_hms, StringUtil().random_str(8))
-        tblname = "temp_table"
+        if self._dest_name:
+            self._sort(files, os.path.join(self._dest_dir, self._dest_name))
+            return
+        for fi, fo in super().io_files(files):
+            self._sort([fi], fo)
 
-        sqlite = SqliteAdapter()
-        sqlite.connect(dbname)
+    def _sort(self, files, dest):
+        header = self._header(files)
+        # write to a temporary file, as the output file can be one of the input files
+        dest_dir, dest_name = os.path.split(dest)
+        temp_file = os.path.join(dest_dir, ".%s.%s.tmp" % (dest_name, os.getpid()))
         try:
-            for file in files:
-                _, filename = os.path.split(file)
-                dest_file = os.path.join(self._dest_dir, filename)
-
-                sqlite.import_table(file, tblname, encoding=self._encoding)
-                sqlite.export_table(
-                    tblname,
-                    dest_file,
-                    quoting=Csv.quote_convert(self._quote),
-                    encoding=self._encoding,
-                    order=self._order,
-                    no_duplicate=self._no_duplicate,
-                )
-            sqlite.close()
+            with open(temp_file, mode="w", encoding=self._encoding, newline="") as o:
+                if header is not None:
+                    writer = csv.writer(o, quoting=Csv.quote_convert(self._quote))
+                    writer.writerow(header)
+                    sorter = ExternalSort(
+                        self._sort_keys(header),
+                        buffer_size_mb=self._buffer_size_mb,
+                        max_workers=self._max_workers,
+                        worker_mode=self._worker_mode,
+                        no_duplicate=self._no_duplicate,
+                    )
+                    lines = 0
+                    for row in sorter.sort(self._rows(files, len(header))):
+                        writer.writerow(row)
+                        lines += 1
+                    Metrics.add_rows(lines)
+            os.replace(temp_file, dest)
         finally:
-            os.remove(dbname)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        self._logger.info("Sorted %s into %s" % (", ".join(files), dest))
+
+    def _header(self, files):
+        """
+        Returns:
+            list: Header which is common to the files. None if all the files are empty.
+        """
+        header = None
+        for f in files:
+            with open(f, mode="r", encoding=self._encoding, newline="") as i:
+                h = next(csv.reader(i), None)
+            if h is None:
+                continue
+            if header is None:
+                header = h
+            elif h != header:
+                raise InvalidFormat("Header of %s is different from the others." % f)
+        return header
+
+    def _rows(self, files, columns):
+        for f in files:
+            with open(f, mode="r", encoding=self._encoding, newline="") as i:
+                reader = csv.reader(i)
+                # skip a header
+                next(reader, None)
+                yield from self.fill_rows(reader, columns)
+
+    def _sort_keys(self, header):
+        """
+        Args:
+            header (list): Column names
+
+        Returns:
+            list: SortKey of 'order'.
+                  'order' is either a string "column [asc|desc]", or a dict
+                  {column: name, type: string|number|date, order: asc|desc, format: %Y-%m-%d}
+        """
+        keys = []
+        for o in self._order:
+            if isinstance(o, dict):
+                column = o.get("column")
+                type = o.get("type") or ExternalSort.STRING
+                direction = o.get("order") or "asc"
+                format = o.get("format")
+            else:
+                words = str(o).split()
+                direction = "asc"
+                if len(words) > 1 and words[-1].lower() in ("asc", "desc"):
+                    direction = words.pop()
+                column = " ".join(words)
+                type = ExternalSort.STRING
+                format = None
+
+            if column not in header:
+                raise InvalidParameter("Column %s to sort does not exist in the header." % column)
+            if str(direction).lower() not in ("asc", "desc"):
+                raise InvalidParameter("'order' must be either asc or desc. %s" % direction)
+            keys.append(
+                SortKey(header.index(column), type, str(direction).lower() == "desc", format)
+            )
+        return keys
 
 
 class CsvToJsonl(FileBaseTransform):
@@ -778,6 +1168,10 @@ class CsvToJsonl(FileBaseTransform):
 
     def __init__(self):
         super().__init__()
+        self._engine = CsvEngine.STDLIB
+
+    def engine(self, engine):
+        self._engine = engine
 
     def execute(self, *args):
         # essential parameters check
@@ -789,10 +1183,8 @@ class CsvToJsonl(FileBaseTransform):
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
 
-        for fi, fo in super().io_files(files, ext="jsonl"):
-            with open(
-                fi, mode="r", encoding=self._encoding, newline=""
-            ) as i, jsonlines.open(fo, mode="w") as writer:
-                reader = csv.DictReader(i)
-                for row in reader:
-                    writer.write(row)
+        super().io_map(files, self._to_jsonl, ext="jsonl")
+
+    def _to_jsonl(self, fi, fo):
+        rows = CsvEngine.create(self._engine).to_jsonl(fi, fo, encoding=self._encoding)
+        Metrics.add_rows(rows)
@@ -15,6 +15,8 @@ import bz2
 import codecs
 import csv
 import gzip
+import importlib.util
+import itertools
 import os
 import shutil
 import tarfile
@@ -25,6 +27,8 @@ import pandas
 
 from cliboa.core.validator import EssentialParameters
 from cliboa.scenario.base import BaseStep
+from cliboa.util.constant import CostHint
+from cliboa.util.csv import CsvIndex
 from cliboa.util.date import DateUtil
 from cliboa.util.exception import (
     CliboaException,
@@ -34,6 +38,9 @@ from cliboa.util.exception import (
     InvalidParameter,
 )
 from cliboa.util.file import File
+from cliboa.util.metrics import Metrics
+from cliboa.util.parallel import ParallelMap
+from cliboa.util.result_cache import StepResultCache
 
 
 class FileBaseTransform(BaseStep):
@@ -52,6 +59,11 @@ class FileBaseTransform(BaseStep):
     See documentation for individual classes for details.
     """
 
+    # Rows of a chunk of read_csv_chunks(), if neither chunk_rows nor memory_budget_mb is given
+    DEFAULT_CHUNK_ROWS = 100000
+    # Rows which are read to estimate memory of a row
+    SAMPLE_ROWS = 1000
+
     def __init__(self):
         super().__init__()
         self._src_dir = ""
@@ -64,6 +76,11 @@ class FileBaseTransform(BaseStep):
         self._dest_name = None
         self._encoding = "utf-8"
         self._nonfile_error = False
+        self._cache = False
+        self._max_workers = 1
+        self._worker_mode = ParallelMap.PROCESS
+        self._chunk_rows = None
+        self._memory_budget_mb = None
 
     def src_dir(self, src_dir):
         self._src_dir = src_dir
@@ -90,6 +107,21 @@ class FileBaseTransform(BaseStep):
     def nonfile_error(self, nonfile_error):
         self._nonfile_error = nonfile_error
 
+    def cache(self, cache):
+        self._cache = cache
+
+    def max_workers(self, max_workers):
+        self._max_workers = max_workers
+
+    def worker_mode(self, worker_mode):
+        self._worker_mode = worker_mode
+
+    def chunk_rows(self, chunk_rows):
+        self._chunk_rows = chunk_rows
+
+    def memory_budget_mb(self, memory_budget_mb):
+        self._memory_budget_mb = memory_budget_mb
+
     def execute(self, *args):
         pass
 
@@ -113,6 +145,8 @@ class FileBaseTransform(BaseStep):
         If the parameter "dest_dir" was given, the output file will be created under
         the given directory and returns input and output path.
         If not, the output file will be created to the same directory to the input file.
+        If the parameter "cache" is true and the output file is not the input file,
+        files which were already transformed with the same arguments are not returned.
 
         Arguments:
             iterable (list): Input file list
@@ -124,6 +158,86 @@ class FileBaseTransform(BaseStep):
             - input file path
             - output file path
         """
+        result_cache = StepResultCache() if self._cache is True else None
+        for input_path, output_path, fingerprint in self._io_paths(iterable, ext, result_cache):
+            fd, temp_file = tempfile.mkstemp()
+            os.close(fd)
+
+            yield input_path, temp_file
+
+            self._replace_output(input_path, temp_file, output_path)
+            if fingerprint:
+                result_cache.put(fingerprint, output_path)
+
+    def io_map(self, iterable, func, ext=None):
+        """
+        Same as the loop of io_files, but func is called for each file instead of the loop body.
+        If the parameter "max_workers" is greater than 1, files are processed concurrently
+        in a process (or thread, by the parameter "worker_mode") pool.
+        Each output file is created when its input file is processed successfully,
+        in the order of the input files.
+        The first error is raised after running files finish, and the rest are not processed.
+
+        Arguments:
+            iterable (list): Input file list
+            func: Called as func(input file path, output file path).
+                  If it returns a string, the string is logged in the order of input files.
+            ext=None (str): Same as io_files
+        """
+        result_cache = StepResultCache() if self._cache is True else None
+        items = []
+        outputs = {}
+        try:
+            for input_path, output_path, fingerprint in self._io_paths(
+                iterable, ext, result_cache
+            ):
+                fd, temp_file = tempfile.mkstemp()
+                os.close(fd)
+                items.append((input_path, temp_file))
+                outputs[temp_file] = (output_path, fingerprint)
+
+            def done(item, message):
+                input_path, temp_file = item
+                output_path, fingerprint = outputs.pop(temp_file)
+                self._replace_output(input_path, temp_file, output_path)
+                if fingerprint:
+                    result_cache.put(fingerprint, output_path)
+                if message:
+                    self._logger.info(message)
+
+            ParallelMap(self._max_workers, self._worker_mode).run(func, items, done)
+        finally:
+            # temporary files of the files which were not processed
+            for temp_file in outputs.keys():
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+    def map_files(self, iterable, func):
+        """
+        Call func for each file. Same as io_map regarding "max_workers" and errors,
+        for transforms which do not create an output file per input file by io_files.
+
+        Arguments:
+            iterable (list): Input file list
+            func: Called as func(input file path).
+                  If it returns a string, the string is logged in the order of input files.
+        """
+
+        def done(item, message):
+            if message:
+                self._logger.info(message)
+
+        ParallelMap(self._max_workers, self._worker_mode).run(
+            func, [(f,) for f in iterable], done
+        )
+
+    def _io_paths(self, iterable, ext, result_cache):
+        """
+        yield (tuple):
+            - input file path
+            - output file path
+            - fingerprint of the result cache, or None
+        """
         for input_path in iterable:
             root, name = os.path.split(input_path)
 
@@ -142,14 +256,22 @@ class FileBaseTransform(BaseStep):
 
             output_path = os.path.join(output_dir, output_name)
 
-            fd, temp_file = tempfile.mkstemp()
-            os.close(fd)
+            fingerprint = None
+            if result_cache and input_path != output_path:
+                fingerprint = result_cache.fingerprint(self, input_path)
+                if result_cache.hit(fingerprint, output_path):
+                    self._logger.info(
+                        "Skip %s. %s is already transformed." % (input_path, output_path)
+                    )
+                    continue
 
-            yield input_path, temp_file
+            yield input_path, output_path, fingerprint
 
-            if input_path == output_path:
-                os.remove(input_path)
-            shutil.move(temp_file, output_path)
+    def _replace_output(self, input_path, temp_file, output_path):
+        if input_path == output_path:
+            os.remove(input_path)
+        shutil.move(temp_file, output_path)
+        Metrics.add_file_bytes(output_path)
 
     def io_writers(self, iterable, mode="t", encoding="utf-8", ext=None):
         """
@@ -188,6 +310,131 @@ class FileBaseTransform(BaseStep):
                 with open(fi, mode="rb") as i, open(fo, mode="wb") as o:
                     yield i, o
 
+    @staticmethod
+    def fill_rows(rows, width):
+        """
+        Skip empty rows and pad short rows with "" up to width,
+        the same way csv.DictReader reads them.
+
+        Arguments:
+            rows (iterable): Rows of csv.reader
+            width (int): Number of header columns
+
+        yield (list)
+        """
+        for row in rows:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            yield row
+
+    def read_csv_chunks(self, path, **kwargs):
+        """
+        Read a csv file as DataFrames of get_chunk_rows() rows.
+
+        Arguments:
+            path (str): Input file path
+            kwargs: Arguments of pandas.read_csv, e.g. dtype=str
+
+        yield (pandas.DataFrame)
+        """
+        chunk_rows = self.get_chunk_rows(
+            lambda: pandas.read_csv(
+                path, encoding=self._encoding, nrows=self.SAMPLE_ROWS, **kwargs
+            )
+        )
+        reader = pandas.read_csv(
+            path, encoding=self._encoding, chunksize=chunk_rows, **kwargs
+        )
+        try:
+            yield from reader
+        finally:
+            reader.close()
+
+    def write_csv_chunks(self, chunks, path, func=None, **kwargs):
+        """
+        Write DataFrames to a csv file one after another, the header only once.
+        Used with read_csv_chunks() to transform a file in bounded memory.
+        The largest memory_usage() of a chunk and its output is logged at the end,
+        as an estimate of the memory a chunk takes (not measured memory of the process).
+
+        Arguments:
+            chunks: Iterable of pandas.DataFrame
+            path (str): Output file path
+            func: Called as func(DataFrame) for each chunk, and returns a DataFrame to write
+            kwargs: Arguments of DataFrame.to_csv, e.g. index=False
+
+        Returns:
+            int: Number of written rows
+        """
+        rows = 0
+        count = 0
+        largest = 0
+        with open(path, mode="w", encoding=self._encoding, newline="") as o:
+            for df in chunks:
+                out = func(df) if func is not None else df
+                usage = df.memory_usage(deep=True).sum()
+                if out is not df:
+                    usage += out.memory_usage(deep=True).sum()
+                largest = max(largest, int(usage))
+                out.to_csv(o, header=count == 0, **kwargs)
+                rows += len(out)
+                count += 1
+        self._logger.info(
+            "Wrote %s rows in %s chunks to %s. Estimated memory of the largest chunk is %.1f MB."
+            % (rows, count, path, largest / 1024 / 1024)
+        )
+        Metrics.add_rows(rows)
+        return rows
+
+    def get_chunk_rows(self, sample=None):
+        """
+        Number of rows of a chunk. "chunk_rows" if given.
+        If "memory_budget_mb" is given instead, estimated from the memory of sample rows,
+        so that a chunk and its transformed copy fit in the budget.
+
+        Arguments:
+            sample: Function which returns a DataFrame of the first rows
+
+        Returns:
+            int: Number of rows
+        """
+        if self._chunk_rows:
+            return int(self._chunk_rows)
+        if not self._memory_budget_mb or sample is None:
+            return self.DEFAULT_CHUNK_ROWS
+        df = sample()
+        if len(df) == 0:
+            return self.DEFAULT_CHUNK_ROWS
+        row_size = df.memory_usage(deep=True).sum() / len(df)
+        return max(int(float(self._memory_budget_mb) * 1024 * 1024 / (row_size * 2)), 1)
+
+    def pipeline_input(self, path):
+        """
+        How a 'pipeline:' block reads an input file, when this step is the first row transform.
+        Steps which can be chained in a pipeline implement transform_rows(rows),
+        which takes and yields rows (lists, a header first).
+
+        Arguments:
+            path (str): Input file path
+
+        Returns:
+            tuple: (encoding, keyword arguments of csv.reader)
+        """
+        return self._encoding, {}
+
+    def pipeline_output(self):
+        """
+        How a 'pipeline:' block writes an output file. The last step which returns
+        a value decides it. Output files are written in the same format as input files if none.
+
+        Returns:
+            tuple: (extension of the output file or None, encoding,
+                    keyword arguments of csv.writer), or None if the step keeps the format
+        """
+        return None
+
 
 class FileDecompress(FileBaseTransform):
     """
@@ -211,50 +458,53 @@ class FileDecompress(FileBaseTransform):
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
 
-        for f in files:
-            _, ext = os.path.splitext(f)
-            if ext == ".zip":
-                self._logger.info("Decompress zip file %s" % f)
-                with zipfile.ZipFile(f) as zp:
-                    zp.extractall(
-                        self._dest_dir if self._dest_dir is not None else self._src_dir
-                    )
-            elif ext == ".tar":
-                self._logger.info("Decompress tar file %s" % f)
-                with tarfile.open(f, "r:*") as tf:
-                    tf.extractall(
-                        self._dest_dir if self._dest_dir is not None else self._src_dir
-                    )
-            elif ext == ".bz2":
-                self._logger.info("Decompress bz2 file %s" % f)
-                dcom_name = os.path.splitext(os.path.basename(f))[0]
-                decom_path = (
-                    os.path.join(self._dest_dir, dcom_name)
-                    if self._dest_dir is not None
-                    else os.path.join(self._src_dir, dcom_name)
+        super().map_files(files, self._decompress)
+
+    def _decompress(self, f):
+        _, ext = os.path.splitext(f)
+        if ext == ".zip":
+            message = "Decompress zip file %s" % f
+            with zipfile.ZipFile(f) as zp:
+                zp.extractall(
+                    self._dest_dir if self._dest_dir is not None else self._src_dir
                 )
-                with bz2.open(f, mode="rb") as i, open(decom_path, mode="wb") as o:
-                    while True:
-                        buf = i.read(self._chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
-            elif ext == ".gz":
-                self._logger.info("Decompress gz file %s" % f)
-                dcom_name = os.path.splitext(os.path.basename(f))[0]
-                decom_path = (
-                    os.path.join(self._dest_dir, dcom_name)
-                    if self._dest_dir is not None
-                    else os.path.join(self._src_dir, dcom_name)
+        elif ext == ".tar":
+            message = "Decompress tar file %s" % f
+            with tarfile.open(f, "r:*") as tf:
+                tf.extractall(
+                    self._dest_dir if self._dest_dir is not None else self._src_dir
                 )
-                with gzip.open(f, "rb") as i, open(decom_path, "wb") as o:
-                    while True:
-                        buf = i.read(self._chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
-            else:
-                raise CliboaException("Unmatched any available decompress type %s" % f)
+        elif ext == ".bz2":
+            message = "Decompress bz2 file %s" % f
+            dcom_name = os.path.splitext(os.path.basename(f))[0]
+            decom_path = (
+                os.path.join(self._dest_dir, dcom_name)
+                if self._dest_dir is not None
+                else os.path.join(self._src_dir, dcom_name)
+            )
+            with bz2.open(f, mode="rb") as i, open(decom_path, mode="wb") as o:
+                while True:
+                    buf = i.read(self._chunk_size)
+                    if buf == b"":
+                        break
+                    o.write(buf)
+        elif ext == ".gz":
+            message = "Decompress gz file %s" % f
+            dcom_name = os.path.splitext(os.path.basename(f))[0]
+            decom_path = (
+                os.path.join(self._dest_dir, dcom_name)
+                if self._dest_dir is not None
+                else os.path.join(self._src_dir, dcom_name)
+            )
+            with gzip.open(f, "rb") as i, open(decom_path, "wb") as o:
+                while True:
+                    buf = i.read(self._chunk_size)
+                    if buf == b"":
+                        break
+                    o.write(buf)
+        else:
+            raise CliboaException("Unmatched any available decompress type %s" % f)
+        return message
 
 
 class FileCompress(FileBaseTransform):
@@ -283,34 +533,38 @@ class FileCompress(FileBaseTransform):
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
 
+        super().map_files(files, self._compress)
+
+    def _compress(self, f):
+        message = None
         dir = self._dest_dir if self._dest_dir is not None else self._src_dir
-        for f in files:
-            if self._format == "zip":
-                self._logger.info("Compress file %s to zip." % f)
-                with zipfile.ZipFile(
-                    os.path.join(dir, (os.path.basename(f) + ".zip")),
-                    "w",
-                    zipfile.ZIP_DEFLATED,
-                ) as o:
-                    o.write(f, arcname=os.path.basename(f))
-            elif self._format in ("gz", "gzip"):
-                self._logger.info("Compress file %s to gzip." % f)
-                com_path = os.path.join(dir, (os.path.basename(f) + ".gz"))
-                with open(f, "rb") as i, gzip.open(com_path, "wb") as o:
-                    while True:
-                        buf = i.read(self._chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
-            elif self._format in ("bz2", "bzip2"):
-                self._logger.info("Compress file %s to bzip2." % f)
-                com_path = os.path.join(dir, (os.path.basename(f) + ".bz2"))
-                with open(f, "rb") as i, bz2.open(com_path, "wb") as o:
-                    while True:
-                        buf = i.read(self._chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
+        if self._format == "zip":
+            message = "Compress file %s to zip." % f
+            with zipfile.ZipFile(
+                os.path.join(dir, (os.path.basename(f) + ".zip")),
+                "w",
+                zipfile.ZIP_DEFLATED,
+            ) as o:
+                o.write(f, arcname=os.path.basename(f))
+        elif self._format in ("gz", "gzip"):
+            message = "Compress file %s to gzip." % f
+            com_path = os.path.join(dir, (os.path.basename(f) + ".gz"))
+            with open(f, "rb") as i, gzip.open(com_path, "wb") as o:
+                while True:
+                    buf = i.read(self._chunk_size)
+                    if buf == b"":
+                        break
+                    o.write(buf)
+        elif self._format in ("bz2", "bzip2"):
+            message = "Compress file %s to bzip2." % f
+            com_path = os.path.join(dir, (os.path.basename(f) + ".bz2"))
+            with open(f, "rb") as i, bz2.open(com_path, "wb") as o:
+                while True:
+                    buf = i.read(self._chunk_size)
+                    if buf == b"":
+                        break
+                    o.write(buf)
+        return message
 
 
 class DateFormatConvert(FileBaseTransform):
@@ -368,18 +622,33 @@ class DateFormatConvert(FileBaseTransform):
                     writer.writerow(row)
                 fo.flush()
         else:
-            for ins, ous in super().io_writers(files, encoding=self._encoding):
-                reader = csv.DictReader(ins, delimiter=delimiter)
-                writer = csv.DictWriter(ous, reader.fieldnames)
-                writer.writeheader()
-                date_util = DateUtil()
-                for row in reader:
-                    for column in self._columns:
-                        r = row.get(column)
-                        if not r:
-                            continue
-                        row[column] = date_util.convert_date_format(r, self._formatter)
-                    writer.writerow(row)
+            super().io_map(files, lambda fi, fo: self._convert(fi, fo, delimiter))
+
+    def _convert(self, fi, fo, delimiter):
+        with open(fi, mode="r", encoding=self._encoding, newline="") as ins, open(
+            fo, mode="w", encoding=self._encoding, newline=""
+        ) as ous:
+            reader = csv.reader(ins, delimiter=delimiter)
+            writer = csv.writer(ous)
+            writer.writerows(self.transform_rows(reader))
+
+    def transform_rows(self, rows):
+        header = next(rows, None)
+        if header is None:
+            return
+        yield header
+
+        indexes = [header.index(c) for c in self._columns if c in header]
+        date_util = DateUtil()
+        for row in self.fill_rows(rows, len(header)):
+            for i in indexes:
+                if row[i]:
+                    row[i] = date_util.convert_date_format(row[i], self._formatter)
+            yield row
+
+    def pipeline_input(self, path):
+        delimiter = "\t" if os.path.splitext(path)[1] == ".tsv" else ","
+        return self._encoding, {"delimiter": delimiter}
 
 
 class ExcelConvert(FileBaseTransform):
@@ -387,6 +656,8 @@ class ExcelConvert(FileBaseTransform):
     Convert excel to other format
     """
 
+    COST_HINT = CostHint.MEMORY
+
     def __init__(self):
         super().__init__()
 
@@ -449,14 +720,69 @@ class ExcelConvert(FileBaseTransform):
             )
             valid()
 
+            if (self._chunk_rows or self._memory_budget_mb) and importlib.util.find_spec(
+                "openpyxl"
+            ) is None:
+                raise InvalidParameter(
+                    "'chunk_rows' and 'memory_budget_mb' require openpyxl. pip install openpyxl"
+                )
+
             files = super().get_target_files(self._src_dir, self._src_pattern)
             self.check_file_existence(files)
 
             # TODO Currently only excel to csv is supported.
-            for fi, fo in super().io_files(files, ext="csv"):
-                self._logger.info("Convert %s to %s" % (fi, fo))
-                df = pandas.read_excel(fi)
-                df.to_csv(fo, encoding=self._encoding)
+            super().io_map(files, self._convert, ext="csv")
+
+    def _convert(self, fi, fo):
+        if (self._chunk_rows or self._memory_budget_mb) and os.path.splitext(fi)[1] in (
+            ".xlsx",
+            ".xlsm",
+        ):
+            super().write_csv_chunks(self._read_excel_chunks(fi), fo)
+        else:
+            df = pandas.read_excel(fi)
+            df.to_csv(fo, encoding=self._encoding)
+        return "Convert %s to %s" % (fi, fo)
+
+    def _read_excel_chunks(self, path):
+        """
+        Read the first sheet in read-only mode of openpyxl, as DataFrames of rows of a chunk.
+        Values are kept as they are read (dtype=object), so that the output of a column
+        does not depend on the other values of the chunk, e.g. 1 and 1.0.
+        """
+        import openpyxl
+
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [
+                "Unnamed: %s" % i if c is None else c for i, c in enumerate(header)
+            ]
+            sample = list(itertools.islice(rows, self.SAMPLE_ROWS))
+            chunk_rows = super().get_chunk_rows(
+                lambda: pandas.DataFrame(sample, columns=columns, dtype=object)
+            )
+            rows = itertools.chain(sample, rows)
+            offset = 0
+            while True:
+                batch = list(itertools.islice(rows, chunk_rows))
+                if not batch and offset > 0:
+                    return
+                # row numbers continue over chunks, as the index column of the output
+                yield pandas.DataFrame(
+                    batch,
+                    columns=columns,
+                    index=range(offset, offset + len(batch)),
+                    dtype=object,
+                )
+                if len(batch) < chunk_rows:
+                    return
+                offset += len(batch)
+        finally:
+            wb.close()
 
 
 class FileDivide(FileBaseTransform):
@@ -468,6 +794,7 @@ class FileDivide(FileBaseTransform):
         super().__init__()
         self._divide_rows = None
         self._header = False
+        self._csv_index = False
 
     def divide_rows(self, divide_rows):
         self._divide_rows = divide_rows
@@ -475,6 +802,9 @@ class FileDivide(FileBaseTransform):
     def header(self, header):
         self._header = header
 
+    def csv_index(self, csv_index):
+        self._csv_index = csv_index
+
     def execute(self, *args):
         if self._dest_pattern:
             self._logger.warning(
@@ -553,13 +883,22 @@ class FileDivide(FileBaseTransform):
                 else:
                     nameonly = fname
                     ext = ""
+                newfilename = px + nameonly + ".%s" + ext
+
+                if self._csv_index is True:
+                    index = CsvIndex.get(file, self._encoding)
+                else:
+                    index = CsvIndex.load(file, self._encoding)
+                if index is not None:
+                    self._logger.info("Divide %s by rows of the csv index." % file)
+                    self._divide_by_index(file, index, newfilename)
+                    continue
 
                 if self._header:
                     with open(file, encoding=self._encoding) as i:
                         self._header_row = i.readline()
 
                 row = self._ifile_reader(file)
-                newfilename = px + nameonly + ".%s" + ext
 
                 has_left = True
                 index = 1
@@ -568,6 +907,32 @@ class FileDivide(FileBaseTransform):
                     has_left = self._ofile_generator(ofile_path, row)
                     index = index + 1
 
+    def _divide_by_index(self, file, index, newfilename):
+        """
+        Copy bytes of every divide_rows rows, which are found by the csv index.
+        A row is a csv record, which can contain newlines.
+        """
+        if self._header:
+            header_end = index.data_start
+            total = index.rows
+            start = index.data_start
+        else:
+            header_end = 0
+            total = index.rows + (0 if index.header is None else 1)
+            start = 0
+
+        f = File()
+        for i, n in enumerate(range(0, total, self._divide_rows)):
+            last = min(n + self._divide_rows, total)
+            # the header is counted as a row if it is not added to the files
+            end = index.offset(last if self._header else last - 1)
+            ofile_path = os.path.join(self._dest_dir, newfilename % str(i + 1))
+            with open(ofile_path, mode="wb") as o:
+                if header_end > 0:
+                    f.append_file(file, o, 0, header_end)
+                f.append_file(file, o, start, end)
+            start = end
+
     def _ifile_reader(self, filepath):
         with open(filepath, encoding=self._encoding) as i:
             if self._header is True:
@@ -671,16 +1036,17 @@ class FileConvert(FileBaseTransform):
         files = super().get_target_files(self._src_dir, self._src_pattern)
         self.check_file_existence(files)
 
-        for fi, fo in super().io_files(files):
-            File().convert_encoding(
-                fi,
-                fo,
-                self._encoding_from,
-                self._encoding_to,
-                self._errors,
-            )
+        super().io_map(files, self._convert)
 
-            self._logger.info("Encoded file %s" % fi)
+    def _convert(self, fi, fo):
+        File().convert_encoding(
+            fi,
+            fo,
+            self._encoding_from,
+            self._encoding_to,
+            self._errors,
+        )
+        return "Encoded file %s" % fi
 
 
 class FileArchive(FileBaseTransform):
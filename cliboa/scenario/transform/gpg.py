@@ -2,6 +2,7 @@ import os
 from cliboa.core.validator import EssentialParameters
 from cliboa.scenario.base import BaseStep
 from cliboa.util.gpg import Gpg
+from cliboa.util.parallel import ParallelMap
 
 
 class GpgBase(BaseStep):
@@ -16,6 +17,8 @@ class GpgBase(BaseStep):
         self._key_dir = None
         self._key_pattern = None
         self._trust_level = None
+        self._max_workers = 1
+        self._worker_mode = ParallelMap.PROCESS
 
     def gnupghome(self, gnupghome):
         self._gnupghome = gnupghome
@@ -44,6 +47,12 @@ class GpgBase(BaseStep):
     def trust_level(self, trust_level):
         self._trust_level = trust_level
 
+    def max_workers(self, max_workers):
+        self._max_workers = max_workers
+
+    def worker_mode(self, worker_mode):
+        self._worker_mode = worker_mode
+
     def execute(self, *args):
         valid = EssentialParameters(self.__class__.__name__, [self._gnupghome])
         valid()
@@ -121,19 +130,23 @@ class GpgEncrypt(GpgBase):
             self._logger.info("Keys found %s" % key_files)
             self.key_import(gpg, key_files, self._trust_level)
 
-        for file in files:
-            dest_path = (
-                os.path.join(self._dest_dir, os.path.basename(file))
-                if self._dest_dir is not None
-                else os.path.join(self._src_dir, os.path.basename(file))
-            )
-            gpg.encrypt(
-                file,
-                dest_path,
-                recipients=self._recipients,
-                passphrase=self._passphrase,
-                always_trust=self._always_trust,
-            )
+        ParallelMap(self._max_workers, self._worker_mode).run(
+            lambda file: self._encrypt(gpg, file), [(f,) for f in files]
+        )
+
+    def _encrypt(self, gpg, file):
+        dest_path = (
+            os.path.join(self._dest_dir, os.path.basename(file))
+            if self._dest_dir is not None
+            else os.path.join(self._src_dir, os.path.basename(file))
+        )
+        gpg.encrypt(
+            file,
+            dest_path,
+            recipients=self._recipients,
+            passphrase=self._passphrase,
+            always_trust=self._always_trust,
+        )
 
 
 class GpgDecrypt(GpgBase):
@@ -158,19 +171,27 @@ class GpgDecrypt(GpgBase):
             self.key_import(key_files, self._trust_level)
 
         gpg = Gpg(self._gnupghome)
-        for file in files:
-            root, ext = os.path.splitext(file)
-            if ext == ".gpg":
-                dest_path = (
-                    os.path.join(self._dest_dir, os.path.basename(root))
-                    if self._dest_dir is not None
-                    else os.path.join(self._src_dir, os.path.basename(root))
-                )
-                gpg.decrypt(
-                    file,
-                    dest_path,
-                    passphrase=self._passphrase,
-                    always_trust=self._always_trust,
-                )
-            else:
-                self._logger.warning("Extention was not gpg. %s" % file)
+        files = [f for f in files if self._is_gpg(f)]
+        ParallelMap(self._max_workers, self._worker_mode).run(
+            lambda file: self._decrypt(gpg, file), [(f,) for f in files]
+        )
+
+    def _is_gpg(self, file):
+        if os.path.splitext(file)[1] == ".gpg":
+            return True
+        self._logger.warning("Extention was not gpg. %s" % file)
+        return False
+
+    def _decrypt(self, gpg, file):
+        root, _ = os.path.splitext(file)
+        dest_path = (
+            os.path.join(self._dest_dir, os.path.basename(root))
+            if self._dest_dir is not None
+            else os.path.join(self._src_dir, os.path.basename(root))
+        )
+        gpg.decrypt(
+            file,
+            dest_path,
+            passphrase=self._passphrase,
+            always_trust=self._always_trust,
+        )
@@ -0,0 +1,149 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import bz2
+import csv
+import gzip
+import os
+
+from cliboa.core.validator import EssentialParameters
+from cliboa.scenario.transform.file import FileBaseTransform, FileDecompress
+from cliboa.util.exception import InvalidParameter, ScenarioFileInvalid
+from cliboa.util.metrics import Metrics
+
+__all__ = ["StepPipeline"]
+
+
+class StepPipeline(FileBaseTransform):
+    """
+    Steps of a 'pipeline:' block, which are chained row by row.
+
+    Each input file is read once and each output file is written once.
+    Rows are passed through transform_rows(rows) of the steps as generators,
+    so no intermediate file is created.
+        - Input files are 'src_dir' and 'src_pattern' of the first step,
+          read in the format of the first row transform (e.g. 'before_format' of CsvConvert).
+        - Output files are created in 'dest_dir' of the last step, in the format
+          of the last step which changes it (e.g. 'after_format' of CsvConvert).
+          The same format as input files if no step changes it.
+        - FileDecompress can be the first step. gz and bz2 files are decompressed
+          while they are read.
+        - 'max_workers' and 'worker_mode' of the last step are applied.
+    'src_dir', 'src_pattern' and 'dest_dir' of the other steps are ignored.
+    """
+
+    _OPENERS = {".gz": gzip.open, ".bz2": bz2.open}
+
+    def __init__(self):
+        super().__init__()
+        self._steps = []
+        self._decompress = False
+
+    def steps(self, steps):
+        """
+        Args:
+            steps (list): Step instances in the order of the pipeline
+        """
+        row_steps = steps[1:] if steps and isinstance(steps[0], FileDecompress) else steps
+        if not row_steps:
+            raise ScenarioFileInvalid(
+                "scenario.yml is invalid. 'pipeline:' requires one or more row transforms."
+            )
+        for s in row_steps:
+            if not callable(getattr(s, "transform_rows", None)):
+                raise ScenarioFileInvalid(
+                    "scenario.yml is invalid. %s can not be used in 'pipeline:'."
+                    % s.__class__.__name__
+                )
+        self._steps = steps
+
+    def execute(self, *args):
+        first = self._steps[0]
+        last = self._steps[-1]
+        valid = EssentialParameters(
+            self.__class__.__name__, [first._src_dir, first._src_pattern]
+        )
+        valid()
+
+        self._decompress = isinstance(first, FileDecompress)
+        self._nonfile_error = first._nonfile_error
+        self._dest_dir = last._dest_dir
+        self._max_workers = last._max_workers
+        self._worker_mode = last._worker_mode
+
+        files = super().get_target_files(first._src_dir, first._src_pattern)
+        self.check_file_existence(files)
+        if self._decompress:
+            for f in files:
+                if os.path.splitext(f)[1] not in self._OPENERS:
+                    raise InvalidParameter(
+                        "Only gz and bz2 files can be decompressed in 'pipeline:'. %s" % f
+                    )
+
+        ext, _, _ = self._output_format(None, None)
+        super().io_map(files, self._transform, ext=ext)
+
+    def _row_steps(self):
+        return self._steps[1:] if self._decompress else self._steps
+
+    def _output_format(self, encoding, reader_args):
+        """
+        Returns:
+            tuple: (extension of the output file or None, encoding, keyword arguments of csv.writer)
+        """
+        for s in reversed(self._row_steps()):
+            output = s.pipeline_output()
+            if output is not None:
+                return output
+        writer_args = {}
+        if reader_args and "delimiter" in reader_args:
+            writer_args["delimiter"] = reader_args["delimiter"]
+        return None, encoding, writer_args
+
+    def _transform(self, fi, fo):
+        row_steps = self._row_steps()
+        encoding, reader_args = row_steps[0].pipeline_input(
+            os.path.splitext(fi)[0] if self._decompress else fi
+        )
+        _, out_encoding, writer_args = self._output_format(encoding, reader_args)
+        opener = self._OPENERS[os.path.splitext(fi)[1]] if self._decompress else open
+
+        with opener(fi, mode="rt", encoding=encoding, newline="") as i, open(
+            fo, mode="w", encoding=out_encoding, newline=""
+        ) as o:
+            rows = csv.reader(i, **reader_args)
+            for s in row_steps:
+                rows = s.transform_rows(rows)
+
+            writer = csv.writer(o, **writer_args)
+            lines = 0
+            for row in rows:
+                writer.writerow(row)
+                lines += 1
+            # except a header
+            Metrics.add_rows(max(lines - 1, 0))
+        return "Transformed %s through %s" % (
+            fi,
+            " -> ".join(s.__class__.__name__ for s in self._steps),
+        )
+
+    def _io_paths(self, iterable, ext, result_cache):
+        for input_path, output_path, fingerprint in super()._io_paths(
+            iterable, None, result_cache
+        ):
+            root, name = os.path.split(output_path)
+            if self._decompress:
+                name = os.path.splitext(name)[0]
+            if ext:
+                name = os.path.splitext(name)[0] + "." + ext.lstrip(".")
+            yield input_path, os.path.join(root, name), fingerprint
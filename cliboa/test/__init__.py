@@ -17,6 +17,8 @@ from unittest import TestCase
 
 import pytest
 
+from cliboa.util.config import CliboaConfig
+
 
 class BaseCliboaTest(TestCase):
     """
@@ -43,5 +45,6 @@ class BaseCliboaTest(TestCase):
         # copy cliboa.ini
         conf_path = os.path.join("cliboa", "conf", "cliboa.ini")
         copyfile(conf_path, os.path.join("conf", "cliboa.ini"))
+        CliboaConfig.reset()
 
         yield "test in progress"
@@ -19,7 +19,14 @@ import pytest
 from cliboa.client import CommandArgumentParser
 from cliboa.core.factory import CustomInstanceFactory, ScenarioManagerFactory, StepExecutorFactory
 from cliboa.core.manager import YamlScenarioManager
-from cliboa.core.strategy import MultiProcExecutor, SingleProcExecutor
+from cliboa.core.step_dag import StepDag
+from cliboa.core.step_queue import StepBlock
+from cliboa.core.strategy import (
+    DagExecutor,
+    MultiProcExecutor,
+    MultiThreadExecutor,
+    SingleProcExecutor,
+)
 from cliboa.test import BaseCliboaTest
 
 
@@ -62,6 +69,23 @@ class TestStepExecutorFactory(TestFactory):
         s = StepExecutorFactory.create(["1", "2"])
         self.assertTrue(isinstance(s, type(MultiProcExecutor(None))))
 
+    def test_create_multi_thread(self):
+        """
+        Succeeded to create MultiThread instance
+        """
+        s = StepExecutorFactory.create(StepBlock(["1", "2"], parallel_mode="thread"))
+        self.assertTrue(isinstance(s, MultiThreadExecutor))
+
+        s = StepExecutorFactory.create(StepBlock(["1", "2"], parallel_mode="process"))
+        self.assertTrue(isinstance(s, MultiProcExecutor))
+
+    def test_create_dag(self):
+        """
+        Succeeded to create DagExecutor instance
+        """
+        s = StepExecutorFactory.create(StepDag())
+        self.assertTrue(isinstance(s, DagExecutor))
+
 
 class TestCustomInstanceFactory(TestFactory):
     def test_execute_no_candidates(self):
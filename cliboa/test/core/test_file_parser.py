@@ -11,17 +11,20 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import json
 import os
 import shutil
 import sys
+from unittest.mock import patch
 
 import pytest
 import yaml
 
 from cliboa.client import CommandArgumentParser
 from cliboa.conf import env
-from cliboa.core.file_parser import YamlScenarioParser
+from cliboa.core.file_parser import JsonScenarioParser, YamlScenarioParser
 from cliboa.test import BaseCliboaTest
+from cliboa.util.config import CliboaConfig
 from cliboa.util.exception import ScenarioFileInvalid
 
 
@@ -343,3 +346,100 @@ class TestYamlScenarioParser(BaseCliboaTest):
         for scenario in yaml_scenario_list:
             for dict in scenario.get("parallel"):
                 assert "dummy_host" == dict.get("arguments")["host"]
+
+    def test_parse_with_cache(self):
+        """
+        Parsed scenario is cached until scenario.yml is changed
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {"arguments": {"retry_count": 10}, "class": "SftpDownload", "step": "a"}
+            ]
+        }
+        with open(self._pj_scenario_file, "w") as f:
+            f.write(yaml.dump(pj_yaml_dict, default_flow_style=False))
+        if os.path.exists(self._cmn_scenario_file):
+            os.remove(self._cmn_scenario_file)
+
+        parser = YamlScenarioParser(self._pj_scenario_file, self._cmn_scenario_file)
+        # disabled by default
+        assert parser.parse()[0]["arguments"]["retry_count"] == 10
+        assert not os.path.exists(os.path.join(self._pj_dir, ".scenario.yml.pickle"))
+
+        with patch.object(CliboaConfig, "getboolean", return_value=True):
+            assert parser.parse()[0]["arguments"]["retry_count"] == 10
+            assert os.path.isfile(os.path.join(self._pj_dir, ".scenario.yml.pickle"))
+
+            with patch.object(YamlScenarioParser, "_load") as load:
+                assert parser.parse()[0]["arguments"]["retry_count"] == 10
+                load.assert_not_called()
+
+            pj_yaml_dict["scenario"][0]["arguments"]["retry_count"] = 20
+            with open(self._pj_scenario_file, "w") as f:
+                f.write(yaml.dump(pj_yaml_dict, default_flow_style=False))
+            assert parser.parse()[0]["arguments"]["retry_count"] == 20
+
+    def test_merge_first_common_class(self):
+        """
+        If the same class is defined twice in common scenario.yml, the first one is merged
+        """
+        pj_yaml_dict = {"scenario": [{"class": "SftpDownload", "step": "a"}]}
+        with open(self._pj_scenario_file, "w") as f:
+            f.write(yaml.dump(pj_yaml_dict, default_flow_style=False))
+        cmn_yaml_dict = {
+            "scenario": [
+                {"arguments": {"host": "first"}, "class": "SftpDownload", "step": "a"},
+                {"arguments": {"host": "second"}, "class": "SftpDownload", "step": "b"},
+            ]
+        }
+        with open(self._cmn_scenario_file, "w") as f:
+            f.write(yaml.dump(cmn_yaml_dict, default_flow_style=False))
+
+        try:
+            parser = YamlScenarioParser(self._pj_scenario_file, self._cmn_scenario_file)
+            assert parser.parse()[0]["arguments"]["host"] == "first"
+        finally:
+            os.remove(self._cmn_scenario_file)
+
+
+class TestJsonScenarioParser(BaseCliboaTest):
+    def setUp(self):
+        self._pj_dir = os.path.join(env.BASE_DIR, "project", "spam")
+        self._pj_scenario_file = os.path.join(self._pj_dir, "scenario.json")
+        self._cmn_scenario_file = os.path.join(env.COMMON_DIR, "scenario.json")
+        os.makedirs(self._pj_dir, exist_ok=True)
+        os.makedirs(env.COMMON_DIR, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self._pj_dir, ignore_errors=True)
+        if os.path.exists(self._cmn_scenario_file):
+            os.remove(self._cmn_scenario_file)
+
+    def test_parse_with_pj_and_cmn_json_ok(self):
+        pj_dict = {
+            "scenario": [
+                {"arguments": {"retry_count": 10}, "class": "SftpDownload", "step": "a"}
+            ]
+        }
+        with open(self._pj_scenario_file, "w") as f:
+            json.dump(pj_dict, f)
+        cmn_dict = {
+            "scenario": [
+                {"arguments": {"host": "dummy_host"}, "class": "SftpDownload", "step": "a"}
+            ]
+        }
+        with open(self._cmn_scenario_file, "w") as f:
+            json.dump(cmn_dict, f)
+
+        parser = JsonScenarioParser(self._pj_scenario_file, self._cmn_scenario_file)
+        scenario_list = parser.parse()
+        assert scenario_list[0]["arguments"] == {"retry_count": 10, "host": "dummy_host"}
+
+    def test_parse_no_scenario_key_ng(self):
+        with open(self._pj_scenario_file, "w") as f:
+            json.dump({"test": []}, f)
+
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            parser = JsonScenarioParser(self._pj_scenario_file, self._cmn_scenario_file)
+            parser.parse()
+        assert "invalid" in str(excinfo.value)
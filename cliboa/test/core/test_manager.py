@@ -11,6 +11,7 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import json
 import os
 import pytest
 import shutil
@@ -19,8 +20,11 @@ import yaml
 
 from cliboa.client import CommandArgumentParser
 from cliboa.conf import env
-from cliboa.core.manager import YamlScenarioManager
+from cliboa.core.manager import JsonScenarioManager, YamlScenarioManager
+from cliboa.core.profiler import StepProfileListener
 from cliboa.core.scenario_queue import ScenarioQueue
+from cliboa.core.step_dag import StepDag
+from cliboa.core.vars_resolver import VariableResolver
 from cliboa.test import BaseCliboaTest
 from cliboa.util.exception import ScenarioFileInvalid
 from datetime import datetime, timedelta
@@ -116,6 +120,147 @@ class TestYamlScenarioManager(BaseCliboaTest):
                 assert instance._step == "sample_step_2"
                 assert instance._retry_count == 2
 
+    def test_create_scenario_queue_ok_parallel_mode(self):
+        """
+        Valid scenario.yml with parallel_mode
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {
+                    "parallel_mode": "thread",
+                    "parallel": [
+                        {
+                            "step": "sample_step_1",
+                            "class": "SampleStep",
+                        },
+                        {
+                            "step": "sample_step_2",
+                            "class": "SampleStep",
+                        },
+                    ],
+                }
+            ]
+        }
+        self._create_scenario_file(pj_yaml_dict)
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        instances = ScenarioQueue.step_queue.pop()
+        assert len(instances) == 2
+        assert instances.parallel_mode == "thread"
+
+    def test_create_scenario_queue_ok_multi_process_count(self):
+        """
+        Valid scenario.yml with multi_process_count of the scenario and of a parallel block
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {"multi_process_count": "auto"},
+                {
+                    "multi_process_count": 3,
+                    "parallel": [
+                        {
+                            "step": "sample_step_1",
+                            "class": "SampleStep",
+                        },
+                        {
+                            "step": "sample_step_2",
+                            "class": "SampleStep",
+                        },
+                    ],
+                },
+                {
+                    "parallel": [
+                        {
+                            "step": "sample_step_3",
+                            "class": "SampleStep",
+                        },
+                        {
+                            "step": "sample_step_4",
+                            "class": "SampleStep",
+                        },
+                    ],
+                },
+            ]
+        }
+        self._create_scenario_file(pj_yaml_dict)
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        assert ScenarioQueue.step_queue.multi_proc_cnt == "auto"
+        assert ScenarioQueue.step_queue.pop().multi_proc_cnt == 3
+        assert ScenarioQueue.step_queue.pop().multi_proc_cnt is None
+
+    def test_create_scenario_queue_ok_depends_on(self):
+        """
+        Valid scenario.yml with depends_on
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {
+                    "step": "sample_step_1",
+                    "class": "SampleStep",
+                    "depends_on": [],
+                },
+                {
+                    "step": "sample_step_2",
+                    "class": "SampleStep",
+                    "depends_on": [],
+                },
+                {
+                    "step": "sample_step_3",
+                    "class": "SampleStep",
+                    "depends_on": "sample_step_1",
+                },
+            ]
+        }
+        self._create_scenario_file(pj_yaml_dict)
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        dag = ScenarioQueue.step_queue.pop()
+        assert isinstance(dag, StepDag)
+        assert len(dag) == 3
+        assert dag.ready() == [0, 1]
+        assert dag.get(2)._step == "sample_step_3"
+
+    def test_create_scenario_queue_ok_pipeline(self):
+        """
+        Valid scenario.yml with pipeline
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {
+                    "step": "transform",
+                    "pipeline": [
+                        {
+                            "step": "convert",
+                            "class": "CsvConvert",
+                            "arguments": {
+                                "src_dir": "data",
+                                "src_pattern": r"test\.csv",
+                            },
+                        },
+                        {
+                            "step": "extract",
+                            "class": "CsvColumnExtract",
+                            "arguments": {"columns": ["id"]},
+                        },
+                    ],
+                },
+            ]
+        }
+        self._create_scenario_file(pj_yaml_dict)
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        instances = ScenarioQueue.step_queue.pop()
+        assert len(instances) == 1
+        pipeline = instances[0]
+        assert pipeline._step == "transform"
+        assert [s._step for s in pipeline._steps] == ["convert", "extract"]
+        assert pipeline._steps[1]._columns == ["id"]
+
     def test_create_scenario_queue_ok_with_no_args(self):
         """
         Valid scenario.yml with no arguments
@@ -356,3 +501,113 @@ class TestYamlScenarioManager(BaseCliboaTest):
             manager = YamlScenarioManager(self._cmd_args)
             manager.create_scenario_queue()
         assert "invalid" in str(excinfo.value)
+
+    def test_create_scenario_queue_unknown_class_ng(self):
+        """
+        Class which neither default nor custom
+        """
+        pj_yaml_dict = {"scenario": [{"step": "spam", "class": "SpamStep"}]}
+        self._create_scenario_file(pj_yaml_dict)
+
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            manager = YamlScenarioManager(self._cmd_args)
+            manager.create_scenario_queue()
+        assert "class SpamStep does not exist" in str(excinfo.value)
+
+    def _with_vars_scenario(self, scope=None):
+        steps = [
+            {
+                "step": "step_%s" % i,
+                "class": "SampleStep",
+                "arguments": {
+                    "memo": "{{ now }}",
+                    "with_vars": {"now": "date '+%s%N'"},
+                },
+            }
+            for i in range(2)
+        ]
+        if scope:
+            steps.insert(0, {"with_vars_scope": scope})
+        return {"scenario": steps}
+
+    def test_create_scenario_queue_with_vars_scenario_scope(self):
+        """
+        The same command is executed once in a scenario
+        """
+        self._create_scenario_file(self._with_vars_scenario())
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        first = ScenarioQueue.step_queue.pop()[0]
+        second = ScenarioQueue.step_queue.pop()[0]
+        assert first._memo == second._memo
+
+        variables = VariableResolver.get().variables
+        assert variables["step_0"]["now"] == first._memo
+        assert variables["step_1"]["now"] == first._memo
+
+    def test_create_scenario_queue_with_vars_step_scope(self):
+        """
+        The command is executed in each step
+        """
+        self._create_scenario_file(self._with_vars_scenario("step"))
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        first = ScenarioQueue.step_queue.pop()[0]
+        second = ScenarioQueue.step_queue.pop()[0]
+        assert first._memo != second._memo
+
+    def test_create_scenario_queue_profile(self):
+        """
+        'profile: true' adds StepProfileListener to the steps
+        """
+        pj_yaml_dict = {
+            "scenario": [
+                {"profile": True},
+                {"step": "sample_step", "class": "SampleStep"},
+            ]
+        }
+        self._create_scenario_file(pj_yaml_dict)
+
+        manager = YamlScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        assert ScenarioQueue.step_queue.profile is not None
+        instance = ScenarioQueue.step_queue.pop()[0]
+        assert any(isinstance(x, StepProfileListener) for x in instance._listeners)
+
+
+class TestJsonScenarioManager(BaseCliboaTest):
+    def setUp(self):
+        cmd_parser = CommandArgumentParser()
+        sys.argv.clear()
+        sys.argv.append("spam")
+        sys.argv.append("spam")
+        sys.argv.append("--format")
+        sys.argv.append("json")
+        self._cmd_args = cmd_parser.parse()
+        self._pj_dir = os.path.join(env.PROJECT_DIR, "spam")
+        os.makedirs(self._pj_dir, exist_ok=True)
+        self._pj_scenario_file = os.path.join(self._pj_dir, "scenario.json")
+
+    def tearDown(self):
+        shutil.rmtree(self._pj_dir, ignore_errors=True)
+
+    def test_create_scenario_queue_ok(self):
+        pj_dict = {
+            "scenario": [
+                {
+                    "step": "sample_step",
+                    "class": "SampleStep",
+                    "arguments": {"retry_count": 10},
+                }
+            ]
+        }
+        with open(self._pj_scenario_file, mode="w", encoding="utf-8") as f:
+            json.dump(pj_dict, f)
+
+        manager = JsonScenarioManager(self._cmd_args)
+        manager.create_scenario_queue()
+        instance = ScenarioQueue.step_queue.pop()[0]
+        assert instance._step == "sample_step"
+        assert instance._retry_count == 10
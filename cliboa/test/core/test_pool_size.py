@@ -0,0 +1,89 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from cliboa.core import pool_size
+from cliboa.core.pool_size import PoolSize
+from cliboa.scenario.sample_step import SampleStep
+from cliboa.test import BaseCliboaTest
+from cliboa.util.constant import CostHint
+
+
+class IoStep(SampleStep):
+    COST_HINT = CostHint.IO
+
+
+class MemoryStep(SampleStep):
+    COST_HINT = CostHint.MEMORY
+
+
+class TestPoolSize(BaseCliboaTest):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        path = os.path.join(self._dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_resolve_number(self):
+        assert PoolSize.resolve(3, [SampleStep()]) == 3
+
+    def test_cpu_quota_v2(self):
+        self._write("cpu.max", "150000 100000\n")
+        with patch.object(pool_size, "_CGROUP_ROOT", self._dir), patch(
+            "os.sched_getaffinity", return_value=set(range(8)), create=True
+        ):
+            assert PoolSize.available_cpus() == 2
+
+    def test_cpu_quota_v1_unlimited(self):
+        self._write("cpu/cpu.cfs_quota_us", "-1\n")
+        self._write("cpu/cpu.cfs_period_us", "100000\n")
+        with patch.object(pool_size, "_CGROUP_ROOT", self._dir), patch(
+            "os.sched_getaffinity", return_value=set(range(8)), create=True
+        ):
+            assert PoolSize.available_cpus() == 8
+
+    def test_memory_limit(self):
+        self._write("memory.max", str(3 * 1024 ** 3))
+        self._write("memory.current", str(1024 ** 3))
+        self._write("meminfo", "MemTotal: 16000000 kB\nMemAvailable: 8000000 kB\n")
+        with patch.object(pool_size, "_CGROUP_ROOT", self._dir), patch.object(
+            pool_size, "_MEMINFO", os.path.join(self._dir, "meminfo")
+        ):
+            assert PoolSize.available_memory() == 2 * 1024 ** 3
+
+    def test_auto(self):
+        """
+        The smallest size of the cost hints, up to the number of steps
+        """
+        with patch.object(PoolSize, "available_cpus", return_value=4), patch.object(
+            PoolSize, "available_memory", return_value=2 * 1024 ** 3
+        ):
+            assert PoolSize.resolve("auto", [SampleStep() for _ in range(10)]) == 4
+            assert PoolSize.resolve("auto", [SampleStep() for _ in range(3)]) == 3
+            assert PoolSize.resolve("auto", [IoStep() for _ in range(30)]) == 16
+            assert PoolSize.resolve("auto", [IoStep() for _ in range(60)] + [MemoryStep()]) == 2
+            assert PoolSize.resolve("auto", []) == 4
+
+    def test_auto_max_workers(self):
+        with patch.object(PoolSize, "available_cpus", return_value=32):
+            assert PoolSize.resolve("auto", [IoStep() for _ in range(200)]) == 32
@@ -0,0 +1,132 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import csv
+import json
+import os
+import shutil
+
+from cliboa.conf import env
+from cliboa.core.listener import StepStatusListener
+from cliboa.core.profiler import ProfileReportListener, StepProfileListener
+from cliboa.core.scenario_queue import ScenarioQueue
+from cliboa.core.step_queue import StepQueue
+from cliboa.core.strategy import MultiProcExecutor, SingleProcExecutor
+from cliboa.scenario.base import BaseStep
+from cliboa.test import BaseCliboaTest
+from cliboa.util.helper import Helper
+from cliboa.util.lisboa_log import LisboaLog
+
+
+class ProfileSampleStep(BaseStep):
+    """
+    Find files and write a file
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._src_dir = None
+
+    def src_dir(self, src_dir):
+        self._src_dir = src_dir
+
+    def execute(self, *args):
+        files = self.get_target_files(self._src_dir, r".*\.txt")
+        with open(os.path.join(self._src_dir, "%s.out" % self._step), "w") as f:
+            f.write("spam" * 1000)
+        return None if files else "no files"
+
+
+class TestProfiler(BaseCliboaTest):
+    def setUp(self):
+        self._pj_dir = os.path.join(env.PROJECT_DIR, "spam")
+        self._data_dir = os.path.join(self._pj_dir, "data")
+        os.makedirs(self._data_dir, exist_ok=True)
+        for i in range(3):
+            with open(os.path.join(self._data_dir, "%s.txt" % i), "w") as f:
+                f.write("spam")
+        self._spool = ProfileReportListener.create_spool("spam")
+
+        q = StepQueue()
+        setattr(ScenarioQueue, "step_queue", q)
+
+    def tearDown(self):
+        shutil.rmtree(self._pj_dir, ignore_errors=True)
+
+    def _create_step(self, name):
+        step = ProfileSampleStep()
+        Helper.set_property(step, "step", name)
+        Helper.set_property(step, "src_dir", self._data_dir)
+        Helper.set_property(step, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(
+            step, "listeners", [StepStatusListener(), StepProfileListener(self._spool)]
+        )
+        return step
+
+    def _report(self):
+        listener = ProfileReportListener(self._spool, "spam")
+        listener.before_scenario(None)
+        listener.after_scenario(None)
+        assert os.path.exists(self._spool) is False
+        report_dir = os.path.join(self._pj_dir, "profile")
+        with open(os.path.join(report_dir, os.listdir(report_dir)[0])) as f:
+            return json.load(f)
+
+    def test_single_process(self):
+        SingleProcExecutor([self._create_step("a")]).execute_steps(None)
+
+        report = self._report()
+        assert report["project"] == "spam"
+        assert len(report["steps"]) == 1
+        record = report["steps"][0]
+        assert record["step"] == "a"
+        assert record["class"] == "ProfileSampleStep"
+        assert record["status"] == "succeeded"
+        assert record["pid"] == os.getpid()
+        assert record["files"] == 3
+        assert record["wall_sec"] >= 0
+        assert record["max_rss_growth_kb"] >= 0
+        assert record["process_max_rss_kb"] > 0
+
+    def test_skip_step(self):
+        StepProfileListener(self._spool).skip_step(self._create_step("a"))
+
+        report = self._report()
+        record = report["steps"][0]
+        assert record["step"] == "a"
+        assert record["status"] == "skipped"
+        assert record["wall_sec"] == 0
+        assert record["max_rss_growth_kb"] is None
+
+    def test_pool_workers(self):
+        MultiProcExecutor([self._create_step("a"), self._create_step("b")]).execute_steps(
+            None
+        )
+
+        report = self._report()
+        assert sorted(r["step"] for r in report["steps"]) == ["a", "b"]
+        for record in report["steps"]:
+            assert record["pid"] != os.getpid()
+            assert record["files"] == 3
+
+    def test_csv_report(self):
+        SingleProcExecutor([self._create_step("a")]).execute_steps(None)
+
+        listener = ProfileReportListener(self._spool, "spam")
+        listener._formats = ["csv"]
+        listener.after_scenario(None)
+        report_dir = os.path.join(self._pj_dir, "profile")
+        with open(os.path.join(report_dir, os.listdir(report_dir)[0])) as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["step"] == "a"
+        assert rows[0]["files"] == "3"
@@ -0,0 +1,99 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import pytest
+
+from cliboa.core.step_dag import StepDag
+from cliboa.util.exception import ScenarioFileInvalid
+
+
+class TestStepDag(object):
+    def test_implicit_order(self):
+        dag = StepDag()
+        dag.push(["a"], ["a"], [None])
+        dag.push(["b", "c"], ["b", "c"], [None, None])
+        dag.push(["d"], ["d"], [None])
+        dag.build()
+
+        assert dag.ready() == [0]
+        dag.start(0)
+        assert dag.ready() == []
+        dag.done(0)
+        assert dag.ready() == [1, 2]
+        dag.start(1)
+        dag.done(1)
+        assert dag.ready() == [2]
+        dag.start(2)
+        dag.done(2)
+        assert dag.ready() == [3]
+        dag.start(3)
+        dag.done(3)
+        assert dag.is_done() is True
+
+    def test_depends_on(self):
+        dag = StepDag()
+        dag.push(["a"], ["a"], [[]])
+        dag.push(["b"], ["b"], [[]])
+        dag.push(["c"], ["c"], ["a"])
+        dag.push(["d"], ["d"], [["b", "c"]])
+        dag.build()
+
+        assert dag.ready() == [0, 1]
+        dag.start(0)
+        dag.start(1)
+        dag.done(1)
+        assert dag.ready() == []
+        dag.done(0)
+        assert dag.ready() == [2]
+        dag.start(2)
+        dag.done(2)
+        assert dag.ready() == [3]
+
+    def test_skip(self):
+        dag = StepDag()
+        dag.push(["a"], ["a"], [[]])
+        dag.push(["b"], ["b"], [[]])
+        dag.push(["c"], ["c"], ["a"])
+        dag.push(["d"], ["d"], [None])
+        dag.build()
+
+        dag.start(0)
+        dag.start(1)
+        assert sorted(dag.skip(0)) == [0, 2, 3]
+        dag.done(1)
+        assert dag.ready() == []
+        assert dag.is_done() is True
+
+    def test_unknown_step(self):
+        dag = StepDag()
+        dag.push(["a"], ["a"], ["spam"])
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            dag.build()
+        assert "does not exist" in str(excinfo.value)
+
+    def test_not_unique_step(self):
+        dag = StepDag()
+        dag.push(["a", "b"], ["a", "a"], [[], []])
+        dag.push(["c"], ["c"], ["a"])
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            dag.build()
+        assert "is not unique" in str(excinfo.value)
+
+    def test_circular_reference(self):
+        dag = StepDag()
+        dag.push(["a"], ["a"], ["c"])
+        dag.push(["b"], ["b"], [None])
+        dag.push(["c"], ["c"], ["b"])
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            dag.build()
+        assert "circular reference" in str(excinfo.value)
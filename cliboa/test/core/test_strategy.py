@@ -13,12 +13,22 @@
 #
 import sys
 
+import pytest
+
 from cliboa.client import CommandArgumentParser
 from cliboa.core.scenario_queue import ScenarioQueue
+from cliboa.core.step_dag import StepDag
 from cliboa.core.step_queue import StepQueue
-from cliboa.core.strategy import MultiProcExecutor, SingleProcExecutor
+from cliboa.core.strategy import (
+    DagExecutor,
+    MultiProcExecutor,
+    MultiThreadExecutor,
+    SingleProcExecutor,
+    StepWorkerPool,
+)
 from cliboa.scenario.sample_step import SampleStep
 from cliboa.test import BaseCliboaTest
+from cliboa.util.cache import ObjectStore
 from cliboa.util.exception import CliboaException, StepExecutionFailed
 from cliboa.util.helper import Helper
 from cliboa.util.lisboa_log import LisboaLog
@@ -98,6 +108,192 @@ class TestStrategy(BaseCliboaTest):
             executor = MultiProcExecutor([step1, step2])
             executor.execute_steps(None)
 
+    def test_multi_process_object_store(self):
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        steps = []
+        for key in ["spam", "ham"]:
+            step = PutSampleStep()
+            Helper.set_property(step, "logger", LisboaLog.get_logger(step.__class__.__name__))
+            Helper.set_property(step, "step", key)
+            steps.append(step)
+
+        MultiProcExecutor(steps).execute_steps(None)
+        try:
+            assert ObjectStore.get("spam") == ["spam.csv"]
+            assert ObjectStore.get("ham") == ["ham.csv"]
+            assert ObjectStore.get("spam_bytes") == b"spam" * 1024
+        finally:
+            for k in ["spam", "ham", "spam_bytes", "ham_bytes"]:
+                ObjectStore.delete(k)
+
+
+class TestStepWorkerPool(BaseCliboaTest):
+    def test_reuse_pool(self):
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        pool = StepWorkerPool(2, ["json"])
+        try:
+            p = pool.get()
+            for _ in range(2):
+                step1 = SampleStep()
+                Helper.set_property(
+                    step1, "logger", LisboaLog.get_logger(step1.__class__.__name__)
+                )
+                step2 = SampleStep()
+                Helper.set_property(
+                    step2, "logger", LisboaLog.get_logger(step2.__class__.__name__)
+                )
+                MultiProcExecutor([step1, step2], pool).execute_steps(None)
+                assert pool.get() is p
+        finally:
+            pool.close()
+
+    def test_reuse_pool_object_store(self):
+        """
+        Workers of a reused pool see values which were put between parallel blocks
+        """
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        pool = StepWorkerPool(2)
+        ObjectStore.put("parent", "old")
+        try:
+            # the first parallel block starts the workers
+            put = PutSampleStep()
+            Helper.set_property(put, "logger", LisboaLog.get_logger(put.__class__.__name__))
+            Helper.set_property(put, "step", "spam")
+            MultiProcExecutor([put, SampleStep()], pool).execute_steps(None)
+
+            # a single step between the blocks
+            ObjectStore.put("parent", "new")
+
+            steps = []
+            for key in ["get1", "get2"]:
+                step = GetSampleStep()
+                Helper.set_property(step, "logger", LisboaLog.get_logger(key))
+                Helper.set_property(step, "step", key)
+                steps.append(step)
+            MultiProcExecutor(steps, pool).execute_steps(None)
+
+            for key in ["get1", "get2"]:
+                assert ObjectStore.get(key) == ["new", ["spam.csv"]]
+        finally:
+            pool.close()
+            for k in ["parent", "spam", "spam_bytes", "get1", "get2"]:
+                ObjectStore.delete(k)
+
+    def test_reuse_pool_error_stop(self):
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        pool = StepWorkerPool(2)
+        try:
+            step1 = SampleStep()
+            Helper.set_property(
+                step1, "logger", LisboaLog.get_logger(step1.__class__.__name__)
+            )
+            step2 = ErrorSampleStep()
+            Helper.set_property(
+                step2, "logger", LisboaLog.get_logger(step2.__class__.__name__)
+            )
+            with pytest.raises(StepExecutionFailed):
+                MultiProcExecutor([step1, step2], pool).execute_steps(None)
+        finally:
+            pool.close()
+
+
+class TestMultiThreadExecutor(BaseCliboaTest):
+    def _create_steps(self, step2):
+        step1 = SampleStep()
+        Helper.set_property(
+            step1, "logger", LisboaLog.get_logger(step1.__class__.__name__)
+        )
+        Helper.set_property(
+            step2, "logger", LisboaLog.get_logger(step2.__class__.__name__)
+        )
+        return [step1, step2]
+
+    def test_execute_steps_ok(self):
+        q = StepQueue()
+        setattr(ScenarioQueue, "step_queue", q)
+
+        executor = MultiThreadExecutor(self._create_steps(SampleStep()))
+        executor.execute_steps(None)
+
+    def test_execute_steps_error_stop(self):
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        executor = MultiThreadExecutor(self._create_steps(ErrorSampleStep()))
+        with pytest.raises(StepExecutionFailed):
+            executor.execute_steps(None)
+
+    def test_execute_steps_error_continue(self):
+        q = StepQueue()
+        q.force_continue = True
+        setattr(ScenarioQueue, "step_queue", q)
+
+        executor = MultiThreadExecutor(self._create_steps(ErrorSampleStep()))
+        executor.execute_steps(None)
+
+
+class TestDagExecutor(BaseCliboaTest):
+    def _create_dag(self, step2):
+        step1 = SampleStep()
+        Helper.set_property(
+            step1, "logger", LisboaLog.get_logger(step1.__class__.__name__)
+        )
+        Helper.set_property(
+            step2, "logger", LisboaLog.get_logger(step2.__class__.__name__)
+        )
+        step3 = SampleStep()
+        Helper.set_property(
+            step3, "logger", LisboaLog.get_logger(step3.__class__.__name__)
+        )
+        dag = StepDag()
+        dag.push([step1], ["step1"], [[]])
+        dag.push([step2], ["step2"], [[]])
+        dag.push([step3], ["step3"], ["step2"])
+        dag.build()
+        return dag
+
+    def test_execute_steps_ok(self):
+        q = StepQueue()
+        setattr(ScenarioQueue, "step_queue", q)
+
+        dag = self._create_dag(SampleStep())
+        DagExecutor(dag).execute_steps(None)
+        assert dag.is_done() is True
+        assert dag.ready() == []
+
+    def test_execute_steps_error_stop(self):
+        q = StepQueue()
+        q.force_continue = False
+        setattr(ScenarioQueue, "step_queue", q)
+
+        dag = self._create_dag(ErrorSampleStep())
+        with pytest.raises(CliboaException) as excinfo:
+            DagExecutor(dag).execute_steps(None)
+        assert "Something wrong" in str(excinfo.value)
+        assert dag.is_done() is True
+
+    def test_execute_steps_error_continue(self):
+        q = StepQueue()
+        q.force_continue = True
+        setattr(ScenarioQueue, "step_queue", q)
+
+        dag = self._create_dag(ErrorSampleStep())
+        DagExecutor(dag).execute_steps(None)
+        assert dag.is_done() is True
+
 
 class ErrorSampleStep(SampleStep):
     def __init__(self):
@@ -105,3 +301,20 @@ class ErrorSampleStep(SampleStep):
 
     def execute(self, *args):
         raise CliboaException("Something wrong")
+
+
+class GetSampleStep(SampleStep):
+    def __init__(self):
+        super().__init__()
+
+    def execute(self, *args):
+        ObjectStore.put(self._step, [ObjectStore.get("parent"), ObjectStore.get("spam")])
+
+
+class PutSampleStep(SampleStep):
+    def __init__(self):
+        super().__init__()
+
+    def execute(self, *args):
+        ObjectStore.put(self._step, ["%s.csv" % self._step])
+        ObjectStore.put(self._step + "_bytes", self._step.encode() * 1024)
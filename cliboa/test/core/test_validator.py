@@ -199,6 +199,57 @@ class TestValidators(object):
         valid_instance = EssentialKeys(test_yaml)
         valid_instance()
 
+    def test_essential_keys_ok_parallel_mode(self):
+        """
+        "parallel_mode" of a parallel block is either process or thread
+        """
+        test_yaml = [
+            {
+                "parallel_mode": "thread",
+                "parallel": [
+                    {
+                        "step": "test step 1",
+                        "class": "SampleClass",
+                    },
+                ],
+            }
+        ]
+        valid_instance = EssentialKeys(test_yaml)
+        valid_instance()
+
+    def test_essential_keys_ng_parallel_mode(self):
+        """
+        "parallel_mode" of a parallel block is either process or thread
+        """
+        test_yaml = [
+            {
+                "parallel_mode": "spam",
+                "parallel": [
+                    {
+                        "step": "test step 1",
+                        "class": "SampleClass",
+                    },
+                ],
+            }
+        ]
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            valid_instance = EssentialKeys(test_yaml)
+            valid_instance()
+        assert "'parallel_mode:' must be either process or thread" in str(excinfo.value)
+
+    def test_essential_keys_ng_with_vars_scope(self):
+        """
+        "with_vars_scope" is either scenario or step
+        """
+        test_yaml = [
+            {"with_vars_scope": "spam"},
+            {"step": "test step 1", "class": "SampleClass"},
+        ]
+        with pytest.raises(ScenarioFileInvalid) as excinfo:
+            valid_instance = EssentialKeys(test_yaml)
+            valid_instance()
+        assert "'with_vars_scope:' must be either scenario or step" in str(excinfo.value)
+
     def test_essential_keys_ok_3(self):
         """
         If block starts with "multi_process_count"
@@ -208,6 +259,99 @@ class TestValidators(object):
         valid_instance = EssentialKeys(test_yaml)
         valid_instance()
 
+    def test_essential_keys_ok_multi_process_count(self):
+        """
+        "multi_process_count" is a positive integer or auto, of the scenario or a parallel block
+        """
+        test_yaml = [
+            {"multi_process_count": "auto"},
+            {
+                "multi_process_count": 4,
+                "parallel": [
+                    {
+                        "step": "test step 1",
+                        "class": "SampleClass",
+                    },
+                ],
+            },
+        ]
+        valid_instance = EssentialKeys(test_yaml)
+        valid_instance()
+
+    def test_essential_keys_ng_multi_process_count(self):
+        """
+        "multi_process_count" is a positive integer or auto
+        """
+        for count in [0, "spam"]:
+            test_yaml = [
+                {
+                    "multi_process_count": count,
+                    "parallel": [
+                        {
+                            "step": "test step 1",
+                            "class": "SampleClass",
+                        },
+                    ],
+                },
+            ]
+            with pytest.raises(ScenarioFileInvalid) as excinfo:
+                valid_instance = EssentialKeys(test_yaml)
+                valid_instance()
+            assert "'multi_process_count:' must be a positive integer or auto" in str(
+                excinfo.value
+            )
+
+    def test_essential_keys_ng_depends_on(self):
+        """
+        Settings of a parallel block can not be used with "depends_on"
+        """
+        for key, value in [("parallel_mode", "thread"), ("multi_process_count", 4)]:
+            test_yaml = [
+                {"step": "test step 1", "class": "SampleClass", "depends_on": []},
+                {
+                    key: value,
+                    "parallel": [
+                        {
+                            "step": "test step 2",
+                            "class": "SampleClass",
+                        },
+                    ],
+                },
+            ]
+            with pytest.raises(ScenarioFileInvalid) as excinfo:
+                valid_instance = EssentialKeys(test_yaml)
+                valid_instance()
+            assert "'%s:' of a parallel block can not be used with 'depends_on'" % key in str(
+                excinfo.value
+            )
+
+        # a parallel block without the settings, and multi_process_count of the scenario
+        test_yaml = [
+            {"multi_process_count": 4},
+            {"step": "test step 1", "class": "SampleClass", "depends_on": []},
+            {
+                "parallel": [
+                    {
+                        "step": "test step 2",
+                        "class": "SampleClass",
+                    },
+                ],
+            },
+        ]
+        valid_instance = EssentialKeys(test_yaml)
+        valid_instance()
+
+    def test_essential_keys_ng_pipeline(self):
+        """
+        "pipeline" is a list of steps which requires both "step" and "class"
+        """
+        for pipeline in [[], [{"step": "test step 1"}]]:
+            test_yaml = [{"step": "test pipeline", "pipeline": pipeline}]
+            with pytest.raises(ScenarioFileInvalid) as excinfo:
+                valid_instance = EssentialKeys(test_yaml)
+                valid_instance()
+            assert "scenario.yml is invalid." in str(excinfo.value)
+
     def test_essential_keys_ng1(self):
         """
         Block requires both "step" and "class"
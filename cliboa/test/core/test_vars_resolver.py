@@ -0,0 +1,54 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import time
+from unittest.mock import patch
+
+from cliboa.core.vars_resolver import VariableResolver
+
+
+class TestVariableResolver(object):
+    def test_resolve(self):
+        resolver = VariableResolver()
+        assert resolver.resolve(1, "a", "x", "echo 'spam'") == "spam"
+        assert resolver.variables == {"a": {"x": "spam"}}
+
+    def test_resolve_once_in_scenario(self):
+        resolver = VariableResolver()
+        with patch.object(resolver, "_execute", return_value="spam") as execute:
+            resolver.resolve(1, "a", "x", "echo spam")
+            resolver.resolve(2, "b", "y", "echo spam")
+            assert execute.call_count == 1
+        assert resolver.variables == {"a": {"x": "spam"}, "b": {"y": "spam"}}
+
+    def test_resolve_once_in_step(self):
+        resolver = VariableResolver(VariableResolver.STEP)
+        with patch.object(resolver, "_execute", return_value="spam") as execute:
+            resolver.resolve(1, "a", "x", "echo spam")
+            resolver.resolve(1, "a", "y", "echo spam")
+            resolver.resolve(2, "b", "x", "echo spam")
+            assert execute.call_count == 2
+
+    def test_prefetch(self):
+        """
+        Distinct commands are executed concurrently
+        """
+        resolver = VariableResolver()
+        commands = [(i, "sleep 0.5; echo %s" % i) for i in range(4)]
+        start = time.time()
+        resolver.prefetch(commands + commands)
+        assert time.time() - start < 1.5
+
+        with patch.object(resolver, "_execute") as execute:
+            assert resolver.resolve(0, "a", "x", "sleep 0.5; echo 0") == "0"
+            execute.assert_not_called()
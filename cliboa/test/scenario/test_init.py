@@ -0,0 +1,56 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import subprocess
+import sys
+
+import pytest
+
+import cliboa.scenario
+from cliboa.scenario import STEP_CLASSES, get_step_class
+from cliboa.scenario.base import BaseStep
+
+
+class TestStepClasses(object):
+    @pytest.mark.parametrize("cls_name", sorted(STEP_CLASSES.keys()))
+    def test_get_step_class(self, cls_name):
+        cls = get_step_class(cls_name)
+        assert cls.__name__ == cls_name
+        assert issubclass(cls, BaseStep)
+
+    def test_get_step_class_unknown(self):
+        assert get_step_class("SpamStep") is None
+
+    def test_module_attribute(self):
+        from cliboa.scenario import CsvConvert
+
+        assert CsvConvert is get_step_class("CsvConvert")
+        with pytest.raises(AttributeError):
+            cliboa.scenario.SpamStep
+
+    @pytest.mark.skipif(
+        sys.version_info < (3, 7), reason="step classes are imported eagerly before python 3.7"
+    )
+    def test_lazy_import(self):
+        """
+        Modules of step classes are not imported until they are used
+        """
+        code = (
+            "import sys; import cliboa.core.worker;"
+            "assert 'pandas' not in sys.modules;"
+            "assert 'cliboa.scenario.transform.csv' not in sys.modules;"
+            "from cliboa.scenario import SftpDownload;"
+            "assert 'cliboa.scenario.extract.sftp' in sys.modules;"
+            "assert 'cliboa.scenario.extract.gcp' not in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
@@ -12,6 +12,7 @@
 # all copies or substantial portions of the Software.
 #
 import csv
+import importlib.util
 import jsonlines
 import os
 import shutil
@@ -32,9 +33,15 @@ from cliboa.scenario.transform.csv import (
     CsvToJsonl,
 )
 from cliboa.test import BaseCliboaTest
-from cliboa.util.exception import InvalidCount, InvalidParameter
+from cliboa.util.exception import InvalidCount, InvalidFormat, InvalidParameter
 from cliboa.util.helper import Helper
 from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.result_cache import StepResultCache
+
+
+def _installed(*engines):
+    # pyarrow is an optional extra
+    return [e for e in engines if e != "pyarrow" or importlib.util.find_spec("pyarrow")]
 
 
 class TestCsvTransform(BaseCliboaTest):
@@ -79,6 +86,65 @@ class TestCsvColumnExtract(TestCsvTransform):
                 assert r["key"] == test_csv_data[1][0]
         assert rows == len(test_csv_data)
 
+    def test_execute_ok_with_engine(self):
+        for engine in _installed("pandas", "pyarrow"):
+            for param, value in [("columns", ["data", "key"]), ("column_numbers", "2,1")]:
+                test_csv = self._create_csv([["key", "data", "memo"], ["1", "spam", "A"]])
+
+                instance = CsvColumnExtract()
+                Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+                Helper.set_property(instance, "src_dir", self._data_dir)
+                Helper.set_property(instance, "src_pattern", r"test\.csv")
+                Helper.set_property(instance, param, value)
+                Helper.set_property(instance, "engine", engine)
+                instance.execute()
+
+                with open(test_csv) as t:
+                    rows = list(csv.reader(t))
+                if param == "columns":
+                    assert rows == [["data", "key"], ["spam", "1"]]
+                else:
+                    assert rows == [["key", "data"], ["1", "spam"]]
+
+    def test_execute_ok_with_column_sets(self):
+        self._create_csv([["key", "data", "memo"], ["1", "spam", "A"]])
+
+        instance = CsvColumnExtract()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(
+            instance,
+            "column_sets",
+            [
+                {"suffix": "_a", "columns": ["memo", "key"]},
+                {"suffix": "_b", "column_numbers": "2,1"},
+            ],
+        )
+        instance.execute()
+
+        with open(os.path.join(self._result_dir, "test_a.csv")) as t:
+            assert list(csv.reader(t)) == [["memo", "key"], ["A", "1"]]
+        with open(os.path.join(self._result_dir, "test_b.csv")) as t:
+            assert list(csv.reader(t)) == [["key", "data"], ["1", "spam"]]
+        assert not os.path.exists(os.path.join(self._result_dir, "test.csv"))
+
+    def test_execute_ng_with_column_sets(self):
+        self._create_csv([["key", "data"], ["1", "spam"]])
+        for column_sets in [
+            [{"columns": ["key"]}],
+            [{"suffix": "_a", "columns": ["key"], "column_numbers": "1"}],
+            [{"suffix": "_a", "columns": ["key"]}, {"suffix": "_a", "columns": ["data"]}],
+        ]:
+            instance = CsvColumnExtract()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", r"test\.csv")
+            Helper.set_property(instance, "column_sets", column_sets)
+            with pytest.raises(InvalidParameter):
+                instance.execute()
+
     def test_execute_ok_with_remain_column_numbers(self):
         # create test csv
         test_csv_data = [["1", "spam"], ["2", "spam"]]
@@ -297,6 +363,27 @@ class TestCsvColumnConcat(TestCsvTransform):
             instance.execute()
         assert "'test'" == str(e.value)
 
+    def test_execute_ok_chunks(self):
+        test_csv_data = [["key", "data", "memo"]] + [[str(i), "spam", ""] for i in range(5)]
+        self._create_csv(test_csv_data)
+
+        for k, v in [("chunk_rows", 2), ("memory_budget_mb", 1)]:
+            instance = CsvColumnConcat()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", "test.csv")
+            Helper.set_property(instance, "dest_dir", self._result_dir)
+            Helper.set_property(instance, "columns", ["key", "data"])
+            Helper.set_property(instance, "dest_column_name", "key_data")
+            Helper.set_property(instance, k, v)
+            instance.execute()
+
+            with open(os.path.join(self._result_dir, "test.csv")) as o:
+                assert list(csv.reader(o)) == [["memo", "key_data"]] + [
+                    ["", "%sspam" % i] for i in range(5)
+                ]
+            os.remove(os.path.join(self._result_dir, "test.csv"))
+
 
 class TestColumnLengthAdjust(TestCsvTransform):
     # TODO Old version test.
@@ -359,6 +446,21 @@ class TestColumnLengthAdjust(TestCsvTransform):
                     assert "12345" == row.get("data")
             assert rows == len(test_csv_data)
 
+    def test_ok_blank_and_short_rows(self):
+        src = os.path.join(self._data_dir, "test.csv")
+        with open(src, mode="w", encoding="utf-8", newline="") as f:
+            f.write("k,v\n1,abcdef\n\n2,ghijkl\n3\n")
+
+        instance = ColumnLengthAdjust()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "adjust", {"v": 3})
+        instance.execute()
+        with open(src, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows == [["k", "v"], ["1", "abc"], ["2", "ghi"], ["3", ""]]
+
 
 class TestCsvHeaderConvert(TestCsvTransform):
     # TODO Old version test.
@@ -765,6 +867,72 @@ class TestCsvMerge(TestCsvTransform):
             instance.execute()
         assert "must be only one" in str(execinfo.value)
 
+    def _merge(self, **kwargs):
+        instance = CsvMerge()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src1_pattern", r"test1\.csv")
+        Helper.set_property(instance, "src2_pattern", r"test2\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(instance, "dest_name", "test.csv")
+        for k, v in kwargs.items():
+            Helper.set_property(instance, k, v)
+        instance.execute()
+        with open(os.path.join(self._result_dir, "test.csv"), encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_execute_ok_how(self):
+        self._create_csv([["id", "name"], ["1", "one"], ["2", "two"]], fname="test1.csv")
+        self._create_csv([["id", "memo"], ["2", "B"], ["3", "C"], ["2", "b"]], fname="test2.csv")
+
+        assert self._merge() == [["id", "name", "memo"], ["2", "two", "B"], ["2", "two", "b"]]
+        assert self._merge(on="id", how="left") == [
+            ["id", "name", "memo"],
+            ["1", "one", ""],
+            ["2", "two", "B"],
+            ["2", "two", "b"],
+        ]
+        assert self._merge(on=["id"], how="right") == [
+            ["id", "name", "memo"],
+            ["2", "two", "B"],
+            ["3", "", "C"],
+            ["2", "two", "b"],
+        ]
+        assert self._merge(how="outer") == [
+            ["id", "name", "memo"],
+            ["1", "one", ""],
+            ["2", "two", "B"],
+            ["2", "two", "b"],
+            ["3", "", "C"],
+        ]
+        assert self._merge(how="anti") == [["id", "name"], ["1", "one"]]
+
+    def test_execute_ok_left_on_right_on(self):
+        self._create_csv([["id", "name"], ["1", "one"], ["2", "two"]], fname="test1.csv")
+        self._create_csv([["no", "name"], ["2", "TWO"]], fname="test2.csv")
+
+        assert self._merge(left_on="id", right_on="no") == [
+            ["id", "name_x", "no", "name_y"],
+            ["2", "two", "2", "TWO"],
+        ]
+
+    def test_execute_ng_keys(self):
+        self._create_csv([["id", "name"], ["1", "one"]], fname="test1.csv")
+        self._create_csv([["no", "memo"], ["1", "A"]], fname="test2.csv")
+
+        with pytest.raises(InvalidParameter) as execinfo:
+            self._merge()
+        assert "No common columns" in str(execinfo.value)
+        with pytest.raises(InvalidParameter) as execinfo:
+            self._merge(on="id")
+        assert "does not exist" in str(execinfo.value)
+        with pytest.raises(InvalidParameter) as execinfo:
+            self._merge(left_on="id")
+        assert "Both 'left_on' and 'right_on'" in str(execinfo.value)
+        with pytest.raises(InvalidParameter) as execinfo:
+            self._merge(on="id", how="cross")
+        assert "'how' must be one of" in str(execinfo.value)
+
 
 class TestCsvConcat(TestCsvTransform):
     # TODO Old version test.
@@ -1006,6 +1174,66 @@ class TestCsvConcat(TestCsvTransform):
             execinfo.value
         )
 
+    def test_execute_ok_without_newline(self):
+        with open(os.path.join(self._data_dir, "test1.csv"), "w") as f:
+            f.write("key,data\r\nc1,spam")
+        with open(os.path.join(self._data_dir, "test2.csv"), "w") as f:
+            f.write("key,data")
+        with open(os.path.join(self._data_dir, "test3.csv"), "w") as f:
+            f.write('key,data\r\nc2,"sp\r\nam"\r\n')
+        open(os.path.join(self._data_dir, "test4.csv"), "w").close()
+
+        instance = CsvConcat()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test.*\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(instance, "dest_name", "test.csv")
+        instance.execute()
+
+        with open(os.path.join(self._result_dir, "test.csv"), "rb") as f:
+            assert f.read() == b'key,data\r\nc1,spam\r\nc2,"sp\r\nam"\r\n'
+
+    def test_execute_ok_different_headers(self):
+        self._create_csv([["key", "data"], ["c1", "spam"]], fname="test1.csv")
+        self._create_csv([["data", "memo"], ["spam", "A"]], fname="test2.csv")
+
+        instance = CsvConcat()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_filenames", ["test1.csv", "test2.csv"])
+        Helper.set_property(instance, "dest_dir", self._data_dir)
+        Helper.set_property(instance, "dest_name", "test1.csv")
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test1.csv")) as t:
+            assert list(csv.reader(t)) == [
+                ["key", "data", "memo"],
+                ["c1", "spam", ""],
+                ["", "spam", "A"],
+            ]
+
+    def test_execute_ok_different_headers_with_engine(self):
+        for engine in _installed("pandas", "pyarrow"):
+            self._create_csv([["key", "data"], ["c1", "spam"]], fname="test1.csv")
+            self._create_csv([["data", "memo"], ["spam", "A"]], fname="test2.csv")
+
+            instance = CsvConcat()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_filenames", ["test1.csv", "test2.csv"])
+            Helper.set_property(instance, "dest_dir", self._data_dir)
+            Helper.set_property(instance, "dest_name", "test.csv")
+            Helper.set_property(instance, "engine", engine)
+            instance.execute()
+
+            with open(os.path.join(self._data_dir, "test.csv")) as t:
+                assert list(csv.reader(t)) == [
+                    ["key", "data", "memo"],
+                    ["c1", "spam", ""],
+                    ["", "spam", "A"],
+                ]
+
 
 class TestCsvConvert(TestCsvTransform):
     def test_convert_header(self):
@@ -1058,6 +1286,69 @@ class TestCsvConvert(TestCsvTransform):
                 line = t.readline()
                 idx += 1
 
+    def test_convert_with_max_workers(self):
+        for mode in ["process", "thread"]:
+            for i in range(3):
+                self._create_csv([["key", "data"], [str(i), "spam"]], fname="test%s.csv" % i)
+
+            instance = CsvConvert()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", r"test.*\.csv")
+            Helper.set_property(instance, "after_format", "tsv")
+            Helper.set_property(instance, "max_workers", 2)
+            Helper.set_property(instance, "worker_mode", mode)
+            instance.execute()
+
+            for i in range(3):
+                with open(os.path.join(self._data_dir, "test%s.tsv" % i), "r") as t:
+                    assert t.read() == "key\tdata\n%s\tspam\n" % i
+                os.remove(os.path.join(self._data_dir, "test%s.tsv" % i))
+
+    def test_convert_with_engine(self):
+        for engine in _installed("stdlib", "pandas", "pyarrow"):
+            self._create_csv([["key", "data"], ["1", "spam"], ["2", ""]])
+
+            instance = CsvConvert()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", r"test\.csv")
+            Helper.set_property(instance, "headers", [{"key": "new_key"}])
+            Helper.set_property(instance, "quote", "QUOTE_ALL")
+            Helper.set_property(instance, "after_format", "tsv")
+            Helper.set_property(instance, "engine", engine)
+            instance.execute()
+
+            with open(os.path.join(self._data_dir, "test.tsv"), "r", newline="") as t:
+                assert t.read() == '"new_key"\t"data"\n"1"\t"spam"\n"2"\t""\n'
+
+    def test_convert_with_split_workers(self):
+        data = [["key", "data"]] + [[str(i), "spam" * 10] for i in range(50000)]
+        self._create_csv(data)
+
+        instance = CsvConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "after_format", "tsv")
+        Helper.set_property(instance, "split_workers", 2)
+        Helper.set_property(instance, "split_size_mb", 1)
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test.tsv")) as t:
+            assert list(csv.reader(t, delimiter="\t")) == data
+
+    def test_convert_ng_engine(self):
+        self._create_csv([["key", "data"], ["1", "spam"]])
+
+        instance = CsvConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "engine", "polars")
+        with pytest.raises(InvalidParameter):
+            instance.execute()
+
     def test_add_header(self):
         # create test file
         csv_list = [["key", "data"], ["1", "spam"], ["2", "spam"], ["3", "spam"]]
@@ -1115,6 +1406,40 @@ class TestCsvConvert(TestCsvTransform):
             line = next(reader)
         assert line == ["1", "spam"]
 
+    def test_convert_with_cache(self):
+        # create test file
+        csv_list = [["key", "data"], ["1", "spam"]]
+        test_csv = self._create_csv(csv_list)
+        output_file = os.path.join(self._result_dir, "test.tsv")
+
+        def convert():
+            instance = CsvConvert()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", r"test\.csv")
+            Helper.set_property(instance, "dest_dir", self._result_dir)
+            Helper.set_property(instance, "after_format", "tsv")
+            Helper.set_property(instance, "cache", True)
+            instance.execute()
+
+        try:
+            convert()
+            mtime = os.stat(output_file).st_mtime_ns
+
+            # not transformed again
+            convert()
+            assert mtime == os.stat(output_file).st_mtime_ns
+
+            # transformed again since the input file is changed
+            csv_list.append(["2", "spam"])
+            self._create_csv(csv_list)
+            convert()
+            with open(output_file, "r") as o:
+                assert len(o.readlines()) == 3
+            assert os.path.exists(test_csv)
+        finally:
+            os.remove(os.path.join(env.BASE_DIR, StepResultCache.FILE_NAME))
+
 
 class TestCsvSort(TestCsvTransform):
     def test_sort(self):
@@ -1149,6 +1474,38 @@ class TestCsvSort(TestCsvTransform):
                     record_count += 1
                 assert record_count == 4
 
+    def test_sort_into_input_file(self):
+        self._create_csv([["key", "data"], ["2", "B"], ["1", "A"]], fname="test1.csv")
+        self._create_csv([["key", "data"], ["3", "C"]], fname="test2.csv")
+
+        instance = CsvSort()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test.*\.csv")
+        Helper.set_property(instance, "dest_dir", self._data_dir)
+        Helper.set_property(instance, "dest_name", "test1.csv")
+        Helper.set_property(instance, "order", ["key"])
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test1.csv"), newline="") as f:
+            assert list(csv.reader(f)) == [["key", "data"], ["1", "A"], ["2", "B"], ["3", "C"]]
+        assert not glob(os.path.join(self._data_dir, ".*.tmp"))
+
+    def test_sort_blank_and_short_rows(self):
+        with open(os.path.join(self._data_dir, "test.csv"), "w", newline="") as f:
+            f.write("key,data\n2,B\n\n1\n")
+
+        instance = CsvSort()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(instance, "order", ["data"])
+        instance.execute()
+
+        with open(os.path.join(self._result_dir, "test.csv"), newline="") as f:
+            assert list(csv.reader(f)) == [["key", "data"], ["1", ""], ["2", "B"]]
+
     def test_sort_no_duplicate(self):
         # create test file
         csv_list = [["key", "data"], ["1", "A"], ["3", "C"], ["2", "B"], ["3", "C"]]
@@ -1182,6 +1539,71 @@ class TestCsvSort(TestCsvTransform):
                     record_count += 1
                 assert record_count == 3
 
+    def test_sort_typed_keys(self):
+        csv_list = [
+            ["key", "date", "data"],
+            ["10", "2021/01/02", "A"],
+            ["9", "2021/01/10", "B"],
+            ["10", "2021/01/10", "C"],
+        ]
+        self._create_csv(csv_list, fname="test.csv")
+
+        instance = CsvSort()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(
+            instance,
+            "order",
+            [
+                {"column": "date", "type": "date", "format": "%Y/%m/%d", "order": "desc"},
+                {"column": "key", "type": "number"},
+            ],
+        )
+        instance.execute()
+
+        with open(os.path.join(self._result_dir, "test.csv"), encoding="utf-8") as f:
+            assert [r["data"] for r in csv.DictReader(f)] == ["B", "C", "A"]
+
+    def test_sort_into_one_file(self):
+        self._create_csv([["key", "data"], ["3", "C"], ["1", "A"]], fname="test1.csv")
+        self._create_csv([["key", "data"], ["4", "D"], ["2", "B"]], fname="test2.csv")
+
+        instance = CsvSort()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test.*\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(instance, "dest_name", "sorted.csv")
+        Helper.set_property(instance, "order", ["key desc"])
+        instance.execute()
+
+        assert os.listdir(self._result_dir) == ["sorted.csv"]
+        with open(os.path.join(self._result_dir, "sorted.csv"), encoding="utf-8") as f:
+            assert [r["data"] for r in csv.DictReader(f)] == ["D", "C", "B", "A"]
+
+    def test_sort_ng_header(self):
+        self._create_csv([["key", "data"], ["1", "A"]], fname="test1.csv")
+        self._create_csv([["id", "data"], ["2", "B"]], fname="test2.csv")
+
+        instance = CsvSort()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test.*\.csv")
+        Helper.set_property(instance, "dest_dir", self._result_dir)
+        Helper.set_property(instance, "dest_name", "sorted.csv")
+        Helper.set_property(instance, "order", ["key"])
+        with pytest.raises(InvalidFormat) as execinfo:
+            instance.execute()
+        assert "Header of" in str(execinfo.value)
+
+        Helper.set_property(instance, "src_pattern", r"test1\.csv")
+        Helper.set_property(instance, "order", ["name"])
+        with pytest.raises(InvalidParameter) as execinfo:
+            instance.execute()
+        assert "does not exist in the header" in str(execinfo.value)
+
 
 class TestCsvToJsonl(TestCsvTransform):
     def test_convert(self):
@@ -22,6 +22,7 @@ import xlsxwriter
 import zipfile
 
 from glob import glob
+from unittest.mock import patch
 from cliboa.conf import env
 from cliboa.scenario.transform.file import (
     DateFormatConvert,
@@ -509,6 +510,22 @@ class TestDateFormatConvert(TestFileTransform):
                 assert "2021-01-01 12:00" == row.get("date")
         assert rows == len(obj)
 
+    def test_convert_ok_blank_and_short_rows(self):
+        src = os.path.join(self._data_dir, "test.csv")
+        with open(src, mode="w", encoding="utf-8", newline="") as f:
+            f.write("k,date\n1,2021-01-02\n\n2\n")
+
+        instance = DateFormatConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.csv")
+        Helper.set_property(instance, "columns", ["date"])
+        Helper.set_property(instance, "formatter", "%Y/%m/%d")
+        instance.execute()
+        with open(src, mode="r", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows == [["k", "date"], ["1", "2021/01/02"], ["2", ""]]
+
 
 class TestExcelConvert(TestFileTransform):
     # TODO Old version test.
@@ -583,6 +600,65 @@ class TestExcelConvert(TestFileTransform):
         exists_csv = glob(os.path.join(self._data_dir, "test.csv"))
         assert "test.csv" in exists_csv[0]
 
+    def test_convert_ok_chunks(self):
+        pytest.importorskip("openpyxl")
+        excel_file = os.path.join(self._data_dir, "test.xlsx")
+        workbook = xlsxwriter.Workbook(excel_file)
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, ["key", "data"])
+        for i in range(5):
+            sheet.write_row(i + 1, 0, [i, "spam"])
+        workbook.close()
+
+        instance = ExcelConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.xlsx")
+        Helper.set_property(instance, "dest_dir", self._out_dir)
+        Helper.set_property(instance, "chunk_rows", 2)
+        instance.execute()
+
+        with open(os.path.join(self._out_dir, "test.csv")) as f:
+            assert f.read() == ",key,data\n" + "".join("%s,%s,spam\n" % (i, i) for i in range(5))
+
+    def test_convert_ok_chunks_mixed_types(self):
+        pytest.importorskip("openpyxl")
+        excel_file = os.path.join(self._data_dir, "test.xlsx")
+        workbook = xlsxwriter.Workbook(excel_file)
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, ["key", "data"])
+        for i, v in enumerate([0, 1.5, 2, 3]):
+            sheet.write_row(i + 1, 0, [i, v])
+        workbook.close()
+
+        instance = ExcelConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.xlsx")
+        Helper.set_property(instance, "dest_dir", self._out_dir)
+        Helper.set_property(instance, "chunk_rows", 2)
+        instance.execute()
+
+        # the same in every chunk
+        with open(os.path.join(self._out_dir, "test.csv")) as f:
+            assert f.read() == ",key,data\n0,0,0\n1,1,1.5\n2,2,2\n3,3,3\n"
+
+    def test_convert_ng_chunks_without_openpyxl(self):
+        excel_file = os.path.join(self._data_dir, "test.xlsx")
+        workbook = xlsxwriter.Workbook(excel_file)
+        workbook.add_worksheet().write_row(0, 0, ["key", "data"])
+        workbook.close()
+
+        instance = ExcelConvert()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.xlsx")
+        Helper.set_property(instance, "dest_dir", self._out_dir)
+        Helper.set_property(instance, "chunk_rows", 2)
+        with patch("importlib.util.find_spec", return_value=None):
+            with pytest.raises(InvalidParameter):
+                instance.execute()
+
 
 class TestFileDivide(TestFileTransform):
     # TODO Old version test.
@@ -724,6 +800,40 @@ class TestFileDivide(TestFileTransform):
                     else:
                         break
 
+    def test_execute_ok_csv_index(self):
+        rows = [["id", "memo"]]
+        rows += [[str(i), "line1\nline2" if i % 3 == 0 else "x"] for i in range(25)]
+        with open(os.path.join(self._data_dir, "test.csv"), "w", newline="") as f:
+            csv.writer(f).writerows(rows)
+
+        for header in [True, False]:
+            instance = FileDivide()
+            Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+            Helper.set_property(instance, "src_dir", self._data_dir)
+            Helper.set_property(instance, "src_pattern", r"test\.csv")
+            Helper.set_property(instance, "dest_dir", self._out_dir)
+            Helper.set_property(instance, "divide_rows", 10)
+            Helper.set_property(instance, "header", header)
+            Helper.set_property(instance, "csv_index", True)
+            instance.execute()
+
+            assert os.path.exists(os.path.join(self._data_dir, ".test.csv.idx"))
+            divided = []
+            for i in range(1, 4):
+                with open(os.path.join(self._out_dir, "test.%s.csv" % i), newline="") as f:
+                    divided.append(list(csv.reader(f)))
+            assert not os.path.exists(os.path.join(self._out_dir, "test.4.csv"))
+            if header:
+                assert divided == [
+                    rows[:1] + rows[1:11],
+                    rows[:1] + rows[11:21],
+                    rows[:1] + rows[21:],
+                ]
+            else:
+                assert divided == [rows[:10], rows[10:20], rows[20:]]
+            shutil.rmtree(self._out_dir)
+            os.makedirs(self._out_dir)
+
 
 class TestFileRename(TestFileTransform):
     def test_execute_ok(self):
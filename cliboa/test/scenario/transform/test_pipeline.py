@@ -0,0 +1,111 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import csv
+import gzip
+import os
+import shutil
+
+import pytest
+
+from cliboa.conf import env
+from cliboa.scenario.transform.csv import CsvColumnExtract, CsvConvert
+from cliboa.scenario.transform.file import DateFormatConvert, FileDecompress
+from cliboa.scenario.transform.pipeline import StepPipeline
+from cliboa.test import BaseCliboaTest
+from cliboa.util.exception import ScenarioFileInvalid
+from cliboa.util.helper import Helper
+from cliboa.util.lisboa_log import LisboaLog
+
+
+class TestStepPipeline(BaseCliboaTest):
+    def setUp(self):
+        self._data_dir = os.path.join(env.BASE_DIR, "data")
+        self._out_dir = os.path.join(env.BASE_DIR, "data", "out")
+        os.makedirs(self._data_dir, exist_ok=True)
+        os.makedirs(self._out_dir, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self._data_dir, ignore_errors=True)
+
+    def _step(self, cls, **arguments):
+        instance = cls()
+        Helper.set_property(instance, "logger", LisboaLog.get_logger(__name__))
+        for k, v in arguments.items():
+            Helper.set_property(instance, k, v)
+        return instance
+
+    def _pipeline(self, steps):
+        instance = self._step(StepPipeline)
+        Helper.set_property(instance, "steps", steps)
+        return instance
+
+    def _steps(self, **convert_args):
+        return [
+            self._step(CsvConvert, **convert_args),
+            self._step(CsvColumnExtract, columns=["id", "date"]),
+            self._step(
+                DateFormatConvert,
+                columns=["date"],
+                formatter="%Y-%m-%d",
+                dest_dir=self._out_dir,
+            ),
+        ]
+
+    def test_execute(self):
+        src = os.path.join(self._data_dir, "test.tsv")
+        with open(src, mode="w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(["id", "name", "date"])
+            writer.writerow(["1", "spam", "2021/01/01"])
+            writer.writerow(["2", "ham", "2021/01/02"])
+
+        instance = self._pipeline(
+            self._steps(
+                src_dir=self._data_dir,
+                src_pattern=r"test\.tsv",
+                before_format="tsv",
+                after_format="csv",
+                headers=[{"date": "date"}],
+            )
+        )
+        instance.execute()
+
+        with open(os.path.join(self._out_dir, "test.csv"), encoding="utf-8", newline="") as f:
+            assert list(csv.reader(f)) == [
+                ["id", "date"],
+                ["1", "2021-01-01"],
+                ["2", "2021-01-02"],
+            ]
+        # no intermediate files
+        assert os.listdir(self._out_dir) == ["test.csv"]
+
+    def test_execute_decompress(self):
+        for name in ["test1.csv.gz", "test2.csv.gz"]:
+            with gzip.open(os.path.join(self._data_dir, name), "wt", encoding="utf-8") as f:
+                f.write("id,name,date\n1,spam,2021/01/01\n")
+
+        steps = [
+            self._step(FileDecompress, src_dir=self._data_dir, src_pattern=r"test.\.csv\.gz")
+        ] + self._steps()
+        instance = self._pipeline(steps)
+        instance.execute()
+
+        for name in ["test1.csv", "test2.csv"]:
+            with open(os.path.join(self._out_dir, name), encoding="utf-8", newline="") as f:
+                assert list(csv.reader(f)) == [["id", "date"], ["1", "2021-01-01"]]
+
+    def test_steps_ng(self):
+        with pytest.raises(ScenarioFileInvalid) as execinfo:
+            self._pipeline([self._step(CsvConvert), self._step(FileDecompress)])
+        assert "FileDecompress can not be used in 'pipeline:'" in str(execinfo.value)
@@ -37,6 +37,14 @@ class TestCommandArgumentParser(BaseCliboaTest):
         cmd_parser = CommandArgumentParser()
         cmd_args = cmd_parser.parse()
         assert cmd_args.project_name == "spam"
+        assert cmd_args.resume is False
+
+    def test_parse_resume(self):
+        sys.argv.append("--resume")
+        cmd_parser = CommandArgumentParser()
+        cmd_args = cmd_parser.parse()
+        sys.argv.remove("--resume")
+        assert cmd_args.resume is True
 
 
 class TestScenarioRunner(BaseCliboaTest):
@@ -12,23 +12,146 @@
 # all copies or substantial portions of the Software.
 #
 import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
 
-from cliboa.util.cache import StorageIO
+import pandas
+
+from cliboa.util import cache
+from cliboa.util.cache import ObjectStore, StorageIO
+from cliboa.util.config import CliboaConfig
 
 
 class TestStorageIO(object):
     def setup_method(self, method):
-        self.__tmp_valid_cache_file = "/tmp/cliboa_cache_" + str(os.getpid()) + ".tmp"
+        self.__tmp_legacy_cache_file = "/tmp/cliboa_cache_" + str(os.getpid()) + ".tmp"
         self.__tmp_invalid_cache_file = "/tmp/cliboa_cache.tmp"
-        if os.path.exists(self.__tmp_valid_cache_file):
-            os.remove(self.__tmp_valid_cache_file)
+        StorageIO().remove()
+
+    def teardown_method(self, method):
+        StorageIO().remove()
 
     def test_save_ok(self):
         s = StorageIO()
         s.save(["spam"])
-        assert os.path.exists(self.__tmp_valid_cache_file) is True
+        s.flush()
+        assert os.path.exists(s.cache_file) is True
+        assert s.cache_file.startswith("/tmp/cliboa_cache_" + str(os.getpid()) + "_")
+
+    def test_cache_file_before_save(self):
+        s = StorageIO()
+        assert os.path.exists(s.cache_file) is True
+        s.save({"id": 1})
+        assert list(StorageIO.read(s.cache_file)) == []
+        s.flush()
+        assert list(StorageIO.read(s.cache_file)) == [{"id": 1}]
 
     def test_save_ng(self):
         s = StorageIO()
         s.save("spam")
         assert os.path.exists(self.__tmp_invalid_cache_file) is False
+
+    def test_load(self):
+        s = StorageIO()
+        rows = [{"id": i, "name": "spam%s" % i, "value": None} for i in range(2500)]
+        for row in rows:
+            s.save(row)
+        # rows in the buffer are read as well
+        assert list(StorageIO().load()) == rows
+
+    def test_load_steps_in_order(self):
+        s1 = StorageIO()
+        s2 = StorageIO()
+        s1.save({"id": 1})
+        s2.save({"id": 2})
+        s1.save({"id": 3})
+        assert s1.cache_file != s2.cache_file
+        assert list(StorageIO()) == [{"id": 1}, {"id": 3}, {"id": 2}]
+
+    def test_load_legacy(self):
+        with open(self.__tmp_legacy_cache_file, "w", encoding="utf-8") as f:
+            f.write(str({"id": "1", "name": "spam"}) + "\n")
+            f.write(str({"id": "2", "name": "ham"}) + "\n")
+        assert list(StorageIO().load()) == [
+            {"id": "1", "name": "spam"},
+            {"id": "2", "name": "ham"},
+        ]
+
+    def test_remove(self):
+        s = StorageIO()
+        s.save({"id": 1})
+        s.flush()
+        with open(self.__tmp_legacy_cache_file, "w", encoding="utf-8") as f:
+            f.write(str({"id": 2}) + "\n")
+        StorageIO().remove()
+        assert os.path.exists(s.cache_file) is False
+        assert os.path.exists(self.__tmp_legacy_cache_file) is False
+        assert list(StorageIO().load()) == []
+
+
+class TestObjectStore(object):
+    def setup_method(self, method):
+        self._spill_dir = tempfile.mkdtemp()
+        self._conf = {
+            ("object_store", "max_memory_mb"): "1",
+            ("object_store", "spill_dir"): self._spill_dir,
+        }
+        self._patch = patch.object(
+            CliboaConfig, "get", side_effect=lambda s, o, fallback=None: self._conf.get((s, o))
+        )
+        self._patch.start()
+        # values of the other tests are not spilled
+        self._values = cache._PROCESS_STORE_CACHE.copy()
+        cache._PROCESS_STORE_CACHE.clear()
+
+    def teardown_method(self, method):
+        for k in list(cache._PROCESS_STORE_CACHE.keys()):
+            ObjectStore.delete(k)
+        cache._PROCESS_STORE_CACHE.update(self._values)
+        self._patch.stop()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def test_put_get(self):
+        ObjectStore.put("spam", ["a.csv", "b.csv"])
+        assert ObjectStore.get("spam") == ["a.csv", "b.csv"]
+        assert ObjectStore.get("unknown") is None
+        assert cache._PROCESS_STORE_CACHE["spam"].spilled() is False
+
+    def test_spill_least_recently_used(self):
+        ObjectStore.put("spam", b"s" * 400 * 1024)
+        ObjectStore.put("ham", b"h" * 400 * 1024)
+        ObjectStore.get("spam")
+        # ham is spilled, since spam was used recently
+        ObjectStore.put("egg", b"e" * 400 * 1024)
+        assert cache._PROCESS_STORE_CACHE["ham"].spilled() is True
+        assert cache._PROCESS_STORE_CACHE["spam"].spilled() is False
+        assert cache._PROCESS_STORE_CACHE["egg"].spilled() is False
+
+        assert ObjectStore.get("ham") == b"h" * 400 * 1024
+        assert ObjectStore.get("spam") == b"s" * 400 * 1024
+        assert ObjectStore.get("egg") == b"e" * 400 * 1024
+
+    def test_spill_dataframe(self):
+        df = pandas.DataFrame({"id": range(100000), "name": ["spam"] * 100000})
+        ObjectStore.put("df", df)
+        # larger than max_memory_mb
+        assert cache._PROCESS_STORE_CACHE["df"].spilled() is True
+        pandas.testing.assert_frame_equal(ObjectStore.get("df"), df)
+
+    def test_delete(self):
+        ObjectStore.put("spam", b"s" * 2 * 1024 * 1024)
+        spill_file = cache._PROCESS_STORE_CACHE["spam"].path
+        assert os.path.exists(spill_file) is True
+        ObjectStore.delete("spam")
+        assert ObjectStore.get("spam") is None
+        assert os.path.exists(spill_file) is False
+
+    def test_ttl(self):
+        ObjectStore.put("spam", "a.csv", ttl=1)
+        ObjectStore.put("ham", "b.csv")
+        assert ObjectStore.get("spam") == "a.csv"
+        with patch.object(time, "time", return_value=time.time() + 2):
+            assert ObjectStore.get("spam") is None
+            assert ObjectStore.get("ham") == "b.csv"
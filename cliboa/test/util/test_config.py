@@ -0,0 +1,42 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+
+from cliboa.conf import env
+from cliboa.test import BaseCliboaTest
+from cliboa.util.config import CliboaConfig
+
+
+class TestCliboaConfig(BaseCliboaTest):
+    def test_get(self):
+        assert "password" in CliboaConfig.get("logging", "mask")
+        assert CliboaConfig.get("spam", "spam") is None
+        assert CliboaConfig.get("spam", "spam", "ham") == "ham"
+
+    def test_getboolean(self):
+        assert CliboaConfig.getboolean("multi_process", "reuse_pool") is False
+        assert CliboaConfig.getboolean("spam", "spam", True) is True
+
+    def test_getlist(self):
+        assert CliboaConfig.getlist("multi_process", "preload_modules") == []
+        assert CliboaConfig.getlist("spam", "spam") == []
+
+    def test_parse_once(self):
+        path = os.path.join(env.BASE_DIR, "conf", "cliboa.ini")
+        assert CliboaConfig.get("spam", "spam") is None
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n[spam]\nspam=ham\n")
+        assert CliboaConfig.get("spam", "spam") is None
+        CliboaConfig.reset()
+        assert CliboaConfig.get("spam", "spam") == "ham"
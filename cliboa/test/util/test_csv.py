@@ -12,11 +12,29 @@
 # all copies or substantial portions of the Software.
 #
 import csv
+import importlib.util
+import io
 import os
 import shutil
 
+import jsonlines
+import pytest
+
 from cliboa.conf import env
-from cliboa.util.csv import Csv
+from cliboa.util.csv import Csv, CsvEngine, CsvIndex
+from cliboa.util.exception import InvalidFormat, InvalidParameter
+
+# pyarrow is an optional extra
+ENGINES = [
+    "stdlib",
+    "pandas",
+    pytest.param(
+        "pyarrow",
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec("pyarrow") is None, reason="pyarrow is not installed"
+        ),
+    ),
+]
 
 
 class TestCsv(object):
@@ -104,3 +122,238 @@ class TestCsv(object):
             assert rows == len(test_csv_data)
         finally:
             shutil.rmtree(self._data_dir)
+
+    def test_extract_column_sets(self):
+        os.makedirs(self._data_dir, exist_ok=True)
+        test_csv = os.path.join(self._data_dir, "test.csv")
+        with open(test_csv, "w") as t:
+            csv.writer(t).writerows([["a", "b", "c"], ["1", "2", "3"], [], ["4"]])
+        try:
+            out1 = os.path.join(self._data_dir, "out1.csv")
+            out2 = os.path.join(self._data_dir, "out2.csv")
+            rows = Csv.extract_column_sets(
+                test_csv, [(out1, ["c", "a"], None), (out2, None, [3, 2, 9])]
+            )
+            assert rows == 3
+            with open(out1, "r") as o:
+                assert list(csv.reader(o)) == [["c", "a"], ["3", "1"], ["", "4"]]
+            with open(out2, "r") as o:
+                assert list(csv.reader(o)) == [["b", "c"], ["2", "3"], [], []]
+        finally:
+            shutil.rmtree(self._data_dir)
+
+    def test_extract_column_sets_ng_column(self):
+        os.makedirs(self._data_dir, exist_ok=True)
+        test_csv = os.path.join(self._data_dir, "test.csv")
+        with open(test_csv, "w") as t:
+            csv.writer(t).writerows([["a", "b"], ["1", "2"]])
+        try:
+            output_file = os.path.join(self._data_dir, "output.csv")
+            with pytest.raises(InvalidParameter):
+                Csv.extract_column_sets(test_csv, [(output_file, ["x"], None)])
+        finally:
+            shutil.rmtree(self._data_dir)
+
+    def test_projector(self):
+        project = Csv.projector([2, 0])
+        assert list(project(["a", "b", "c", "d"])) == ["c", "a"]
+        assert list(project(["a"])) == ["a"]
+        assert list(Csv.projector([2, 0], pad=True)(["a"])) == ["", "a"]
+        assert list(Csv.projector([1])(["a", "b"])) == ["b"]
+        assert list(Csv.projector([])(["a", "b"])) == []
+
+
+class TestCsvEngine(object):
+    def setup_method(self, method):
+        self._data_dir = os.path.join(env.BASE_DIR, "data")
+        os.makedirs(self._data_dir, exist_ok=True)
+
+    def teardown_method(self, method):
+        shutil.rmtree(self._data_dir, ignore_errors=True)
+
+    def _create_csv(self, data, fname="test.csv"):
+        path = os.path.join(self._data_dir, fname)
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerows(data)
+        return path
+
+    def _read_csv(self, path, **kwargs):
+        with open(path, "r", newline="") as f:
+            return list(csv.reader(f, **kwargs))
+
+    @pytest.mark.parametrize("name", ENGINES)
+    def test_convert(self, name):
+        src = self._create_csv([["a", "b", "c"], ["1", "x\ny", ""], ["2", "3", "4"]])
+        dest = os.path.join(self._data_dir, "output.tsv")
+        rows = CsvEngine.create(name).convert(
+            src,
+            dest,
+            dest_delimiter="\t",
+            lineterminator="\n",
+            columns=["c", "a"],
+            headers={"a": "A"},
+        )
+        assert rows == 2
+        assert self._read_csv(dest, delimiter="\t") == [["c", "A"], ["", "1"], ["4", "2"]]
+
+    @pytest.mark.parametrize("name", ENGINES)
+    def test_convert_column_indexes_without_header(self, name):
+        src = self._create_csv([["a", "b", "c"], ["1", "2", "3"]])
+        dest = os.path.join(self._data_dir, "output.csv")
+        rows = CsvEngine.create(name).convert(
+            src, dest, quoting=csv.QUOTE_ALL, columns=[2, 0, 5], header=False
+        )
+        assert rows == 1
+        with open(dest, "r", newline="") as f:
+            assert f.read() == '"3","1"\r\n'
+
+    @pytest.mark.parametrize("name", ENGINES)
+    def test_to_jsonl(self, name):
+        src = self._create_csv([["key", "data"], ["1", "spam"], ["2", ""]])
+        dest = os.path.join(self._data_dir, "output.jsonl")
+        assert CsvEngine.create(name).to_jsonl(src, dest) == 2
+        with jsonlines.open(dest) as reader:
+            assert list(reader) == [{"key": "1", "data": "spam"}, {"key": "2", "data": ""}]
+
+    @pytest.mark.parametrize("name", ENGINES)
+    def test_concat(self, name):
+        src1 = self._create_csv([["a", "b"], ["1", "2"]], "test1.csv")
+        src2 = self._create_csv([["b", "c"], ["3", "4"], ["5", "6"]], "test2.csv")
+        src3 = self._create_csv([], "test3.csv")
+        dest = os.path.join(self._data_dir, "output.csv")
+        assert CsvEngine.create(name).concat([src1, src2, src3], dest) == 3
+        assert self._read_csv(dest) == [
+            ["a", "b", "c"],
+            ["1", "2", ""],
+            ["", "3", "4"],
+            ["", "5", "6"],
+        ]
+
+    def _create_large_csv(self, fname="test.csv", multiline=False):
+        # about 3 MB, which is split into 3 ranges of 1 MB
+        data = [["id", "name", "memo"]]
+        for i in range(100000):
+            memo = 'say "hello"' if i % 7 == 0 else "x" * 10
+            if multiline and i % 9000 == 1:
+                memo = "line1\nline2"
+            data.append([str(i), "name%s" % i, memo])
+        return self._create_csv(data, fname)
+
+    def test_convert_parallel(self):
+        src = self._create_large_csv()
+        engine = CsvEngine.create("stdlib")
+        kwargs = {
+            "dest_delimiter": "\t",
+            "quoting": csv.QUOTE_ALL,
+            "lineterminator": "\n",
+            "columns": ["memo", "id"],
+            "headers": {"id": "ID"},
+        }
+        expected = os.path.join(self._data_dir, "expected.tsv")
+        assert engine.convert(src, expected, **kwargs) == 100000
+        for mode in ["process", "thread"]:
+            dest = os.path.join(self._data_dir, "output.tsv")
+            assert engine.convert_parallel(src, dest, 3, 1, mode, **kwargs) == 100000
+            with open(expected, "rb") as e, open(dest, "rb") as o:
+                assert e.read() == o.read()
+
+    def test_convert_parallel_multiline(self):
+        src = self._create_large_csv(multiline=True)
+        engine = CsvEngine.create("stdlib")
+        expected = os.path.join(self._data_dir, "expected.csv")
+        dest = os.path.join(self._data_dir, "output.csv")
+        engine.convert(src, expected, header=False)
+        # converted serially
+        assert engine.convert_parallel(src, dest, 3, 1, header=False) == 100000
+        with open(expected, "rb") as e, open(dest, "rb") as o:
+            assert e.read() == o.read()
+
+    def test_convert_parallel_with_index(self):
+        src = self._create_large_csv(multiline=True)
+        CsvIndex.build(src, interval=1000)
+        engine = CsvEngine.create("stdlib")
+        expected = os.path.join(self._data_dir, "expected.csv")
+        dest = os.path.join(self._data_dir, "output.csv")
+        engine.convert(src, expected)
+        assert engine.convert_parallel(src, dest, 3, 1, "thread") == 100000
+        with open(expected, "rb") as e, open(dest, "rb") as o:
+            assert e.read() == o.read()
+
+    def test_pyarrow_non_utf8(self):
+        pytest.importorskip("pyarrow")
+        src = self._create_csv([["key", "data"], ["1", "spam"]])
+        dest = os.path.join(self._data_dir, "output.csv")
+        CsvEngine.create("pyarrow").convert(src, dest, dest_encoding="cp932")
+        assert self._read_csv(dest) == [["key", "data"], ["1", "spam"]]
+
+    def test_pyarrow_ng_columns(self):
+        pytest.importorskip("pyarrow")
+        src = self._create_csv([["key", "data"], ["1"]])
+        dest = os.path.join(self._data_dir, "output.csv")
+        with pytest.raises(InvalidFormat):
+            CsvEngine.create("pyarrow").convert(src, dest)
+
+    def test_create_ng(self):
+        with pytest.raises(InvalidParameter):
+            CsvEngine.create("polars")
+
+    def test_create_ng_pyarrow_not_installed(self, monkeypatch):
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+        with pytest.raises(InvalidParameter):
+            CsvEngine.create("pyarrow")
+
+
+class TestCsvIndex(object):
+    def setup_method(self, method):
+        self._data_dir = os.path.join(env.BASE_DIR, "data")
+        os.makedirs(self._data_dir, exist_ok=True)
+        self._src = os.path.join(self._data_dir, "test.csv")
+        self._rows = [["id", "memo"]] + [
+            [str(i), "line1\r\nline2" if i % 4 == 0 else "x"] for i in range(100)
+        ]
+        with open(self._src, "w", newline="") as f:
+            csv.writer(f).writerows(self._rows)
+
+    def teardown_method(self, method):
+        shutil.rmtree(self._data_dir, ignore_errors=True)
+
+    def test_build(self):
+        index = CsvIndex.build(self._src, interval=7)
+        assert os.path.exists(os.path.join(self._data_dir, ".test.csv.idx"))
+        assert index.header == ["id", "memo"]
+        assert index.rows == 100
+        assert index.data_start == len(b"id,memo\r\n")
+
+        with open(self._src, "rb") as f:
+            data = f.read()
+        for row in [0, 1, 6, 7, 8, 50, 99]:
+            text = data[index.offset(row):].decode("utf-8")
+            assert next(csv.reader(io.StringIO(text, newline=""))) == self._rows[row + 1]
+        assert index.offset(100) == len(data)
+        with pytest.raises(InvalidParameter):
+            index.offset(101)
+
+    def test_load(self):
+        assert CsvIndex.load(self._src) is None
+        CsvIndex.build(self._src)
+        assert CsvIndex.load(self._src).rows == 100
+        assert CsvIndex.load(self._src, delimiter="\t") is None
+
+        # invalidated by changes of the file
+        with open(self._src, "a") as f:
+            f.write("100,x\r\n")
+        assert CsvIndex.load(self._src) is None
+        assert CsvIndex.get(self._src).rows == 101
+
+    def test_ranges(self):
+        index = CsvIndex.build(self._src, interval=10)
+        ranges = index.ranges(100)
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == os.path.getsize(self._src)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert start in [index.offset(r) for r in range(0, 100, 10)]
+
+    def test_build_ng_encoding(self):
+        with pytest.raises(InvalidParameter):
+            CsvIndex.build(self._src, encoding="utf-16")
@@ -77,3 +77,21 @@ class TestFile(object):
 
         # shutil.rmtree(self._data_dir)
         assert target_files == []
+
+    def test_append_file(self):
+        src = os.path.join(self._data_dir, "src.csv")
+        dest = os.path.join(self._data_dir, "dest.csv")
+        with open(src, "wb") as f:
+            f.write(b"key,data\n1,spam\n2,spam\n")
+
+        with open(dest, "wb") as o:
+            o.write(b"header\n")
+            assert File().append_file(src, o, offset=len(b"key,data\n")) == 14
+            o.write(b"3,spam\n")
+        with open(dest, "rb") as f:
+            assert f.read() == b"header\n1,spam\n2,spam\n3,spam\n"
+
+        with open(dest, "wb") as o:
+            assert File().append_file(src, o, offset=9, end=16) == 7
+        with open(dest, "rb") as f:
+            assert f.read() == b"1,spam\n"
@@ -0,0 +1,83 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import random
+from operator import itemgetter
+
+import pytest
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.join import ExternalJoin
+
+
+def _expected(left, right, how):
+    right_keys = {}
+    for r in right:
+        right_keys.setdefault(r[0], []).append(r)
+    left_keys = set(row[0] for row in left)
+    ret = []
+    for row in left:
+        if how == ExternalJoin.ANTI:
+            if row[0] not in right_keys:
+                ret.append((row, None))
+        elif row[0] in right_keys:
+            ret.extend((row, r) for r in right_keys[row[0]])
+        elif how in (ExternalJoin.LEFT, ExternalJoin.OUTER):
+            ret.append((row, None))
+    if how in (ExternalJoin.RIGHT, ExternalJoin.OUTER):
+        ret.extend((None, r) for r in right if r[0] not in left_keys)
+    return ret
+
+
+class TestExternalJoin(object):
+    def setup_method(self, method):
+        random.seed(1)
+        self._left = [[str(random.randint(0, 80)), "l%s" % i] for i in range(500)]
+        self._right = [[str(random.randint(20, 100)), "r%s" % i] for i in range(300)]
+
+    def _join(self, how, budget=None):
+        joiner = ExternalJoin(how)
+        if budget is not None:
+            joiner._budget = budget
+        return list(
+            joiner.join(
+                lambda: iter(self._left),
+                lambda: iter(self._right),
+                itemgetter(0),
+                itemgetter(0),
+            )
+        )
+
+    def test_join_in_memory(self):
+        """
+        Rows are joined in the order of the left side
+        """
+        for how in [ExternalJoin.INNER, ExternalJoin.LEFT, ExternalJoin.ANTI]:
+            assert self._join(how) == _expected(self._left, self._right, how)
+
+    def test_join_partitions(self):
+        for how in ExternalJoin.HOWS:
+            ret = self._join(how, budget=2000)
+            assert sorted(ret, key=str) == sorted(_expected(self._left, self._right, how), key=str)
+
+    def test_join_right(self):
+        """
+        Rows are joined in the order of the right side
+        """
+        expected = _expected(self._right, self._left, ExternalJoin.LEFT)
+        assert self._join(ExternalJoin.RIGHT) == [(left, right) for right, left in expected]
+
+    def test_invalid_how(self):
+        with pytest.raises(InvalidParameter) as execinfo:
+            ExternalJoin("cross")
+        assert "'how' must be one of" in str(execinfo.value)
@@ -0,0 +1,255 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import shutil
+import sqlite3
+from unittest.mock import patch
+
+from cliboa.conf import env
+from cliboa.core.listener import StepListener
+from cliboa.scenario.base import BaseStep
+from cliboa.test import BaseCliboaTest
+from cliboa.util.cache import ObjectStore
+from cliboa.util.config import CliboaConfig
+from cliboa.util.helper import Helper
+from cliboa.util.journal import RunJournal
+from cliboa.util.lisboa_log import LisboaLog
+
+
+class JournalSampleStep(BaseStep):
+    """
+    Put a value to ObjectStore, or fail
+    """
+
+    executed = []
+
+    def __init__(self):
+        super().__init__()
+        self._value = None
+        self._fail = False
+
+    def value(self, value):
+        self._value = value
+
+    def fail(self, fail):
+        self._fail = fail
+
+    def execute(self, *args):
+        JournalSampleStep.executed.append(self._step)
+        if self._fail:
+            raise Exception("Something wrong")
+        ObjectStore.put(self._step, self._value)
+
+
+class RecordListener(StepListener):
+    """
+    Record the listener methods called for each step
+    """
+
+    def __init__(self, calls):
+        super().__init__()
+        self._calls = calls
+
+    def before_step(self, *args, **kwargs):
+        self._calls.append((args[0]._step, "before_step"))
+
+    def after_step(self, *args, **kwargs):
+        self._calls.append((args[0]._step, "after_step"))
+
+    def error_step(self, *args, **kwargs):
+        self._calls.append((args[0]._step, "error_step"))
+
+    def after_completion(self, *args, **kwargs):
+        self._calls.append((args[0]._step, "after_completion"))
+
+    def skip_step(self, *args, **kwargs):
+        self._calls.append((args[0]._step, "skip_step"))
+
+
+class TestRunJournal(BaseCliboaTest):
+    def setUp(self):
+        self._pj_dir = os.path.join(env.PROJECT_DIR, "spam")
+        os.makedirs(self._pj_dir, exist_ok=True)
+        self._db = os.path.join(self._pj_dir, RunJournal.FILE_NAME)
+        JournalSampleStep.executed = []
+
+    def tearDown(self):
+        RunJournal.set(None)
+        shutil.rmtree(self._pj_dir, ignore_errors=True)
+
+    def _create_step(self, name, value, fail=False):
+        step = JournalSampleStep()
+        Helper.set_property(step, "logger", LisboaLog.get_logger(name))
+        Helper.set_property(step, "step", name)
+        Helper.set_property(step, "value", value)
+        Helper.set_property(step, "fail", fail)
+        return step
+
+    def _run(self, steps, resume=False):
+        journal = RunJournal.create("spam", resume=True)
+        journal.start_run(resume=resume)
+        RunJournal.set(journal)
+        succeeded = True
+        try:
+            for step in steps:
+                step.trigger()
+        except Exception:
+            succeeded = False
+        finally:
+            journal.finish_run(succeeded)
+            RunJournal.set(None)
+        return journal
+
+    def test_create(self):
+        # disabled by default
+        assert RunJournal.create("spam") is None
+        assert isinstance(RunJournal.create("spam", resume=True), RunJournal)
+        assert os.path.exists(self._db)
+        assert RunJournal.create("not_exist_project", resume=True) is None
+
+    def test_create_enabled(self):
+        with patch.object(CliboaConfig, "getboolean", return_value=True):
+            assert isinstance(RunJournal.create("spam"), RunJournal)
+
+    def test_record(self):
+        journal = self._run([self._create_step("one", [1]), self._create_step("two", [2])])
+
+        with sqlite3.connect(self._db) as con:
+            rows = con.execute(
+                "SELECT step, status, started_at, succeeded_at, completed_at FROM step"
+                " WHERE run_id = ? ORDER BY step",
+                (journal.run_id,),
+            ).fetchall()
+            status = con.execute(
+                "SELECT status FROM run WHERE run_id = ?", (journal.run_id,)
+            ).fetchone()[0]
+        assert status == RunJournal.SUCCEEDED
+        assert [r[0] for r in rows] == ["one", "two"]
+        for r in rows:
+            assert r[1] == RunJournal.SUCCEEDED
+            assert all(r[2:])
+
+    def test_resume(self):
+        first = self._run(
+            [
+                self._create_step("one", [1]),
+                self._create_step("two", [2], fail=True),
+                self._create_step("three", [3]),
+            ]
+        )
+        assert JournalSampleStep.executed == ["one", "two"]
+
+        ObjectStore.put("one", None)
+        JournalSampleStep.executed = []
+        second = self._run(
+            [
+                self._create_step("one", [1]),
+                self._create_step("two", [2]),
+                self._create_step("three", [3]),
+            ],
+            resume=True,
+        )
+        assert second.resumed_from == first.run_id
+        assert JournalSampleStep.executed == ["two", "three"]
+        # values put by the skipped step are restored
+        assert ObjectStore.get("one") == [1]
+
+        # the last execution succeeded, so nothing to resume
+        JournalSampleStep.executed = []
+        third = self._run([self._create_step("one", [1])], resume=True)
+        assert third.resumed_from is None
+        assert JournalSampleStep.executed == ["one"]
+
+    def test_resume_arguments_changed(self):
+        self._run(
+            [self._create_step("one", [1]), self._create_step("two", [2], fail=True)]
+        )
+
+        JournalSampleStep.executed = []
+        self._run(
+            [self._create_step("one", [100]), self._create_step("two", [2])],
+            resume=True,
+        )
+        assert JournalSampleStep.executed == ["one", "two"]
+
+    def test_resume_object_arguments(self):
+        """
+        Steps whose arguments hold objects (e.g. steps of a pipeline) are skipped as well
+        """
+
+        def create_steps(fail):
+            step = self._create_step("one", [1])
+            step.__dict__["_steps"] = [self._create_step("inner", [1])]
+            return [step, self._create_step("two", [2], fail=fail)]
+
+        self._run(create_steps(True))
+        JournalSampleStep.executed = []
+        self._run(create_steps(False), resume=True)
+        assert JournalSampleStep.executed == ["two"]
+
+    def test_resume_listeners(self):
+        """
+        Listeners are notified of the skipped steps
+        """
+        self._run([self._create_step("one", [1]), self._create_step("two", [2], fail=True)])
+
+        calls = []
+        steps = [self._create_step("one", [1]), self._create_step("two", [2])]
+        for step in steps:
+            Helper.set_property(step, "listeners", [RecordListener(calls)])
+        self._run(steps, resume=True)
+        assert calls == [
+            ("one", "skip_step"),
+            ("two", "before_step"),
+            ("two", "after_step"),
+            ("two", "after_completion"),
+        ]
+
+    def test_record_failure(self):
+        journal = self._run([self._create_step("one", [1], fail=True)])
+        with sqlite3.connect(self._db) as con:
+            step_status = con.execute(
+                "SELECT status FROM step WHERE run_id = ?", (journal.run_id,)
+            ).fetchone()[0]
+            run_status = con.execute(
+                "SELECT status FROM run WHERE run_id = ?", (journal.run_id,)
+            ).fetchone()[0]
+        assert step_status == RunJournal.FAILED
+        assert run_status == RunJournal.FAILED
+
+    def test_arguments_masked(self):
+        step = self._create_step("one", [1])
+        step.__dict__["_password"] = "secret"
+        journal = self._run([step])
+        with sqlite3.connect(self._db) as con:
+            arguments = con.execute(
+                "SELECT arguments FROM step WHERE run_id = ?", (journal.run_id,)
+            ).fetchone()[0]
+        assert "secret" not in arguments
+        assert "****" in arguments
+
+
+class TestObjectStoreRecording(object):
+    def test_recording(self):
+        ObjectStore.put("spam", 1)
+        ObjectStore.start_recording()
+        ObjectStore.put("ham", 2)
+        ObjectStore.put("egg", 3)
+        ObjectStore.put("ham", 4)
+        assert ObjectStore.stop_recording() == ["ham", "egg"]
+        assert ObjectStore.stop_recording() == []
+
+    def test_not_recording(self):
+        ObjectStore.put("spam", 1)
+        assert ObjectStore.stop_recording() == []
@@ -0,0 +1,122 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import shutil
+from unittest.mock import patch
+
+from cliboa.conf import env
+from cliboa.core.listener import StepStatusListener
+from cliboa.core.strategy import SingleProcExecutor
+from cliboa.scenario.base import BaseStep
+from cliboa.test import BaseCliboaTest
+from cliboa.util.config import CliboaConfig
+from cliboa.util.helper import Helper
+from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.metrics import Metrics
+
+
+class MetricsSampleStep(BaseStep):
+    def __init__(self):
+        super().__init__()
+        self._fail = False
+
+    def fail(self, fail):
+        self._fail = fail
+
+    def execute(self, *args):
+        Metrics.add_rows(10)
+        Metrics.add_bytes(100)
+        if self._fail:
+            raise Exception("Something wrong")
+
+
+class TestMetrics(BaseCliboaTest):
+    def setUp(self):
+        self._dir = os.path.join(env.BASE_DIR, "metrics")
+        self._conf = {
+            ("metrics", "path"): self._dir,
+            ("metrics", "buckets"): "1,60",
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _get(self, section, option, fallback=None):
+        return self._conf.get((section, option), fallback)
+
+    def _execute(self, name, fail=False):
+        step = MetricsSampleStep()
+        Helper.set_property(step, "step", name)
+        Helper.set_property(step, "fail", fail)
+        Helper.set_property(step, "logger", LisboaLog.get_logger(__name__))
+        Helper.set_property(step, "listeners", [StepStatusListener()])
+        try:
+            SingleProcExecutor([step]).execute_steps(None)
+        except Exception:
+            pass
+
+    def test_write(self):
+        with patch.object(CliboaConfig, "getboolean", return_value=True), patch.object(
+            CliboaConfig, "get", side_effect=self._get
+        ):
+            Metrics.start("spam")
+            self._execute("a")
+            self._execute("a")
+            self._execute("b", fail=True)
+            path = Metrics.write()
+
+        assert path == os.path.join(self._dir, "cliboa_spam.prom")
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        a = 'project="spam",step="a",class="MetricsSampleStep"'
+        b = 'project="spam",step="b",class="MetricsSampleStep"'
+        assert "# TYPE cliboa_step_duration_seconds histogram" in lines
+        assert 'cliboa_step_duration_seconds_bucket{%s,le="1"} 2' % a in lines
+        assert 'cliboa_step_duration_seconds_bucket{%s,le="+Inf"} 2' % a in lines
+        assert "cliboa_step_duration_seconds_count{%s} 2" % a in lines
+        assert "cliboa_step_success_total{%s} 2" % a in lines
+        assert "cliboa_step_failure_total{%s} 0" % a in lines
+        assert "cliboa_step_failure_total{%s} 1" % b in lines
+        assert "cliboa_step_rows_total{%s} 20" % a in lines
+        assert "cliboa_step_bytes_total{%s} 200" % a in lines
+        assert 'cliboa_scenario_success{project="spam"} 0' in lines
+
+    def test_skip_step(self):
+        with patch.object(CliboaConfig, "getboolean", return_value=True), patch.object(
+            CliboaConfig, "get", side_effect=self._get
+        ):
+            Metrics.start("spam")
+            self._execute("a")
+            step = MetricsSampleStep()
+            Helper.set_property(step, "step", "b")
+            StepStatusListener().skip_step(step)
+            path = Metrics.write()
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        a = 'project="spam",step="a",class="MetricsSampleStep"'
+        b = 'project="spam",step="b",class="MetricsSampleStep"'
+        assert "cliboa_step_skipped_total{%s} 0" % a in lines
+        assert "cliboa_step_skipped_total{%s} 1" % b in lines
+        assert "cliboa_step_success_total{%s} 0" % b in lines
+        assert "cliboa_step_duration_seconds_count{%s} 0" % b in lines
+        assert 'cliboa_scenario_success{project="spam"} 1' in lines
+
+    def test_disabled(self):
+        Metrics.start("spam")
+        self._execute("a")
+        assert Metrics.write() is None
+        assert os.path.exists(self._dir) is False
@@ -0,0 +1,68 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import time
+
+import pytest
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.metrics import Metrics
+from cliboa.util.parallel import ParallelMap
+
+
+def _slow_square(sec, x):
+    time.sleep(sec)
+    Metrics.add_rows(x)
+    return x * x
+
+
+def _fail(x):
+    if x == 1:
+        raise ValueError("spam")
+    time.sleep(0.5)
+    return x
+
+
+class TestParallelMap(object):
+    def test_run_in_order(self):
+        """
+        Results are handed over in the order of the items, even if they finish in reverse order
+        """
+        for mode in [ParallelMap.PROCESS, ParallelMap.THREAD]:
+            called = []
+            Metrics.pop_counts()
+            ret = ParallelMap(3, mode).run(
+                _slow_square,
+                [(0.3, 1), (0.2, 2), (0.1, 3)],
+                lambda item, r: called.append(r),
+            )
+            assert ret == [1, 4, 9]
+            assert called == [1, 4, 9]
+            # counts of workers are added to the caller
+            assert Metrics.pop_counts()[0] == 6
+
+    def test_run_serial(self):
+        assert ParallelMap().run(lambda x: os.getpid(), [(1,), (2,)]) == [os.getpid()] * 2
+
+    def test_fail_fast(self):
+        items = [(i,) for i in range(10)]
+        start = time.time()
+        with pytest.raises(ValueError):
+            ParallelMap(2, ParallelMap.THREAD).run(_fail, items)
+        # items after the error are not processed
+        assert time.time() - start < 2
+
+    def test_invalid_mode(self):
+        with pytest.raises(InvalidParameter):
+            ParallelMap(2, "spam")
@@ -0,0 +1,97 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import shutil
+import sqlite3
+import time
+
+from cliboa.conf import env
+from cliboa.scenario.transform.file import FileConvert
+from cliboa.test import BaseCliboaTest
+from cliboa.util.helper import Helper
+from cliboa.util.result_cache import StepResultCache
+
+
+class TestStepResultCache(BaseCliboaTest):
+    def setUp(self):
+        self._data_dir = os.path.join(env.BASE_DIR, "data")
+        os.makedirs(self._data_dir, exist_ok=True)
+        self._db = os.path.join(self._data_dir, "step_cache.db")
+        self._input = self._create_file("test.txt", "spam")
+
+    def tearDown(self):
+        shutil.rmtree(self._data_dir, ignore_errors=True)
+
+    def _create_file(self, name, content):
+        path = os.path.join(self._data_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def _create_step(self, encoding_to):
+        instance = FileConvert()
+        Helper.set_property(instance, "src_dir", self._data_dir)
+        Helper.set_property(instance, "src_pattern", r"test\.txt")
+        Helper.set_property(instance, "encoding_from", "utf-8")
+        Helper.set_property(instance, "encoding_to", encoding_to)
+        return instance
+
+    def test_fingerprint(self):
+        cache = StepResultCache(self._db)
+        fp = cache.fingerprint(self._create_step("utf-8"), self._input)
+        assert fp == cache.fingerprint(self._create_step("utf-8"), self._input)
+        # arguments are changed
+        assert fp != cache.fingerprint(self._create_step("shift_jis"), self._input)
+        # input file is changed
+        time.sleep(0.01)
+        self._create_file("test.txt", "spam spam")
+        assert fp != cache.fingerprint(self._create_step("utf-8"), self._input)
+
+    def test_hit(self):
+        cache = StepResultCache(self._db)
+        output = self._create_file("out.txt", "spam")
+        fp = cache.fingerprint(self._create_step("utf-8"), self._input)
+        assert cache.hit(fp, output) is False
+
+        cache.put(fp, output)
+        assert cache.hit(fp, output) is True
+        assert cache.hit(fp, os.path.join(self._data_dir, "other.txt")) is False
+
+        # output file is changed after it was cached
+        time.sleep(0.01)
+        self._create_file("out.txt", "spam spam")
+        assert cache.hit(fp, output) is False
+
+    def test_evict_by_size(self):
+        cache = StepResultCache(self._db)
+        cache._max_size = 10
+        for i in range(3):
+            output = self._create_file("out%s.txt" % i, "12345")
+            cache.put("fp%s" % i, output)
+            time.sleep(0.01)
+
+        with sqlite3.connect(self._db) as con:
+            rows = con.execute("SELECT fingerprint FROM entry ORDER BY fingerprint").fetchall()
+        assert rows == [("fp1",), ("fp2",)]
+
+    def test_evict_by_age(self):
+        cache = StepResultCache(self._db)
+        cache.put("fp0", self._create_file("out0.txt", "spam"))
+        cache._max_age = 0
+        time.sleep(0.01)
+        cache.put("fp1", self._create_file("out1.txt", "spam"))
+
+        with sqlite3.connect(self._db) as con:
+            rows = con.execute("SELECT fingerprint FROM entry").fetchall()
+        assert rows == [("fp1",)]
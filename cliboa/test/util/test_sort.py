@@ -0,0 +1,103 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import random
+
+import pytest
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.parallel import ParallelMap
+from cliboa.util.sort import ExternalSort, SortKey
+
+
+def _sorter(keys, **kwargs):
+    sorter = ExternalSort(keys, **kwargs)
+    # a few rows in each run
+    sorter._buffer_size = 500
+    return sorter
+
+
+class TestExternalSort(object):
+    def setup_method(self, method):
+        random.seed(1)
+        self._rows = [[str(i), str(random.randint(0, 20))] for i in range(300)]
+
+    def test_sort_in_memory(self):
+        rows = [["3", "c"], ["1", "a"], ["2", "b"]]
+        assert list(ExternalSort([SortKey(0)]).sort(rows)) == [["1", "a"], ["2", "b"], ["3", "c"]]
+        assert list(ExternalSort([SortKey(0)]).sort([])) == []
+
+    def test_sort_runs(self):
+        """
+        Runs are merged in order, and rows of the same key keep the order of input
+        """
+        for max_workers, mode in [
+            (1, ParallelMap.PROCESS),
+            (3, ParallelMap.PROCESS),
+            (3, ParallelMap.THREAD),
+        ]:
+            sorter = _sorter([SortKey(1, "number")], max_workers=max_workers, worker_mode=mode)
+            ret = list(sorter.sort(iter(self._rows)))
+            assert ret == sorted(self._rows, key=lambda r: int(r[1]))
+
+    def test_sort_multi_pass(self):
+        sorter = _sorter([SortKey(1, "number", True), SortKey(0, "number")])
+        sorter.MAX_MERGE = 2
+        ret = list(sorter.sort(self._rows))
+        assert ret == sorted(self._rows, key=lambda r: (-int(r[1]), int(r[0])))
+
+    def test_sort_string_desc(self):
+        rows = [["b", "1"], ["a", "2"], ["c", "3"], ["a", "1"]]
+        ret = list(ExternalSort([SortKey(0, desc=True), SortKey(1)]).sort(rows))
+        assert ret == [["c", "3"], ["b", "1"], ["a", "1"], ["a", "2"]]
+
+    def test_sort_number(self):
+        rows = [["10"], [""], ["9.5"], ["-1"], ["x"], ["100"]]
+        ret = list(ExternalSort([SortKey(0, "number")]).sort(rows))
+        # values which are not numbers come first
+        assert ret == [[""], ["x"], ["-1"], ["9.5"], ["10"], ["100"]]
+        ret = list(ExternalSort([SortKey(0, "number", True)]).sort(rows))
+        assert ret == [["100"], ["10"], ["9.5"], ["-1"], [""], ["x"]]
+
+    def test_sort_date(self):
+        rows = [["2021/01/10"], ["2020/12/31"], ["2021/01/02"]]
+        ret = list(ExternalSort([SortKey(0, "date", format="%Y/%m/%d")]).sort(rows))
+        assert ret == [["2020/12/31"], ["2021/01/02"], ["2021/01/10"]]
+
+        rows = [["2021-01-01T09:00:00+09:00"], ["2021-01-01T01:00:00+00:00"], [""]]
+        ret = list(ExternalSort([SortKey(0, "date", True)]).sort(rows))
+        assert ret == [["2021-01-01T01:00:00+00:00"], ["2021-01-01T09:00:00+09:00"], [""]]
+
+    def test_sort_no_duplicate(self):
+        rows = [r for r in self._rows for _ in range(2)]
+        sorter = _sorter([SortKey(1, "number")], no_duplicate=True)
+        ret = list(sorter.sort(rows))
+        # rows of the same key are ordered by the whole row
+        assert ret == sorted(self._rows, key=lambda r: (int(r[1]), r))
+
+    def test_sort_no_duplicate_invalid_keys(self):
+        """
+        Duplicated rows whose keys can not be converted are adjacent as well
+        """
+        rows = [["x", "b"], ["", "a"], ["x", "b"], ["y", "a"], ["", "a"], ["1", "c"]]
+        for sorter in [
+            ExternalSort([SortKey(0, "number")], no_duplicate=True),
+            _sorter([SortKey(0, "date")], no_duplicate=True),
+        ]:
+            ret = list(sorter.sort(rows))
+            assert ret == [["", "a"], ["x", "b"], ["y", "a"], ["1", "c"]]
+
+    def test_invalid_type(self):
+        with pytest.raises(InvalidParameter) as execinfo:
+            ExternalSort([SortKey(0, "int")])
+        assert "Type of a sort key" in str(execinfo.value)
@@ -11,14 +11,33 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import ast
+import atexit
 import os
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 
+from cliboa.util.config import CliboaConfig
 from cliboa.util.lisboa_log import LisboaLog
 
 global _STEP_ARGUMENT_CACHE
 global _PROCESS_STORE_CACHE
 _STEP_ARGUMENT_CACHE = {}
-_PROCESS_STORE_CACHE = {}
+# Values of ObjectStore, in the order of recent use
+_PROCESS_STORE_CACHE = OrderedDict()
+# Keys put by the current thread, while recording
+_PUT_RECORDER = threading.local()
+_STORE_LOCK = threading.RLock()
+# Incremented by every put of ObjectStore
+_STORE_VERSION = 0
+# StorageIO instances which saved rows, per process id in the order of saving
+_SPOOLS = {}
+_SPOOL_LOCK = threading.Lock()
 
 
 class StepArgument(object):
@@ -35,6 +54,19 @@ class StepArgument(object):
             step (str): Cache key (step name)
             instance (class): Step class
         """
+        _STEP_ARGUMENT_CACHE[step] = StepArgument.describe(instance)
+
+    @staticmethod
+    def describe(instance):
+        """
+        Returns properties of a step instance with the scenario.yaml defined names
+
+        Args:
+            instance (class): Step class
+
+        Returns:
+            dict: Properties (underscore removed)
+        """
         props = instance.__dict__
         items = {}
         for k, v in props.items():
@@ -46,7 +78,7 @@ class StepArgument(object):
                 k = k.split(sp)[1]
             k = k[1:] if k.startswith("_") else k
             items[k] = v
-        _STEP_ARGUMENT_CACHE[step] = items
+        return items
 
     @staticmethod
     def get(k):
@@ -61,23 +93,92 @@ class StepArgument(object):
         """
         return _STEP_ARGUMENT_CACHE.get(k)
 
+    # Attributes of BaseStep which are not arguments of scenario.yml
+    EXCLUDE_ATTRS = ("s", "logger", "listeners")
+
+    @staticmethod
+    def normalize(instance, exclude=()):
+        """
+        Returns arguments of a step instance in a form which is the same in every execution,
+        so that they can be compared or hashed as json.
+        Objects (e.g. steps of a pipeline) are described by their class and arguments,
+        instead of repr() which contains the memory address.
+
+        Args:
+            instance (class): Step class
+            exclude: Arguments which are excluded in addition to EXCLUDE_ATTRS
+
+        Returns:
+            dict: Arguments (underscore removed)
+        """
+        return StepArgument._normalize_object(instance, tuple(exclude), 0)["arguments"]
+
+    @staticmethod
+    def _normalize_object(instance, exclude, depth):
+        return {
+            "class": instance.__class__.__name__,
+            "arguments": {
+                k: StepArgument._normalize_value(v, exclude, depth + 1)
+                for k, v in StepArgument.describe(instance).items()
+                if k not in StepArgument.EXCLUDE_ATTRS and k not in exclude
+            },
+        }
+
+    @staticmethod
+    def _normalize_value(value, exclude, depth):
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [StepArgument._normalize_value(v, exclude, depth) for v in value]
+        if isinstance(value, (set, frozenset)):
+            return sorted(str(StepArgument._normalize_value(v, exclude, depth)) for v in value)
+        if isinstance(value, dict):
+            return {
+                str(k): StepArgument._normalize_value(v, exclude, depth)
+                for k, v in value.items()
+            }
+        if hasattr(value, "__dict__") and depth < 3:
+            return StepArgument._normalize_object(value, exclude, depth)
+        text = str(value)
+        # default repr of an object, e.g. <Foo object at 0x7f...>
+        return value.__class__.__name__ if " at 0x" in text else text
+
 
 class ObjectStore(object):
     """
     Cache any object.
     This cache class is used when same parameter uses from one STEP to the other.
+
+    Values are kept in memory up to max_memory_mb of [object_store] section of cliboa.ini.
+    When the total size exceeds it, least recently used values are spilled to files
+    in spill_dir (feather for DataFrames if pyarrow is installed, pickle otherwise),
+    and loaded again when they are got.
+    Sizes of DataFrames, bytes, strings and lists (dicts, tuples) of them are accounted,
+    the others are accounted by sys.getsizeof.
     """
 
+    _DEFAULT_MAX_MEMORY_MB = 1024
+
     @staticmethod
-    def put(k, v):
+    def put(k, v, ttl=None):
         """
         Put value
 
         Args:
             k (str): Cache key
             v (dict): Cache value
+            ttl (int): Seconds until the value expires.
+                       default_ttl_sec of cliboa.ini if None, never expires if 0.
         """
-        _PROCESS_STORE_CACHE[k] = v
+        if ttl is None:
+            ttl = int(CliboaConfig.get("object_store", "default_ttl_sec") or 0)
+        with _STORE_LOCK:
+            ObjectStore._discard(k)
+            _PROCESS_STORE_CACHE[k] = _StoreEntry(v, ttl)
+            ObjectStore._evict()
+        keys = getattr(_PUT_RECORDER, "keys", None)
+        if keys is not None and k not in keys:
+            keys.append(k)
 
     @staticmethod
     def get(k):
@@ -88,39 +189,408 @@ class ObjectStore(object):
             k (str): Cache key
 
         Returns:
-            dict: Value. Returns None if the key does not exist
+            dict: Value. Returns None if the key does not exist or expired
+        """
+        with _STORE_LOCK:
+            entry = _PROCESS_STORE_CACHE.get(k)
+            if entry is None:
+                return None
+            if entry.expired():
+                ObjectStore._discard(k)
+                return None
+            _PROCESS_STORE_CACHE.move_to_end(k)
+            if not entry.spilled():
+                return entry.value
+            value = entry.load()
+            if entry.size <= ObjectStore._max_memory():
+                entry.restore(value)
+                ObjectStore._evict()
+            return value
+
+    @staticmethod
+    def delete(k):
+        """
+        Delete value. Nothing happens if the key does not exist.
+
+        Args:
+            k (str): Cache key
+        """
+        with _STORE_LOCK:
+            ObjectStore._discard(k)
+
+    @staticmethod
+    def version():
+        """
+        Returns:
+            int: Version which is incremented by every put
+        """
+        return _STORE_VERSION
+
+    @staticmethod
+    def publish(since, owner_pid=None):
+        """
+        Write values put after the version to files, so that another process
+        (the parent process of a pool worker by default) adopts them.
+        The files are removed by that process.
+
+        Args:
+            since (int): Version returned by version()
+            owner_pid (int): Process which adopts the values
+
+        Returns:
+            list: Arguments of adopt()
+        """
+        owner_pid = owner_pid if owner_pid is not None else os.getppid()
+        published = []
+        with _STORE_LOCK:
+            for k, entry in _PROCESS_STORE_CACHE.items():
+                if entry.seq > since and not entry.expired():
+                    published.append((k,) + entry.publish(owner_pid))
+        return published
+
+    @staticmethod
+    def adopt(published, own=True):
+        """
+        Put values which another process published. They are loaded when they are got.
+
+        Args:
+            published (list): Returned value of publish()
+            own (bool): Whether this process removes the files.
+                        False if the publishing process keeps them, e.g. values of the parent
+                        process which pool workers adopt.
+        """
+        with _STORE_LOCK:
+            for k, path, format, size, expires_at in published:
+                ObjectStore._discard(k)
+                entry = _StoreEntry.from_file(path, format, size, expires_at)
+                if not own:
+                    entry.disown()
+                _PROCESS_STORE_CACHE[k] = entry
+        keys = getattr(_PUT_RECORDER, "keys", None)
+        if keys is not None:
+            keys.extend(p[0] for p in published if p[0] not in keys)
+
+    @staticmethod
+    def _discard(k):
+        entry = _PROCESS_STORE_CACHE.pop(k, None)
+        if entry is not None:
+            entry.remove_spill()
+
+    @staticmethod
+    def _max_memory():
+        max_memory_mb = CliboaConfig.get("object_store", "max_memory_mb")
+        if max_memory_mb is None or max_memory_mb == "":
+            max_memory_mb = ObjectStore._DEFAULT_MAX_MEMORY_MB
+        return float(max_memory_mb) * 1024 * 1024
+
+    @staticmethod
+    def _evict():
+        """
+        Spill least recently used values until the total size fits in max_memory_mb
+        """
+        max_memory = ObjectStore._max_memory()
+        if max_memory <= 0:
+            return
+        entries = [e for e in _PROCESS_STORE_CACHE.values() if not e.spilled()]
+        total = sum(e.size for e in entries)
+        for entry in entries:
+            if total <= max_memory:
+                break
+            entry.spill()
+            total -= entry.size
+
+    @staticmethod
+    def start_recording():
+        """
+        Start to record keys which are put by the current thread
+        """
+        _PUT_RECORDER.keys = []
+
+    @staticmethod
+    def stop_recording():
+        """
+        Stop recording
+
+        Returns:
+            list: Keys which were put by the current thread since start_recording
+        """
+        keys = getattr(_PUT_RECORDER, "keys", None)
+        _PUT_RECORDER.keys = None
+        return keys if keys is not None else []
+
+
+class _StoreEntry(object):
+    """
+    A value of ObjectStore, which is either in memory or in a spill file
+    """
+
+    def __init__(self, value, ttl):
+        self.value = value
+        self.size = _sizeof(value)
+        self.expires_at = time.time() + ttl if ttl else None
+        self.path = None
+        self.format = None
+        self.seq = _next_version()
+        # Process which removes the spill file
+        self._pid = os.getpid()
+
+    @staticmethod
+    def from_file(path, format, size, expires_at):
+        """
+        Entry of a file which another process wrote by publish()
+        """
+        entry = _StoreEntry(None, 0)
+        entry.size = size
+        entry.expires_at = expires_at
+        entry.path = path
+        entry.format = format
+        return entry
+
+    def disown(self):
+        """
+        The file is removed by another process
+        """
+        self._pid = None
+
+    def expired(self):
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+    def spilled(self):
+        return self.path is not None and self.value is None
+
+    def spill(self):
+        self._write()
+        self.value = None
+
+    def publish(self, owner_pid):
+        """
+        Write the value to a file which owner_pid removes, and keep it in memory as well
+
+        Returns:
+            tuple: Arguments of from_file
         """
-        return _PROCESS_STORE_CACHE.get(k)
+        if self.path is None:
+            self._write()
+        self._pid = owner_pid
+        return self.path, self.format, self.size, self.expires_at
+
+    def _write(self):
+        fd, self.path = tempfile.mkstemp(
+            prefix="%s_" % os.getpid(), suffix=".spill", dir=_spill_dir()
+        )
+        os.close(fd)
+        self._pid = os.getpid()
+        self.format = "pickle"
+        if _is_dataframe(self.value):
+            try:
+                # Arrow IPC format, which is read without unpickling each object
+                self.value.to_feather(self.path)
+                self.format = "feather"
+            except Exception:
+                # pyarrow is not installed, or the index is not the default one
+                pass
+        elif isinstance(self.value, bytes):
+            with open(self.path, "wb") as f:
+                f.write(self.value)
+            self.format = "bytes"
+        if self.format == "pickle":
+            with open(self.path, "wb") as f:
+                pickle.dump(self.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self):
+        if self.format == "feather":
+            import pandas
+
+            return pandas.read_feather(self.path)
+        with open(self.path, "rb") as f:
+            if self.format == "bytes":
+                return f.read()
+            return pickle.load(f)
+
+    def restore(self, value):
+        self.remove_spill()
+        self.value = value
+
+    def remove_spill(self):
+        if self.path is not None and self._pid == os.getpid() and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def _next_version():
+    global _STORE_VERSION
+    with _STORE_LOCK:
+        _STORE_VERSION += 1
+        return _STORE_VERSION
+
+
+def _spill_dir():
+    path = CliboaConfig.get("object_store", "spill_dir") or os.path.join(
+        tempfile.gettempdir(), "cliboa_object_store"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _is_dataframe(value):
+    return type(value).__name__ == "DataFrame" and hasattr(value, "to_feather")
+
+
+def _sizeof(value, depth=0):
+    """
+    Returns:
+        int: Approximate bytes of memory the value uses
+    """
+    if hasattr(value, "memory_usage") and type(value).__module__.startswith("pandas"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    size = sys.getsizeof(value)
+    if depth > 2:
+        return size
+    if isinstance(value, dict):
+        return size + sum(
+            _sizeof(k, depth + 1) + _sizeof(v, depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_sizeof(v, depth + 1) for v in value)
+    return size
+
+
+@atexit.register
+def _remove_spills():
+    for entry in list(_PROCESS_STORE_CACHE.values()):
+        entry.remove_spill()
 
 
 class StorageIO(object):
     """
-    Cache object to storage temporary
+    Cache object to storage temporary.
+
+    Rows which a step of 'io: input' reads are saved to a spool file of the step,
+    and read by a step of 'io: output' in the same process.
+    A spool consists of frames of length prefixed pickled rows,
+    and each frame holds up to BATCH_SIZE rows.
     """
 
     CACHE_PREFIX = "cliboa_cache_"
     CACHE_SUFFIX = ".tmp"
+    SPOOL_SUFFIX = ".spool"
+    SPOOL_MAGIC = b"CLIBOA_SPOOL\x01\n"
+    BATCH_SIZE = 1000
+
+    _FRAME_HEADER = struct.Struct("<Q")
 
     def __init__(self):
         self._logger = LisboaLog.get_logger(__name__)
-        # Add process id to create an unique cache file name
-        self.__cache_file = (
-            "/tmp/" + self.CACHE_PREFIX + str(os.getpid()) + self.CACHE_SUFFIX
-        )
+        self.__spool_file = None
+        self.__buffer = []
 
     @property
     def cache_file(self):
-        return self.__cache_file
+        """
+        Spool file of this instance. Created when it is first used.
+        """
+        self.__open_spool()
+        return self.__spool_file
+
+    @property
+    def legacy_cache_file(self):
+        """
+        Cache file of str() lines, which former versions shared in a process
+        """
+        return "/tmp/" + self.CACHE_PREFIX + str(os.getpid()) + self.CACHE_SUFFIX
 
     def save(self, v):
         """
-        Save one column of input data to storage as a temporal file.
+        Save one row of input data to the spool file.
+        """
+        self.__open_spool()
+        self.__buffer.append(v)
+        if len(self.__buffer) >= self.BATCH_SIZE:
+            self.__write_frame()
+
+    def __open_spool(self):
+        if self.__spool_file is not None:
+            return
+        fd, self.__spool_file = tempfile.mkstemp(
+            prefix=self.CACHE_PREFIX + str(os.getpid()) + "_",
+            suffix=self.SPOOL_SUFFIX,
+            dir="/tmp",
+        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.SPOOL_MAGIC)
+        with _SPOOL_LOCK:
+            _SPOOLS.setdefault(os.getpid(), []).append(self)
+
+    def flush(self):
+        """
+        Write rows in the buffer to the spool file
         """
-        with open(self.__cache_file, "a", encoding="utf-8") as f:
-            f.write(str(v) + "\n")
+        if self.__buffer:
+            self.__write_frame()
+
+    def __write_frame(self):
+        data = pickle.dumps(self.__buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self.__spool_file, "ab") as f:
+            f.write(self._FRAME_HEADER.pack(len(data)))
+            f.write(data)
+        self.__buffer = []
+
+    def __iter__(self):
+        return self.load()
+
+    def load(self):
+        """
+        Read rows which steps of this process have saved, in the order of saving.
+        A cache file of former versions is read as well.
+
+        Returns:
+            iterator: Rows
+        """
+        with _SPOOL_LOCK:
+            spools = list(_SPOOLS.get(os.getpid(), []))
+        for s in spools:
+            s.flush()
+            for row in StorageIO.read(s.cache_file):
+                yield row
+        if os.path.exists(self.legacy_cache_file):
+            for row in StorageIO.read(self.legacy_cache_file):
+                yield row
+
+    @staticmethod
+    def read(path):
+        """
+        Read rows from a spool file, or a cache file of str() lines of former versions
+
+        Returns:
+            iterator: Rows
+        """
+        with open(path, "rb") as f:
+            magic = f.read(len(StorageIO.SPOOL_MAGIC))
+            if magic != StorageIO.SPOOL_MAGIC:
+                f.seek(0)
+                for line in f:
+                    if line.strip():
+                        yield ast.literal_eval(line.decode("utf-8"))
+                return
+
+            header_size = StorageIO._FRAME_HEADER.size
+            while True:
+                header = f.read(header_size)
+                if len(header) < header_size:
+                    return
+                (size,) = StorageIO._FRAME_HEADER.unpack(header)
+                for row in pickle.loads(f.read(size)):
+                    yield row
 
     def remove(self):
         """
-        Remove a cache file
+        Remove spool files of this process, and a cache file of former versions
         """
-        os.remove(self.__cache_file)
+        with _SPOOL_LOCK:
+            spools = _SPOOLS.pop(os.getpid(), [])
+        for s in spools:
+            if os.path.exists(s.cache_file):
+                os.remove(s.cache_file)
+        if os.path.exists(self.legacy_cache_file):
+            os.remove(self.legacy_cache_file)
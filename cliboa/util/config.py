@@ -0,0 +1,83 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import configparser
+import os
+
+from cliboa.conf import env
+
+
+class CliboaConfig(object):
+    """
+    Read values of conf/cliboa.ini.
+    Returns the fallback value if either the file, section or option does not exist.
+    The file is parsed once per process.
+    """
+
+    _conf = None
+
+    @staticmethod
+    def _read():
+        if CliboaConfig._conf is None:
+            conf = configparser.ConfigParser()
+            path = os.path.join(env.BASE_DIR, "conf", "cliboa.ini")
+            if os.path.exists(path):
+                conf.read(path, encoding="utf-8")
+            CliboaConfig._conf = conf
+        return CliboaConfig._conf
+
+    @staticmethod
+    def reset():
+        """
+        Discard the parsed file, so that it is parsed again at the next access (e.g. in tests)
+        """
+        CliboaConfig._conf = None
+
+    @staticmethod
+    def get(section, option, fallback=None):
+        """
+        Args:
+            section (str): Section name
+            option (str): Option name
+            fallback: Value when the option does not exist
+
+        Returns:
+            str: Value of the option
+        """
+        return CliboaConfig._read().get(section, option, fallback=fallback)
+
+    @staticmethod
+    def getboolean(section, option, fallback=False):
+        """
+        Args:
+            section (str): Section name
+            option (str): Option name
+            fallback: Value when the option does not exist
+
+        Returns:
+            bool: Value of the option
+        """
+        return CliboaConfig._read().getboolean(section, option, fallback=fallback)
+
+    @staticmethod
+    def getlist(section, option):
+        """
+        Args:
+            section (str): Section name
+            option (str): Option name. Value is comma separated.
+
+        Returns:
+            list: Values of the option. Empty list when the option does not exist.
+        """
+        val = CliboaConfig._read().get(section, option, fallback="")
+        return [v.strip() for v in val.split(",") if v.strip()]
@@ -1,3 +1,13 @@
 class StepStatus:
     SUCCESSFUL_TERMINATION = 0
     ABNORMAL_TERMINATION = 1
+
+
+class CostHint:
+    """
+    Resource which a step mostly consumes. See BaseStep.COST_HINT
+    """
+
+    CPU = "cpu"
+    IO = "io"
+    MEMORY = "memory"
@@ -11,8 +11,23 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import codecs
 import csv
-from cliboa.util.exception import CliboaException
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+from array import array
+from operator import itemgetter
+
+import jsonlines
+
+from cliboa.util.exception import CliboaException, InvalidFormat, InvalidParameter
+from cliboa.util.file import File
+from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.parallel import ParallelMap
 
 
 class Csv(object):
@@ -79,18 +94,7 @@ class Csv(object):
             remain_column_names: Columns which remain
             enc: Encoding
         """
-        with open(input_file, mode="r", encoding=enc) as in_f, open(
-            output_file, mode="w", encoding=enc
-        ) as out_f:
-            reader = csv.DictReader(in_f)
-            writer = csv.writer(out_f)
-            writer.writerow(remain_column_names)
-            for row in reader:
-                contents = []
-                for c in remain_column_names:
-                    contents.append(row[c])
-                writer.writerow(contents)
-            out_f.flush()
+        Csv.extract_column_sets(input_file, [(output_file, remain_column_names, None)], enc)
 
     @staticmethod
     def extract_columns_with_numbers(
@@ -105,19 +109,106 @@ class Csv(object):
             remain_column_numbers: Column numbers which remain
             enc: Encoding
         """
-        with open(input_file, mode="r", encoding=enc) as in_f, open(
-            output_file, mode="w", encoding=enc
-        ) as out_f:
-            reader = csv.reader(in_f)
-            writer = csv.writer(out_f)
-            for i, row in enumerate(reader):
-                contents = []
-                for j, r in enumerate(row):
-                    if (j + 1) not in remain_column_numbers:
-                        continue
-                    contents.append(r)
-                writer.writerow(contents)
-            out_f.flush()
+        Csv.extract_column_sets(input_file, [(output_file, None, remain_column_numbers)], enc)
+
+    @staticmethod
+    def extract_column_sets(input_file, column_sets, enc="utf-8"):
+        """
+        Extract sets of columns from a CSV file into CSV files, reading the file once
+
+        Args:
+            input_file: Input csv file name
+            column_sets (list): Tuples of (output csv file name, column names, column numbers).
+                Either column names or column numbers is None.
+                column names: Columns which remain in the order. The header is replaced by them.
+                column numbers: Column numbers (from 1) which remain in the order of the file.
+                                The header is treated as a row.
+            enc: Encoding
+
+        Returns:
+            int: Number of rows read except a header
+        """
+        outputs = []
+        try:
+            for output_file, _, _ in column_sets:
+                outputs.append(open(output_file, mode="w", encoding=enc))
+            with open(input_file, mode="r", encoding=enc) as in_f:
+                reader = csv.reader(in_f)
+                writers = [csv.writer(o) for o in outputs]
+                header = next(reader, None)
+                if header is None:
+                    for (_, names, _), writer in zip(column_sets, writers):
+                        if names is not None:
+                            writer.writerow(names)
+                    return 0
+
+                by_names = []
+                by_numbers = []
+                positions = {n: i for i, n in enumerate(header)}
+                for (_, names, numbers), writer in zip(column_sets, writers):
+                    if names is not None:
+                        missing = [n for n in names if n not in positions]
+                        if missing:
+                            raise InvalidParameter(
+                                "Columns %s do not exist in the header." % missing
+                            )
+                        indexes = [positions[n] for n in names]
+                        by_names.append((Csv.projector(indexes, pad=True), writer.writerow))
+                        writer.writerow(names)
+                    else:
+                        indexes = sorted(set(n - 1 for n in numbers if n >= 1))
+                        project = Csv.projector(indexes)
+                        by_numbers.append((project, writer.writerow))
+                        writer.writerow(project(header))
+
+                rows = 0
+                for row in reader:
+                    rows += 1
+                    if row:
+                        for project, write in by_names:
+                            write(project(row))
+                    for project, write in by_numbers:
+                        write(project(row))
+                return rows
+        finally:
+            for o in outputs:
+                o.close()
+
+    @staticmethod
+    def projector(indexes, pad=False):
+        """
+        Compile a function which takes a row and returns values of the column indexes.
+        The positions are resolved once, and values are taken by operator.itemgetter.
+
+        Args:
+            indexes (list): Column indexes from 0
+            pad: Values of the indexes which a row does not have are empty if True,
+                 and skipped if False.
+
+        Returns:
+            function: Takes a list and returns a sequence of values
+        """
+        indexes = list(indexes)
+        if not indexes:
+            return lambda row: ()
+        width = max(indexes) + 1
+        getter = itemgetter(*indexes)
+        if len(indexes) == 1:
+            single = getter
+
+            def getter(row):
+                # itemgetter of one index returns a value instead of a tuple
+                return (single(row),)
+
+        def project(row):
+            if len(row) >= width:
+                return getter(row)
+            # a short row
+            if pad:
+                return [row[i] if i < len(row) else "" for i in indexes]
+            return [row[i] for i in indexes if i < len(row)]
+
+        return project
 
     @staticmethod
     def get_column_names(src, enc="utf-8"):
@@ -129,3 +220,871 @@ class Csv(object):
             reader = csv.DictReader(f)
             columns = reader.fieldnames
         return columns
+
+
+class CsvEngine(object):
+    """
+    Reads, transforms and writes csv files. Selected by 'engine' argument of csv transforms.
+        stdlib: csv module. Default.
+        pandas: pandas.read_csv and DataFrame.to_csv, in chunks of CHUNK_ROWS rows.
+        pyarrow: Multithreaded csv reader and writer of pyarrow.
+                 Every row must have the same number of columns.
+                 Output files are always quoted, except 'quoting' is QUOTE_NONE.
+                 Falls back to stdlib if an output encoding is not utf-8.
+    All the values are read and written as strings.
+    """
+
+    STDLIB = "stdlib"
+    PANDAS = "pandas"
+    PYARROW = "pyarrow"
+
+    CHUNK_ROWS = 100000
+
+    def __init__(self):
+        self._logger = LisboaLog.get_logger(__name__)
+
+    @staticmethod
+    def create(name=None):
+        """
+        Args:
+            name: stdlib, pandas or pyarrow. stdlib if None.
+
+        Returns:
+            CsvEngine
+        """
+        engines = {
+            CsvEngine.STDLIB: StdlibCsvEngine,
+            CsvEngine.PANDAS: PandasCsvEngine,
+            CsvEngine.PYARROW: PyarrowCsvEngine,
+        }
+        engine = engines.get(name or CsvEngine.STDLIB)
+        if engine is None:
+            raise InvalidParameter(
+                "'engine' must be one of %s. %s" % (", ".join(engines.keys()), name)
+            )
+        if engine is PyarrowCsvEngine and importlib.util.find_spec("pyarrow") is None:
+            raise InvalidParameter("'engine' pyarrow requires pyarrow. pip install pyarrow")
+        return engine()
+
+    def convert(
+        self,
+        src,
+        dest,
+        encoding="utf-8",
+        delimiter=",",
+        dest_encoding=None,
+        dest_delimiter=None,
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\r\n",
+        columns=None,
+        headers=None,
+        header=True,
+    ):
+        """
+        Read a csv file, project and rename columns, and write it in another format
+
+        Args:
+            src: Input csv file name
+            dest: Output csv file name
+            encoding: Encoding of the input file
+            delimiter: Delimiter of the input file
+            dest_encoding: Encoding of the output file. Same as the input file if None.
+            dest_delimiter: Delimiter of the output file. Same as the input file if None.
+            quoting: csv.QUOTE_*
+            lineterminator: Newline of the output file
+            columns: Columns which remain in the order. Names, or indexes (from 0) which are
+                     skipped if a row does not have them. All the columns if None.
+            headers (dict): New column names by old column names
+            header: Write a header or not
+
+        Returns:
+            int: Number of rows except a header
+        """
+        raise NotImplementedError
+
+    def to_jsonl(self, src, dest, encoding="utf-8"):
+        """
+        Write rows of a csv file as json objects of column names and values
+
+        Returns:
+            int: Number of rows
+        """
+        raise NotImplementedError
+
+    def concat(self, srcs, dest, encoding="utf-8"):
+        """
+        Concat csv files. The output file has all the columns of the files in order of
+        appearance, and columns which a file does not have are empty.
+
+        Returns:
+            int: Number of rows except a header
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _read_header(src, encoding, delimiter=","):
+        with open(src, mode="r", encoding=encoding, newline="") as f:
+            return next(csv.reader(f, delimiter=delimiter), None)
+
+    @staticmethod
+    def _concat_header(src, encoding):
+        header = CsvEngine._read_header(src, encoding)
+        if header:
+            header[0] = header[0].lstrip("\ufeff")
+        return header
+
+    @staticmethod
+    def _indexes(header, columns):
+        """
+        Returns:
+            list: Indexes of columns
+        """
+        if columns is None:
+            return list(range(len(header or [])))
+        indexes = []
+        for c in columns:
+            if isinstance(c, int):
+                indexes.append(c)
+            elif header is None or c not in header:
+                raise InvalidParameter("Column %s does not exist in the header." % c)
+            else:
+                indexes.append(header.index(c))
+        return indexes
+
+    @staticmethod
+    def _union_columns(headers):
+        columns = []
+        for header in headers:
+            columns.extend(c for c in header or [] if c not in columns)
+        return columns
+
+
+class StdlibCsvEngine(CsvEngine):
+    """
+    csv module. Rows are read and written one by one.
+    """
+
+    def convert(
+        self,
+        src,
+        dest,
+        encoding="utf-8",
+        delimiter=",",
+        dest_encoding=None,
+        dest_delimiter=None,
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\r\n",
+        columns=None,
+        headers=None,
+        header=True,
+    ):
+        with open(src, mode="r", encoding=encoding, newline="") as i, open(
+            dest, mode="w", encoding=dest_encoding or encoding, newline=""
+        ) as o:
+            reader = csv.reader(i, delimiter=delimiter)
+            writer = csv.writer(
+                o,
+                delimiter=dest_delimiter or delimiter,
+                quoting=quoting,
+                lineterminator=lineterminator,
+            )
+            names = next(reader, None)
+            if names is None:
+                return 0
+            project = _projector(self._indexes(names, columns), columns)
+            return _convert_rows(reader, writer, project, names if header else None, headers)
+
+    def convert_parallel(
+        self, src, dest, max_workers, split_size_mb=64, worker_mode="process", **kwargs
+    ):
+        """
+        Same as convert, but a file is split into byte ranges of split_size_mb
+        at the ends of lines, and the ranges are converted in a pool of max_workers.
+        Converted ranges are appended to the output file in order.
+
+        A line must be a record to split a file. If a range has a quoted value
+        which contains newlines, or a file can not be split in bytes
+        (e.g. utf-16), the file is converted serially instead.
+        If the file has a valid CsvIndex, it is split at the indexed rows,
+        so quoted values can contain newlines.
+
+        Args:
+            max_workers: Number of ranges which are converted at once
+            split_size_mb: Approximate size of a range
+            worker_mode: process or thread
+            kwargs: Arguments of convert
+
+        Returns:
+            int: Number of rows except a header
+        """
+        encoding = kwargs.get("encoding", "utf-8")
+        delimiter = kwargs.get("delimiter", ",")
+        if not _is_byte_splittable(encoding, delimiter):
+            self._logger.warning("%s can not be split in %s. Convert serially." % (src, encoding))
+            return self.convert(src, dest, **kwargs)
+
+        size = max(int(split_size_mb or 1), 1) * 1024 * 1024
+        # a file is split exactly at rows by the sidecar index if it exists
+        index = CsvIndex.load(src, encoding, delimiter)
+        ranges = _split_ranges(src, size) if index is None else index.ranges(size)
+        names = self._read_header(src, encoding, delimiter)
+        if len(ranges) <= 1 or names is None:
+            return self.convert(src, dest, **kwargs)
+
+        columns = kwargs.get("columns")
+        options = {
+            "encoding": encoding,
+            "delimiter": delimiter,
+            "dest_encoding": kwargs.get("dest_encoding") or encoding,
+            "dest_delimiter": kwargs.get("dest_delimiter") or delimiter,
+            "quoting": kwargs.get("quoting", csv.QUOTE_MINIMAL),
+            "lineterminator": kwargs.get("lineterminator", "\r\n"),
+            "indexes": self._indexes(names, columns),
+            "columns": columns,
+            "headers": kwargs.get("headers"),
+            "header": kwargs.get("header", True),
+            "exact": index is not None,
+        }
+        self._logger.info("Convert %s in %s ranges." % (src, len(ranges)))
+        tmp_dir = tempfile.mkdtemp(prefix="cliboa_convert_")
+        try:
+            items = [
+                (src, start, end, os.path.join(tmp_dir, "part_%s" % i), options)
+                for i, (start, end) in enumerate(ranges)
+            ]
+            file = File()
+            with open(dest, mode="wb") as o:
+
+                def append(item, rows):
+                    file.append_file(item[3], o)
+                    os.remove(item[3])
+
+                results = ParallelMap(max_workers, worker_mode).run(
+                    _convert_range, items, append
+                )
+            return sum(results)
+        except _Unsplittable as e:
+            self._logger.warning("%s Convert serially." % e)
+            return self.convert(src, dest, **kwargs)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def to_jsonl(self, src, dest, encoding="utf-8"):
+        with open(src, mode="r", encoding=encoding, newline="") as i, jsonlines.open(
+            dest, mode="w"
+        ) as writer:
+            rows = 0
+            for row in csv.DictReader(i):
+                writer.write(row)
+                rows += 1
+            return rows
+
+    def concat(self, srcs, dest, encoding="utf-8"):
+        headers = [self._concat_header(s, encoding) for s in srcs]
+        columns = self._union_columns(headers)
+        with open(dest, mode="w", encoding=encoding, newline="") as o:
+            writer = csv.writer(o, lineterminator="\n")
+            writer.writerow(columns)
+            rows = 0
+            for src, header in zip(srcs, headers):
+                if header is None:
+                    continue
+                positions = [columns.index(c) for c in header]
+                with open(src, mode="r", encoding=encoding, newline="") as i:
+                    reader = csv.reader(i)
+                    next(reader, None)
+                    for row in reader:
+                        if not row:
+                            continue
+                        out = [""] * len(columns)
+                        for p, v in zip(positions, row):
+                            out[p] = v
+                        writer.writerow(out)
+                        rows += 1
+            return rows
+
+
+class PandasCsvEngine(CsvEngine):
+    """
+    pandas.read_csv and DataFrame.to_csv, in chunks of CHUNK_ROWS rows.
+    """
+
+    def _read(self, src, encoding, delimiter=",", **kwargs):
+        """
+        yield (pandas.DataFrame): Chunks of CHUNK_ROWS rows. The reader is closed at the end
+        """
+        import pandas
+
+        reader = pandas.read_csv(
+            src,
+            sep=delimiter,
+            encoding=encoding,
+            dtype=str,
+            keep_default_na=False,
+            chunksize=self.CHUNK_ROWS,
+            **kwargs
+        )
+        try:
+            yield from reader
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _to_csv(df, o, lineterminator, **kwargs):
+        """
+        DataFrame.to_csv, with the newline keyword of the installed pandas.
+        It is named line_terminator before pandas 1.5.
+        """
+        import pandas
+
+        version = tuple(int(v) for v in pandas.__version__.split(".")[:2])
+        key = "lineterminator" if version >= (1, 5) else "line_terminator"
+        kwargs[key] = lineterminator
+        df.to_csv(o, **kwargs)
+
+    def convert(
+        self,
+        src,
+        dest,
+        encoding="utf-8",
+        delimiter=",",
+        dest_encoding=None,
+        dest_delimiter=None,
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\r\n",
+        columns=None,
+        headers=None,
+        header=True,
+    ):
+        names = self._read_header(src, encoding, delimiter)
+        with open(dest, mode="w", encoding=dest_encoding or encoding, newline="") as o:
+            if names is None:
+                return 0
+            indexes = [i for i in self._indexes(names, columns) if i < len(names)]
+            rows = 0
+            first = True
+            for df in self._read(src, encoding, delimiter):
+                df = df.iloc[:, indexes]
+                if headers:
+                    df = df.rename(columns=headers)
+                self._to_csv(
+                    df,
+                    o,
+                    lineterminator,
+                    sep=dest_delimiter or delimiter,
+                    quoting=quoting,
+                    header=header and first,
+                    index=False,
+                )
+                rows += len(df)
+                first = False
+            return rows
+
+    def to_jsonl(self, src, dest, encoding="utf-8"):
+        rows = 0
+        with open(dest, mode="w", encoding="utf-8") as o:
+            if self._read_header(src, encoding) is None:
+                return 0
+            for df in self._read(src, encoding):
+                if len(df) == 0:
+                    continue
+                lines = df.to_json(orient="records", lines=True, force_ascii=False)
+                o.write(lines if lines.endswith("\n") else lines + "\n")
+                rows += len(df)
+        return rows
+
+    def concat(self, srcs, dest, encoding="utf-8"):
+        headers = [self._concat_header(s, encoding) for s in srcs]
+        columns = self._union_columns(headers)
+        rows = 0
+        with open(dest, mode="w", encoding=encoding, newline="") as o:
+            csv.writer(o, lineterminator="\n").writerow(columns)
+            for src, header in zip(srcs, headers):
+                if header is None:
+                    continue
+                for df in self._read(src, encoding):
+                    df = df.reindex(columns=columns, fill_value="")
+                    self._to_csv(df, o, "\n", header=False, index=False)
+                    rows += len(df)
+        return rows
+
+
+class PyarrowCsvEngine(CsvEngine):
+    """
+    Multithreaded csv reader and writer of pyarrow. Rows are read and written in record batches.
+    """
+
+    _QUOTING = {
+        csv.QUOTE_MINIMAL: "needed",
+        csv.QUOTE_ALL: "all_valid",
+        # all the values are strings
+        csv.QUOTE_NONNUMERIC: "all_valid",
+        csv.QUOTE_NONE: "none",
+    }
+
+    def _open(self, src, encoding, delimiter=","):
+        """
+        Returns:
+            tuple: (column names, generator of record batches of strings)
+                   (None, None) if the file is empty
+        """
+        import pyarrow
+        import pyarrow.csv as pcsv
+
+        names = self._read_header(src, encoding, delimiter)
+        if names is None:
+            return None, None
+
+        def batches():
+            try:
+                reader = pcsv.open_csv(
+                    src,
+                    read_options=pcsv.ReadOptions(
+                        encoding=encoding, column_names=names, skip_rows=1
+                    ),
+                    parse_options=pcsv.ParseOptions(
+                        delimiter=delimiter, newlines_in_values=True
+                    ),
+                    convert_options=pcsv.ConvertOptions(
+                        column_types={n: pyarrow.string() for n in names},
+                        strings_can_be_null=False,
+                        quoted_strings_can_be_null=False,
+                    ),
+                )
+                yield from reader
+            except pyarrow.ArrowInvalid as e:
+                raise InvalidFormat("%s can not be read by pyarrow. %s" % (src, e))
+
+        return names, batches()
+
+    def _is_utf8(self, encoding):
+        return codecs.lookup(encoding).name == "utf-8"
+
+    def convert(
+        self,
+        src,
+        dest,
+        encoding="utf-8",
+        delimiter=",",
+        dest_encoding=None,
+        dest_delimiter=None,
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\r\n",
+        columns=None,
+        headers=None,
+        header=True,
+    ):
+        if not self._is_utf8(dest_encoding or encoding):
+            self._logger.warning("pyarrow writes only utf-8. Use stdlib instead.")
+            return StdlibCsvEngine().convert(
+                src, dest, encoding, delimiter, dest_encoding, dest_delimiter,
+                quoting, lineterminator, columns, headers, header,
+            )
+
+        import pyarrow
+        import pyarrow.csv as pcsv
+
+        names, reader = self._open(src, encoding, delimiter)
+        if names is None:
+            open(dest, mode="w").close()
+            return 0
+        indexes = [i for i in self._indexes(names, columns) if i < len(names)]
+        out_names = [names[i] for i in indexes]
+        if headers:
+            out_names = [headers.get(n, n) for n in out_names]
+        # column names can be duplicated
+        schema = pyarrow.schema([(n, pyarrow.string()) for n in out_names])
+        options = pcsv.WriteOptions(
+            include_header=header,
+            delimiter=dest_delimiter or delimiter,
+            eol=lineterminator,
+            quoting_style=self._QUOTING[quoting],
+            quoting_header=self._QUOTING[quoting],
+        )
+        rows = 0
+        with pcsv.CSVWriter(dest, schema, write_options=options) as writer:
+            for batch in reader:
+                batch = pyarrow.RecordBatch.from_arrays(
+                    [batch.column(i) for i in indexes], schema=schema
+                )
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+
+    def to_jsonl(self, src, dest, encoding="utf-8"):
+        names, reader = self._open(src, encoding)
+        rows = 0
+        with jsonlines.open(dest, mode="w") as writer:
+            if names is None:
+                return 0
+            for batch in reader:
+                writer.write_all(batch.to_pylist())
+                rows += batch.num_rows
+        return rows
+
+    def concat(self, srcs, dest, encoding="utf-8"):
+        if not self._is_utf8(encoding):
+            self._logger.warning("pyarrow writes only utf-8. Use stdlib instead.")
+            return StdlibCsvEngine().concat(srcs, dest, encoding)
+
+        import pyarrow
+        import pyarrow.csv as pcsv
+
+        headers = [self._concat_header(s, encoding) for s in srcs]
+        columns = self._union_columns(headers)
+        schema = pyarrow.schema([(n, pyarrow.string()) for n in columns])
+        rows = 0
+        with pcsv.CSVWriter(dest, schema) as writer:
+            for src, header in zip(srcs, headers):
+                names, reader = self._open(src, encoding)
+                if names is None:
+                    continue
+                names = header
+                for batch in reader:
+                    arrays = [
+                        batch.column(names.index(c))
+                        if c in names
+                        else pyarrow.array([""] * batch.num_rows, pyarrow.string())
+                        for c in columns
+                    ]
+                    writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+                    rows += batch.num_rows
+        return rows
+
+
+class CsvIndex(object):
+    """
+    Byte offsets of every INTERVAL rows of a csv file, for random access to rows.
+
+    The index is saved to a sidecar file (.$file_name.idx in the same directory),
+    with the header, delimiter, encoding and number of rows of the csv file.
+    The sidecar file is invalid once size or modification time of the csv file is changed.
+    The first record of a csv file is the header, and rows are counted from 0 after it.
+    """
+
+    INTERVAL = 10000
+
+    _MAGIC = b"CLIBOAIDX1"
+
+    def __init__(self, path, meta, offsets):
+        self._path = path
+        self._meta = meta
+        self._offsets = offsets
+
+    @property
+    def header(self):
+        return self._meta["header"]
+
+    @property
+    def rows(self):
+        return self._meta["rows"]
+
+    @property
+    def data_start(self):
+        """
+        Byte offset of the first row, i.e. size of the header
+        """
+        return self._meta["data_start"]
+
+    @staticmethod
+    def sidecar_path(path):
+        return os.path.join(os.path.dirname(path), ".%s.idx" % os.path.basename(path))
+
+    @classmethod
+    def get(cls, path, encoding="utf-8", delimiter=",", interval=INTERVAL):
+        """
+        Load the sidecar file of a csv file, or build it if it is missing or invalid.
+
+        Returns:
+            CsvIndex
+        """
+        index = cls.load(path, encoding, delimiter)
+        if index is None:
+            index = cls.build(path, encoding, delimiter, interval)
+        return index
+
+    @classmethod
+    def load(cls, path, encoding="utf-8", delimiter=","):
+        """
+        Returns:
+            CsvIndex: None if the sidecar file is missing or invalid
+        """
+        sidecar = cls.sidecar_path(path)
+        if not os.path.exists(sidecar):
+            return None
+        try:
+            with open(sidecar, "rb") as f:
+                if f.read(len(cls._MAGIC)) != cls._MAGIC:
+                    return None
+                length = int.from_bytes(f.read(4), "little")
+                meta = json.loads(f.read(length).decode("utf-8"))
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        stat = os.stat(path)
+        if (
+            meta["size"] != stat.st_size
+            or meta["mtime_ns"] != stat.st_mtime_ns
+            or meta["encoding"] != codecs.lookup(encoding).name
+            or meta["delimiter"] != delimiter
+        ):
+            return None
+        return cls(path, meta, offsets)
+
+    @classmethod
+    def build(cls, path, encoding="utf-8", delimiter=",", interval=INTERVAL):
+        """
+        Scan a csv file and write the sidecar file.
+
+        Returns:
+            CsvIndex
+        """
+        if not _is_byte_splittable(encoding, delimiter):
+            raise InvalidParameter("Rows of %s can not be indexed in bytes." % encoding)
+        interval = max(int(interval or 1), 1)
+        stat = os.stat(path)
+        offsets = array("Q")
+        rows = 0
+        with open(path, "rb") as f:
+            records = _records(f, encoding, delimiter)
+            header, data_start = next(records, (None, 0))
+            offsets.append(data_start)
+            for _, end in records:
+                rows += 1
+                if rows % interval == 0:
+                    offsets.append(end)
+        meta = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "encoding": codecs.lookup(encoding).name,
+            "delimiter": delimiter,
+            "quotechar": '"',
+            "interval": interval,
+            "rows": rows,
+            "header": header,
+            "data_start": data_start,
+        }
+        data = json.dumps(meta).encode("utf-8")
+        sidecar = cls.sidecar_path(path)
+        temp_file = "%s.%s.tmp" % (sidecar, os.getpid())
+        with open(temp_file, "wb") as f:
+            f.write(cls._MAGIC)
+            f.write(len(data).to_bytes(4, "little"))
+            f.write(data)
+            offsets.tofile(f)
+        os.replace(temp_file, sidecar)
+        return cls(path, meta, offsets)
+
+    def offset(self, row):
+        """
+        Args:
+            row: Row number from 0. Same as rows for the end of the file.
+
+        Returns:
+            int: Byte offset where the row starts
+        """
+        if row < 0 or row > self.rows:
+            raise InvalidParameter("Row %s is out of range. %s rows" % (row, self.rows))
+        if row == self.rows:
+            return self._meta["size"]
+        interval = self._meta["interval"]
+        start = self._offsets[row // interval]
+        skip = row % interval
+        if skip == 0:
+            return start
+        with open(self._path, "rb") as f:
+            f.seek(start)
+            records = _records(f, self._meta["encoding"], self._meta["delimiter"])
+            for i, (_, end) in enumerate(records):
+                if i + 1 == skip:
+                    return end
+
+    def ranges(self, size):
+        """
+        Args:
+            size: Approximate bytes of a range
+
+        Returns:
+            list: (start, end) bytes of ranges which start at rows.
+                  The first range starts at 0, and contains the header.
+        """
+        ranges = []
+        start = 0
+        for offset in self._offsets[1:]:
+            if offset - start >= size:
+                ranges.append((start, offset))
+                start = offset
+        if start < self._meta["size"] or not ranges:
+            ranges.append((start, self._meta["size"]))
+        return ranges
+
+
+def _records(f, encoding, delimiter):
+    """
+    Args:
+        f: File object in binary mode, which is at the start of a record
+
+    Yields:
+        tuple: (record, byte offset of the end of the record)
+    """
+    pos = f.tell()
+
+    def lines():
+        nonlocal pos
+        for line in f:
+            pos += len(line)
+            yield line.decode(encoding)
+
+    # csv reader does not read lines ahead, so pos is the end of the last record
+    for row in csv.reader(lines(), delimiter=delimiter):
+        yield row, pos
+
+
+class _Unsplittable(Exception):
+    """
+    A range of a file does not end at the end of a record
+    """
+
+
+def _is_byte_splittable(encoding, delimiter):
+    """
+    Whether newlines, quotes and the delimiter are single bytes which do not appear
+    in other characters, so that a file can be split at newlines in bytes.
+    """
+    try:
+        codec = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    return (
+        codec in _BYTE_SPLITTABLE
+        and '\n\r"'.encode(encoding) == b'\n\r"'
+        and len(delimiter.encode(encoding)) == 1
+    )
+
+
+# ascii compatible encodings whose multibyte characters do not contain ascii bytes
+_BYTE_SPLITTABLE = (
+    "ascii",
+    "utf-8",
+    "utf-8-sig",
+    "latin-1",
+    "iso8859-1",
+    "cp1252",
+    "cp932",
+    "shift_jis",
+    "euc_jp",
+)
+
+
+def _split_ranges(path, size):
+    """
+    Returns:
+        list: (start, end) bytes of ranges, which end at the ends of lines
+    """
+    total = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < total:
+            if start + size >= total:
+                ranges.append((start, total))
+                break
+            f.seek(start + size - 1)
+            # the rest of the line, which can be the end of the file
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _convert_range(src, start, end, dest, options):
+    """
+    Convert bytes of a file from start to end. The header is converted if start is 0.
+    Raises _Unsplittable if the range may not end at the end of a record, unless it is exact.
+
+    Returns:
+        int: Number of rows except a header
+    """
+    with open(src, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    text = data.decode(options["encoding"])
+    data = None
+    reader = _LastRow(csv.reader(io.StringIO(text, newline=""), delimiter=options["delimiter"]))
+    with open(dest, mode="w", encoding=options["dest_encoding"], newline="") as o:
+        writer = csv.writer(
+            o,
+            delimiter=options["dest_delimiter"],
+            quoting=options["quoting"],
+            lineterminator=options["lineterminator"],
+        )
+        project = _projector(options["indexes"], options["columns"])
+        names = None
+        if start == 0:
+            names = next(reader)
+            if not options["header"]:
+                names = None
+        rows = _convert_rows(reader, writer, project, names, options["headers"])
+    if options["exact"]:
+        return rows
+    records = rows + (1 if start == 0 else 0)
+    # a quoted value which is not closed at the end of the range ends with a newline
+    if reader.line_num != records or (reader.last and reader.last[-1].endswith(("\n", "\r"))):
+        raise _Unsplittable(
+            "Bytes %s-%s of %s have quoted values which contain newlines." % (start, end, src)
+        )
+    return rows
+
+
+class _LastRow(object):
+    """
+    csv reader which keeps the last row
+    """
+
+    def __init__(self, reader):
+        self._reader = reader
+        self.last = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.last = next(self._reader)
+        return self.last
+
+    @property
+    def line_num(self):
+        return self._reader.line_num
+
+
+def _convert_rows(reader, writer, project, names, headers):
+    """
+    Args:
+        names: Header which is written. None if no header is written.
+
+    Returns:
+        int: Number of rows except a header
+    """
+    if names is not None:
+        names = project(names)
+        if headers:
+            names = [headers.get(n, n) for n in names]
+        writer.writerow(names)
+    rows = 0
+    for row in reader:
+        writer.writerow(project(row))
+        rows += 1
+    return rows
+
+
+def _projector(indexes, columns):
+    """
+    Returns:
+        function: Takes a row and returns values of the indexes
+    """
+    if columns is None:
+        return lambda row: row
+    # column numbers which a row does not have are skipped, and names are empty
+    return Csv.projector(indexes, pad=not all(isinstance(c, int) for c in columns))
@@ -79,3 +79,69 @@ class File(object):
             with open(dest, "w", encoding=encoding_to, errors=errors) as output:
                 for i in input:
                     output.write(i)
+
+    def append_file(self, src, output, offset=0, end=None):
+        """
+        Append contents of a file to a file object, without reading them into python.
+        Contents are copied in kernel by os.copy_file_range or os.sendfile if available.
+
+        Args:
+            src (str): Source file name
+            output: File object opened in binary write mode
+            offset (int): Bytes of the source file which are skipped
+            end (int): Bytes of the source file which are copied up to. The end of the file if None.
+
+        Returns:
+            int: Copied bytes
+        """
+        output.flush()
+        with open(src, "rb") as i:
+            size = os.fstat(i.fileno()).st_size
+            if end is not None:
+                size = min(size, end)
+            pos = offset
+            for copy in (_copy_file_range, _sendfile):
+                if pos >= size:
+                    break
+                pos = copy(i.fileno(), output.fileno(), pos, size)
+            # position of the file object may be stale after copied in kernel
+            output.seek(0, os.SEEK_END)
+            if pos < size:
+                i.seek(pos)
+                while pos < size:
+                    data = i.read(min(1024 * 1024, size - pos))
+                    if not data:
+                        break
+                    output.write(data)
+                    pos += len(data)
+        return max(size - offset, 0)
+
+
+def _copy_file_range(src_fd, dest_fd, pos, size):
+    if not hasattr(os, "copy_file_range"):
+        return pos
+    while pos < size:
+        try:
+            copied = os.copy_file_range(src_fd, dest_fd, size - pos, pos)
+        except OSError:
+            # e.g. not supported by the file system. The rest is copied in another way.
+            break
+        if copied == 0:
+            break
+        pos += copied
+    return pos
+
+
+def _sendfile(src_fd, dest_fd, pos, size):
+    if not hasattr(os, "sendfile"):
+        return pos
+    while pos < size:
+        try:
+            copied = os.sendfile(dest_fd, src_fd, pos, size - pos)
+        except OSError:
+            # e.g. not supported by the file system. The rest is copied in another way.
+            break
+        if copied == 0:
+            break
+        pos += copied
+    return pos
@@ -0,0 +1,222 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import pickle
+import shutil
+import tempfile
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.lisboa_log import LisboaLog
+
+__all__ = ["ExternalJoin"]
+
+
+class ExternalJoin(object):
+    """
+    Join rows of two inputs which do not fit in memory.
+
+    The rows of one side (right, or left for a right join) are loaded into a hash table,
+    and the rows of the other side are looked up in the order of the input (broadcast hash join).
+    If the rows do not fit in memory_budget_mb, both sides are partitioned to temporary files
+    by hashes of the keys, and each pair of the partitions is joined in the same way
+    (partitioned hash join). Partitions which are still too large are partitioned again.
+    In this case the order of the rows is not kept.
+
+    how
+        inner: rows whose keys are in both sides
+        left: all rows of the left side, and matched rows of the right side
+        right: all rows of the right side, and matched rows of the left side
+        outer: all rows of both sides
+        anti: rows of the left side whose keys are not in the right side
+    """
+
+    INNER = "inner"
+    LEFT = "left"
+    RIGHT = "right"
+    OUTER = "outer"
+    ANTI = "anti"
+    HOWS = (INNER, LEFT, RIGHT, OUTER, ANTI)
+
+    # Number of partitions which a side is divided into at once
+    PARTITIONS = 64
+    # Partitions are not divided any more after this depth, e.g. rows of the same key
+    MAX_DEPTH = 3
+    # Rows which are pickled at once in a partition file
+    BATCH_SIZE = 1000
+
+    def __init__(self, how=INNER, memory_budget_mb=256):
+        """
+        Args:
+            how: inner, left, right, outer or anti
+            memory_budget_mb: Approximate memory of rows which are loaded into a hash table
+        """
+        if how not in self.HOWS:
+            raise InvalidParameter("'how' must be one of %s. %s" % (", ".join(self.HOWS), how))
+        self._logger = LisboaLog.get_logger(__name__)
+        self._how = how
+        self._budget = max(int(memory_budget_mb or 1), 1) * 1024 * 1024
+
+    def join(self, left, right, left_key, right_key):
+        """
+        Args:
+            left: Function which returns an iterable of rows of the left side.
+                  It can be called more than once.
+            right: Same as left, of the right side
+            left_key: Function which returns a key of a row of the left side
+            right_key: Same as left_key, of the right side
+
+        Yields:
+            tuple: (left row or None, right row or None).
+                   Right rows are always None if how is anti.
+        """
+        if self._how == self.RIGHT:
+            for r, l in self._join(right, left, right_key, left_key, 0):
+                yield l, r
+        else:
+            yield from self._join(left, right, left_key, right_key, 0)
+
+    @property
+    def _keep_probe(self):
+        return self._how in (self.LEFT, self.RIGHT, self.OUTER, self.ANTI)
+
+    @property
+    def _keep_build(self):
+        return self._how == self.OUTER
+
+    def _join(self, probe, build, probe_key, build_key, depth):
+        table = self._load(build(), build_key, depth < self.MAX_DEPTH)
+        if table is None:
+            self._logger.info(
+                "Rows exceed the memory budget. Join partitions (depth %s)." % (depth + 1)
+            )
+            yield from self._join_partitions(probe, build, probe_key, build_key, depth)
+            return
+        if depth == 0:
+            self._logger.info("Rows are joined in memory.")
+        yield from self._probe(table, probe(), probe_key)
+
+    def _load(self, rows, key, limit):
+        """
+        Returns:
+            dict: Lists of rows by keys. None if the rows exceed the memory budget.
+        """
+        table = {}
+        size = 0
+        keys_only = self._how == self.ANTI
+        for row in rows:
+            k = key(row)
+            if keys_only:
+                table[k] = None
+                size += 64 + len(k)
+            else:
+                table.setdefault(k, []).append(row)
+                # rough size of a list of strings
+                size += 64 + 57 * len(row) + sum(map(len, row))
+            if limit and size > self._budget:
+                return None
+        if not limit and size > self._budget:
+            self._logger.warning(
+                "Rows of the same keys exceed the memory budget. They are loaded anyway."
+            )
+        return table
+
+    def _probe(self, table, rows, key):
+        matched = set() if self._keep_build else None
+        for row in rows:
+            k = key(row)
+            if k not in table:
+                if self._keep_probe:
+                    yield row, None
+                continue
+            if self._how == self.ANTI:
+                continue
+            if matched is not None:
+                matched.add(k)
+            for b in table[k]:
+                yield row, b
+        if matched is not None:
+            for k, group in table.items():
+                if k not in matched:
+                    for b in group:
+                        yield None, b
+
+    def _join_partitions(self, probe, build, probe_key, build_key, depth):
+        tmp_dir = tempfile.mkdtemp(prefix="cliboa_join_")
+        try:
+            build_parts = _partition(build(), build_key, depth, tmp_dir, "build")
+            probe_parts = _partition(probe(), probe_key, depth, tmp_dir, "probe")
+            for b, p in zip(build_parts, probe_parts):
+                if p is None and not self._keep_build:
+                    continue
+                if b is None and not self._keep_probe:
+                    continue
+                yield from self._join(
+                    lambda p=p: _read_partition(p),
+                    lambda b=b: _read_partition(b),
+                    probe_key,
+                    build_key,
+                    depth + 1,
+                )
+                for path in (b, p):
+                    if path is not None:
+                        os.remove(path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _partition(rows, key, depth, tmp_dir, name):
+    """
+    Returns:
+        list: Paths of partition files. None for empty partitions.
+    """
+    n = ExternalJoin.PARTITIONS
+    paths = [None] * n
+    files = [None] * n
+    batches = [[] for _ in range(n)]
+    try:
+        for row in rows:
+            # salt by depth, so that rows of a partition are divided again
+            i = hash((depth, key(row))) % n
+            batch = batches[i]
+            batch.append(row)
+            if len(batch) >= ExternalJoin.BATCH_SIZE:
+                if files[i] is None:
+                    paths[i] = os.path.join(tmp_dir, "%s_%s_%s" % (name, depth, i))
+                    files[i] = open(paths[i], "wb")
+                pickle.dump(batch, files[i], protocol=pickle.HIGHEST_PROTOCOL)
+                batches[i] = []
+        for i, batch in enumerate(batches):
+            if not batch:
+                continue
+            if files[i] is None:
+                paths[i] = os.path.join(tmp_dir, "%s_%s_%s" % (name, depth, i))
+                files[i] = open(paths[i], "wb")
+            pickle.dump(batch, files[i], protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        for f in files:
+            if f is not None:
+                f.close()
+    return paths
+
+
+def _read_partition(path):
+    if path is None:
+        return
+    with open(path, "rb") as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
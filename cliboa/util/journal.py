@@ -0,0 +1,309 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from cliboa.conf import env
+from cliboa.util.cache import ObjectStore, StepArgument
+from cliboa.util.config import CliboaConfig
+from cliboa.util.lisboa_log import LisboaLog
+
+global _RUN_JOURNAL
+_RUN_JOURNAL = None
+
+
+class RunJournal(object):
+    """
+    Journal of scenario executions, stored in a sqlite file under the project directory.
+
+    Records start, success and completion of each step, the arguments of the step
+    and the values which the step put to ObjectStore.
+    When a scenario is resumed, steps which succeeded in the last unfinished execution
+    with the same arguments are skipped, and their ObjectStore values are restored.
+    Steps are identified by the step name and the class name.
+    """
+
+    FILE_NAME = ".cliboa_journal.db"
+
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, path, project):
+        """
+        Args:
+            path (str): Path of the sqlite file
+            project (str): Project name
+        """
+        self._logger = LisboaLog.get_logger(__name__)
+        self._path = path
+        self._project = project
+        self._run_id = None
+        self._resumed_from = None
+        self._create_tables()
+
+    @staticmethod
+    def get():
+        """
+        Returns:
+            RunJournal of the current scenario execution. None if journal is disabled.
+        """
+        return _RUN_JOURNAL
+
+    @staticmethod
+    def set(journal):
+        global _RUN_JOURNAL
+        _RUN_JOURNAL = journal
+
+    @property
+    def run_id(self):
+        return self._run_id
+
+    @property
+    def resumed_from(self):
+        return self._resumed_from
+
+    def _connect(self):
+        # A connection is opened on every call,
+        # since steps may record from threads or forked processes.
+        return closing(sqlite3.connect(self._path, timeout=60))
+
+    def _create_tables(self):
+        with self._connect() as con, con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS run ("
+                "run_id INTEGER PRIMARY KEY AUTOINCREMENT, project TEXT, resumed_from INTEGER,"
+                " status TEXT, started_at TEXT, finished_at TEXT)"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS step ("
+                "run_id INTEGER, step_key TEXT, step TEXT, class TEXT, arguments TEXT,"
+                " arguments_hash TEXT, status TEXT, started_at TEXT, succeeded_at TEXT,"
+                " completed_at TEXT, PRIMARY KEY (run_id, step_key))"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS object ("
+                "run_id INTEGER, step_key TEXT, key TEXT, value BLOB,"
+                " PRIMARY KEY (run_id, step_key, key))"
+            )
+
+    def start_run(self, resume=False):
+        """
+        Record start of a scenario execution
+
+        Args:
+            resume (bool): Resume the last unfinished execution of the project
+        """
+        with self._connect() as con, con:
+            if resume:
+                row = con.execute(
+                    "SELECT run_id, status FROM run WHERE project = ?"
+                    " ORDER BY run_id DESC LIMIT 1",
+                    (self._project,),
+                ).fetchone()
+                if row is None or row[1] == self.SUCCEEDED:
+                    self._logger.info("No unfinished execution to resume.")
+                else:
+                    self._resumed_from = row[0]
+                    self._logger.info("Resume the execution run_id=%s." % row[0])
+
+            cur = con.execute(
+                "INSERT INTO run (project, resumed_from, status, started_at)"
+                " VALUES (?, ?, ?, ?)",
+                (self._project, self._resumed_from, self.RUNNING, self._now()),
+            )
+            self._run_id = cur.lastrowid
+
+    def finish_run(self, succeeded):
+        """
+        Record end of a scenario execution
+        """
+        with self._connect() as con, con:
+            con.execute(
+                "UPDATE run SET status = ?, finished_at = ? WHERE run_id = ?",
+                (
+                    self.SUCCEEDED if succeeded else self.FAILED,
+                    self._now(),
+                    self._run_id,
+                ),
+            )
+
+    def resume_step(self, step):
+        """
+        If the step succeeded in the resumed execution with the same arguments,
+        restore the values it put to ObjectStore and record it as skipped.
+
+        Returns:
+            bool: True if the step can be skipped
+        """
+        if self._resumed_from is None:
+            return False
+
+        key = self._step_key(step)
+        arguments, arguments_hash = self._arguments(step)
+        with self._connect() as con, con:
+            row = con.execute(
+                "SELECT arguments_hash FROM step WHERE run_id = ? AND step_key = ?"
+                " AND status IN (?, ?)",
+                (self._resumed_from, key, self.SUCCEEDED, self.SKIPPED),
+            ).fetchone()
+            if row is None or row[0] != arguments_hash:
+                return False
+
+            objects = con.execute(
+                "SELECT key, value FROM object WHERE run_id = ? AND step_key = ?",
+                (self._resumed_from, key),
+            ).fetchall()
+            for k, v in objects:
+                ObjectStore.put(k, pickle.loads(v))
+
+            now = self._now()
+            con.execute(
+                "INSERT OR REPLACE INTO step VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._run_id,
+                    key,
+                    step._step,
+                    step.__class__.__name__,
+                    arguments,
+                    arguments_hash,
+                    self.SKIPPED,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            con.executemany(
+                "INSERT OR REPLACE INTO object VALUES (?, ?, ?, ?)",
+                [(self._run_id, key, k, v) for k, v in objects],
+            )
+        return True
+
+    def start_step(self, step):
+        """
+        Record start of a step, and start to record values put to ObjectStore
+        """
+        arguments, arguments_hash = self._arguments(step)
+        with self._connect() as con, con:
+            con.execute(
+                "INSERT OR REPLACE INTO step (run_id, step_key, step, class, arguments,"
+                " arguments_hash, status, started_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._run_id,
+                    self._step_key(step),
+                    step._step,
+                    step.__class__.__name__,
+                    arguments,
+                    arguments_hash,
+                    self.RUNNING,
+                    self._now(),
+                ),
+            )
+        ObjectStore.start_recording()
+
+    def succeed_step(self, step):
+        """
+        Record success of a step with the values it put to ObjectStore
+        """
+        key = self._step_key(step)
+        objects = []
+        status = self.SUCCEEDED
+        for k in ObjectStore.stop_recording():
+            try:
+                objects.append((self._run_id, key, k, pickle.dumps(ObjectStore.get(k))))
+            except Exception as e:
+                # The step can not be restored without the value
+                self._logger.warning("ObjectStore value %s can not be recorded. %s" % (k, e))
+                status = self.FAILED
+
+        with self._connect() as con, con:
+            con.execute(
+                "UPDATE step SET status = ?, succeeded_at = ? WHERE run_id = ? AND step_key = ?",
+                (status, self._now(), self._run_id, key),
+            )
+            con.executemany("INSERT OR REPLACE INTO object VALUES (?, ?, ?, ?)", objects)
+
+    def fail_step(self, step):
+        """
+        Record failure of a step
+        """
+        ObjectStore.stop_recording()
+        with self._connect() as con, con:
+            con.execute(
+                "UPDATE step SET status = ? WHERE run_id = ? AND step_key = ?",
+                (self.FAILED, self._run_id, self._step_key(step)),
+            )
+
+    def complete_step(self, step):
+        """
+        Record completion of a step, no matter the step succeeded or not
+        """
+        with self._connect() as con, con:
+            con.execute(
+                "UPDATE step SET completed_at = ? WHERE run_id = ? AND step_key = ?",
+                (self._now(), self._run_id, self._step_key(step)),
+            )
+
+    def _step_key(self, step):
+        return "%s:%s" % (step._step, step.__class__.__name__)
+
+    def _arguments(self, step):
+        """
+        Returns:
+            tuple:
+                - arguments as json. Values which match to the logging mask are masked.
+                - hash of the arguments before masked
+        """
+        mask = CliboaConfig.get("logging", "mask")
+        pattern = re.compile(mask) if mask else None
+
+        arguments = StepArgument.normalize(step)
+        raw = json.dumps(arguments, sort_keys=True)
+        masked = {
+            k: ("****" if pattern is not None and pattern.search(k) else v)
+            for k, v in arguments.items()
+        }
+        return (
+            json.dumps(masked, sort_keys=True),
+            hashlib.sha256(raw.encode("utf-8")).hexdigest(),
+        )
+
+    def _now(self):
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    @staticmethod
+    def create(project_name, resume=False):
+        """
+        Create a journal of the project if it is enabled in cliboa.ini or resume is True
+
+        Args:
+            project_name (str): Project name
+            resume (bool): Whether the execution is resumed by --resume option
+
+        Returns:
+            RunJournal, or None if the journal is disabled
+        """
+        if not resume and not CliboaConfig.getboolean("journal", "enabled"):
+            return None
+        pj_dir = os.path.join(env.PROJECT_DIR, project_name)
+        if not os.path.isdir(pj_dir):
+            return None
+        return RunJournal(os.path.join(pj_dir, RunJournal.FILE_NAME), project_name)
@@ -0,0 +1,301 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import json
+import os
+import tempfile
+import threading
+import time
+
+from cliboa.conf import env
+from cliboa.util.config import CliboaConfig
+from cliboa.util.lisboa_log import LisboaLog
+
+_STEP_METRICS = threading.local()
+
+global _METRICS_RUN
+_METRICS_RUN = None
+
+
+class Metrics(object):
+    """
+    Metrics of scenario and step executions.
+
+    Steps add the number of processed rows and transferred bytes by
+    Metrics.add_rows() and Metrics.add_bytes(). They are recorded per step by StepStatusListener,
+    and written in Prometheus text exposition format by ScenarioStatusListener
+    at the end of the scenario (e.g. for textfile collector of node_exporter).
+
+    Settings are in [metrics] section of cliboa.ini.
+        enabled: Record metrics or not
+        path: Output file (*.prom), or directory of cliboa_$project_name.prom. Default is logs.
+        buckets: Comma separated upper bounds (seconds) of the step duration histogram
+    """
+
+    _DEFAULT_BUCKETS = [1, 5, 10, 30, 60, 300, 600, 1800, 3600]
+
+    @staticmethod
+    def add_rows(count):
+        """
+        Add the number of rows which the current step processed
+        """
+        _STEP_METRICS.rows = getattr(_STEP_METRICS, "rows", 0) + count
+
+    @staticmethod
+    def add_bytes(count):
+        """
+        Add the number of bytes which the current step transferred or wrote
+        """
+        _STEP_METRICS.bytes = getattr(_STEP_METRICS, "bytes", 0) + count
+
+    @staticmethod
+    def add_file_bytes(path):
+        """
+        Add the size of a file which the current step transferred or wrote
+        """
+        if _METRICS_RUN is None or not os.path.isfile(path):
+            return
+        Metrics.add_bytes(os.path.getsize(path))
+
+    @staticmethod
+    def pop_counts():
+        """
+        Returns the number of rows and bytes added in the current thread, and reset them.
+        Used to carry the counts of a worker of a step to the step.
+
+        Returns:
+            tuple: (rows, bytes)
+        """
+        counts = (getattr(_STEP_METRICS, "rows", 0), getattr(_STEP_METRICS, "bytes", 0))
+        _STEP_METRICS.rows = 0
+        _STEP_METRICS.bytes = 0
+        return counts
+
+    @staticmethod
+    def start(project_name):
+        """
+        Start to record metrics of a scenario execution, if enabled in cliboa.ini
+        """
+        global _METRICS_RUN
+        if not CliboaConfig.getboolean("metrics", "enabled"):
+            _METRICS_RUN = None
+            return
+        fd, spool = tempfile.mkstemp(prefix=".cliboa_metrics_", suffix=".jsonl")
+        os.close(fd)
+        # Inherited by the processes of parallel blocks
+        _METRICS_RUN = {"project": project_name, "spool": spool, "started_at": time.time()}
+
+    @staticmethod
+    def start_step():
+        _STEP_METRICS.rows = 0
+        _STEP_METRICS.bytes = 0
+        _STEP_METRICS.started_at = time.time()
+        _STEP_METRICS.succeeded = False
+
+    @staticmethod
+    def succeed_step():
+        _STEP_METRICS.succeeded = True
+
+    @staticmethod
+    def finish_step(step):
+        """
+        Record metrics of the step
+        """
+        run = _METRICS_RUN
+        started_at = getattr(_STEP_METRICS, "started_at", None)
+        if run is None or started_at is None:
+            return
+        _STEP_METRICS.started_at = None
+        record = {
+            "step": getattr(step, "_step", None) or "",
+            "class": step.__class__.__name__,
+            "succeeded": _STEP_METRICS.succeeded,
+            "duration": time.time() - started_at,
+            "rows": _STEP_METRICS.rows,
+            "bytes": _STEP_METRICS.bytes,
+        }
+        Metrics._append(run, record)
+
+    @staticmethod
+    def skip_step(step):
+        """
+        Record the step which was skipped since it succeeded in the resumed execution
+        """
+        run = _METRICS_RUN
+        if run is None:
+            return
+        record = {
+            "step": getattr(step, "_step", None) or "",
+            "class": step.__class__.__name__,
+            "succeeded": True,
+            "skipped": True,
+            "duration": 0,
+            "rows": 0,
+            "bytes": 0,
+        }
+        Metrics._append(run, record)
+
+    @staticmethod
+    def _append(run, record):
+        with open(run["spool"], "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def write():
+        """
+        Write the metrics of the scenario execution
+
+        Returns:
+            str: Path of the metrics file. None if metrics are disabled.
+        """
+        global _METRICS_RUN
+        run = _METRICS_RUN
+        if run is None:
+            return None
+        _METRICS_RUN = None
+
+        records = []
+        with open(run["spool"], "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        os.remove(run["spool"])
+
+        path = Metrics._path(run["project"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Rename a complete file, so that the collector never reads a partial file
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(Metrics._exposition(run, records))
+        os.chmod(temp_file, 0o644)
+        os.replace(temp_file, path)
+        LisboaLog.get_logger(__name__).info("Metrics are written to %s" % path)
+        return path
+
+    @staticmethod
+    def _path(project_name):
+        path = CliboaConfig.get("metrics", "path") or os.path.join(env.BASE_DIR, "logs")
+        if path.endswith(".prom"):
+            return path
+        return os.path.join(path, "cliboa_%s.prom" % project_name)
+
+    @staticmethod
+    def _buckets():
+        buckets = CliboaConfig.getlist("metrics", "buckets")
+        return sorted(float(b) for b in buckets) if buckets else Metrics._DEFAULT_BUCKETS
+
+    @staticmethod
+    def _exposition(run, records):
+        """
+        Returns:
+            str: Metrics in Prometheus text exposition format
+        """
+        buckets = Metrics._buckets()
+        steps = {}
+        for r in records:
+            s = steps.setdefault(
+                (r["step"], r["class"]),
+                {
+                    "durations": [],
+                    "success": 0,
+                    "failure": 0,
+                    "skipped": 0,
+                    "rows": 0,
+                    "bytes": 0,
+                },
+            )
+            if r.get("skipped"):
+                s["skipped"] += 1
+                continue
+            s["durations"].append(r["duration"])
+            s["success" if r["succeeded"] else "failure"] += 1
+            s["rows"] += r["rows"]
+            s["bytes"] += r["bytes"]
+
+        project = _label(run["project"])
+        lines = []
+
+        def header(name, description, metric_type):
+            lines.append("# HELP %s %s" % (name, description))
+            lines.append("# TYPE %s %s" % (name, metric_type))
+
+        header(
+            "cliboa_step_duration_seconds", "Elapsed time of step executions.", "histogram"
+        )
+        for (step, cls), s in steps.items():
+            labels = 'project="%s",step="%s",class="%s"' % (project, _label(step), _label(cls))
+            for b in buckets:
+                count = len([d for d in s["durations"] if d <= b])
+                lines.append(
+                    'cliboa_step_duration_seconds_bucket{%s,le="%s"} %s' % (labels, _num(b), count)
+                )
+            lines.append(
+                'cliboa_step_duration_seconds_bucket{%s,le="+Inf"} %s'
+                % (labels, len(s["durations"]))
+            )
+            lines.append(
+                "cliboa_step_duration_seconds_sum{%s} %s" % (labels, sum(s["durations"]))
+            )
+            lines.append(
+                "cliboa_step_duration_seconds_count{%s} %s" % (labels, len(s["durations"]))
+            )
+
+        for name, key, description in [
+            ("cliboa_step_success_total", "success", "Number of succeeded step executions."),
+            ("cliboa_step_failure_total", "failure", "Number of failed step executions."),
+            (
+                "cliboa_step_skipped_total",
+                "skipped",
+                "Number of steps skipped by resuming the scenario.",
+            ),
+            ("cliboa_step_rows_total", "rows", "Number of rows processed by steps."),
+            (
+                "cliboa_step_bytes_total",
+                "bytes",
+                "Number of bytes transferred or written by steps.",
+            ),
+        ]:
+            header(name, description, "counter")
+            for (step, cls), s in steps.items():
+                lines.append(
+                    '%s{project="%s",step="%s",class="%s"} %s'
+                    % (name, project, _label(step), _label(cls), s[key])
+                )
+
+        header("cliboa_scenario_duration_seconds", "Elapsed time of the scenario.", "gauge")
+        lines.append(
+            'cliboa_scenario_duration_seconds{project="%s"} %s'
+            % (project, time.time() - run["started_at"])
+        )
+        header(
+            "cliboa_scenario_success",
+            "1 if no step failed in the last scenario execution, 0 otherwise.",
+            "gauge",
+        )
+        failed = any(s["failure"] for s in steps.values())
+        lines.append('cliboa_scenario_success{project="%s"} %s' % (project, 0 if failed else 1))
+        header(
+            "cliboa_scenario_last_run_timestamp_seconds",
+            "Unix time when the last scenario execution finished.",
+            "gauge",
+        )
+        lines.append(
+            'cliboa_scenario_last_run_timestamp_seconds{project="%s"} %s' % (project, time.time())
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value):
+    return ("%f" % value).rstrip("0").rstrip(".")
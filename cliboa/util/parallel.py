@@ -0,0 +1,131 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import cloudpickle
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.metrics import Metrics
+
+__all__ = ["ParallelMap"]
+
+
+class ParallelMap(object):
+    """
+    Apply a function to items concurrently in a process or thread pool.
+
+    Results are passed to the callback in the order of the items, regardless of
+    the order in which they finish, so that logs and outputs are deterministic.
+    When a function raises an error, the items which have not started are cancelled,
+    and the error is raised after the running ones finish.
+    """
+
+    PROCESS = "process"
+    THREAD = "thread"
+
+    def __init__(self, max_workers=1, mode=PROCESS):
+        """
+        Args:
+            max_workers: Number of workers. Items are processed one by one if 1.
+            mode: process or thread
+        """
+        if mode not in (self.PROCESS, self.THREAD):
+            raise InvalidParameter("'worker_mode' must be either process or thread.")
+        self._logger = LisboaLog.get_logger(__name__)
+        self._max_workers = int(max_workers or 1)
+        self._mode = mode
+
+    def run(self, func, items, callback=None):
+        """
+        Args:
+            func: Function which is called with each item as arguments.
+                  Must be picklable by cloudpickle in process mode.
+            items (list): tuples of arguments
+            callback: Called as callback(item, result) in the main process,
+                      in the order of the items
+
+        Returns:
+            list: Results in the order of the items
+        """
+        items = list(items)
+        if self._max_workers <= 1 or len(items) <= 1:
+            results = []
+            for item in items:
+                ret = func(*item)
+                if callback is not None:
+                    callback(item, ret)
+                results.append(ret)
+            return results
+
+        mode = self._mode
+        if mode == self.PROCESS and multiprocessing.current_process().daemon:
+            # e.g. a step of a parallel block, which is executed in a pool worker
+            self._logger.warning(
+                "Processes can not be created in a daemon process. Use threads instead."
+            )
+            mode = self.THREAD
+
+        workers = min(self._max_workers, len(items))
+        if mode == self.PROCESS:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            call, target = _call_packed, cloudpickle.dumps(func)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            call, target = _call, func
+
+        def submit(item):
+            return executor.submit(call, target, item)
+
+        results = []
+        with executor:
+            futures = [submit(item) for item in items]
+            try:
+                pending = set(futures)
+                while len(results) < len(items):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        if f.exception() is not None:
+                            raise f.exception()
+                    # hand over the results which are ready, in the order of the items
+                    while len(results) < len(items) and futures[len(results)].done():
+                        ret, rows, nbytes = futures[len(results)].result()
+                        Metrics.add_rows(rows)
+                        Metrics.add_bytes(nbytes)
+                        if callback is not None:
+                            callback(items[len(results)], ret)
+                        results.append(ret)
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                raise
+        return results
+
+
+def _call(func, item):
+    # Carry metrics counts added in the worker to the step
+    Metrics.pop_counts()
+    ret = func(*item)
+    rows, nbytes = Metrics.pop_counts()
+    return ret, rows, nbytes
+
+
+def _call_packed(packed, item):
+    return _call(cloudpickle.loads(packed), item)
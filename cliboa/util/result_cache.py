@@ -0,0 +1,164 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from cliboa.conf import env
+from cliboa.util.cache import StepArgument
+from cliboa.util.config import CliboaConfig
+from cliboa.util.lisboa_log import LisboaLog
+
+
+class StepResultCache(object):
+    """
+    Cache of file transform results.
+
+    An entry maps a fingerprint of (class name, arguments, input file) to the output file.
+    If an entry exists and the output file was not changed after it was created,
+    the transform of the input file can be skipped.
+    Entries are evicted by age, and by total size of the output files they refer.
+
+    Settings are in [step_cache] section of cliboa.ini.
+        path: sqlite file of the cache. Default is .cliboa_step_cache.db under BASE_DIR.
+        fingerprint: 'stat' (size and mtime of input files) or 'sha256' (file contents).
+        max_age_days: Entries older than this are evicted.
+        max_size_mb: Least recently used entries are evicted
+                     while total size of the output files exceeds this.
+    """
+
+    FILE_NAME = ".cliboa_step_cache.db"
+
+    _DEFAULT_MAX_AGE_DAYS = 30
+    _DEFAULT_MAX_SIZE_MB = 10240
+    _HASH_CHUNK_SIZE = 1024 * 1024
+
+    # Arguments which do not change output files
+    _EXCLUDE_ATTRS = ("max_workers", "worker_mode")
+
+    def __init__(self, path=None):
+        self._logger = LisboaLog.get_logger(__name__)
+        self._path = (
+            path
+            or CliboaConfig.get("step_cache", "path")
+            or os.path.join(env.BASE_DIR, self.FILE_NAME)
+        )
+        self._fingerprint = CliboaConfig.get("step_cache", "fingerprint") or "stat"
+        self._max_age = (
+            float(
+                CliboaConfig.get("step_cache", "max_age_days")
+                or self._DEFAULT_MAX_AGE_DAYS
+            )
+            * 24
+            * 60
+            * 60
+        )
+        self._max_size = (
+            float(
+                CliboaConfig.get("step_cache", "max_size_mb")
+                or self._DEFAULT_MAX_SIZE_MB
+            )
+            * 1024
+            * 1024
+        )
+        with self._connect() as con, con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entry ("
+                "fingerprint TEXT PRIMARY KEY, output TEXT, output_size INTEGER,"
+                " output_mtime INTEGER, created_at REAL, used_at REAL)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self._path, timeout=60))
+
+    def fingerprint(self, step, input_path):
+        """
+        Args:
+            step: Step instance
+            input_path (str): Input file
+
+        Returns:
+            str: Fingerprint of the transform of the input file
+        """
+        arguments = StepArgument.normalize(step, self._EXCLUDE_ATTRS)
+        h = hashlib.sha256()
+        h.update(step.__class__.__name__.encode("utf-8"))
+        h.update(json.dumps(arguments, sort_keys=True).encode("utf-8"))
+        h.update(os.path.abspath(input_path).encode("utf-8"))
+        if self._fingerprint == "sha256":
+            with open(input_path, "rb") as f:
+                for chunk in iter(lambda: f.read(self._HASH_CHUNK_SIZE), b""):
+                    h.update(chunk)
+        else:
+            st = os.stat(input_path)
+            h.update(("%s:%s" % (st.st_size, st.st_mtime_ns)).encode("utf-8"))
+        return h.hexdigest()
+
+    def hit(self, fingerprint, output_path):
+        """
+        Returns:
+            bool: True if the output file of the fingerprint exists and is not changed
+        """
+        with self._connect() as con, con:
+            row = con.execute(
+                "SELECT output, output_size, output_mtime FROM entry WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+            if row is None:
+                return False
+            output, size, mtime = row
+            if output != os.path.abspath(output_path) or not os.path.isfile(output):
+                return False
+            st = os.stat(output)
+            if st.st_size != size or st.st_mtime_ns != mtime:
+                return False
+            con.execute(
+                "UPDATE entry SET used_at = ? WHERE fingerprint = ?",
+                (time.time(), fingerprint),
+            )
+        return True
+
+    def put(self, fingerprint, output_path):
+        """
+        Add an entry, and evict old entries
+        """
+        output = os.path.abspath(output_path)
+        st = os.stat(output)
+        now = time.time()
+        with self._connect() as con, con:
+            con.execute(
+                "INSERT OR REPLACE INTO entry VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, output, st.st_size, st.st_mtime_ns, now, now),
+            )
+            self._evict(con, now)
+
+    def _evict(self, con, now):
+        con.execute("DELETE FROM entry WHERE created_at < ?", (now - self._max_age,))
+        total = con.execute("SELECT COALESCE(SUM(output_size), 0) FROM entry").fetchone()[0]
+        if total <= self._max_size:
+            return
+        rows = con.execute(
+            "SELECT fingerprint, output_size FROM entry ORDER BY used_at"
+        ).fetchall()
+        evicted = []
+        for fingerprint, size in rows:
+            if total <= self._max_size:
+                break
+            evicted.append((fingerprint,))
+            total -= size
+        con.executemany("DELETE FROM entry WHERE fingerprint = ?", evicted)
+        self._logger.info("%s step cache entries are evicted." % len(evicted))
@@ -0,0 +1,347 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import heapq
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from operator import itemgetter
+
+import dateutil.parser as parser
+
+from cliboa.util.exception import InvalidParameter
+from cliboa.util.lisboa_log import LisboaLog
+from cliboa.util.parallel import ParallelMap
+
+__all__ = ["ExternalSort", "SortKey"]
+
+SortKey = namedtuple("SortKey", ["index", "type", "desc", "format"])
+SortKey.__new__.__defaults__ = ("string", False, None)
+
+
+class ExternalSort(object):
+    """
+    Sort rows which do not fit in memory.
+
+    Rows are read in runs of buffer_size_mb, and each run is sorted and written to
+    a temporary file (in a pool of max_workers if greater than 1).
+    The runs are merged with a k-way heap merge. The sort is stable.
+
+    Keys are compared by their types.
+        string: as strings
+        number: as int or float
+        date: as datetime, parsed by 'format' (strptime) or dateutil if no format is given
+    Values which can not be converted (e.g. empty) come first in ascending order,
+    and last in descending order.
+
+    With no_duplicate, rows of the same keys are ordered by the whole row instead of
+    the order of input, so that duplicated rows are adjacent and removed in constant memory.
+    """
+
+    STRING = "string"
+    NUMBER = "number"
+    DATE = "date"
+    TYPES = (STRING, NUMBER, DATE)
+
+    # Number of runs which are merged at once
+    MAX_MERGE = 128
+    # Rows which are pickled at once in a run file
+    BATCH_SIZE = 10000
+
+    def __init__(
+        self,
+        keys,
+        buffer_size_mb=256,
+        max_workers=1,
+        worker_mode=ParallelMap.PROCESS,
+        no_duplicate=False,
+    ):
+        """
+        Args:
+            keys (list): SortKey
+            buffer_size_mb: Approximate memory of rows which are sorted at once
+            max_workers: Number of runs which are sorted at once
+            worker_mode: process or thread
+            no_duplicate: Remove duplicated rows
+        """
+        for k in keys:
+            if k.type not in self.TYPES:
+                raise InvalidParameter(
+                    "Type of a sort key must be one of %s. %s" % (", ".join(self.TYPES), k.type)
+                )
+        if worker_mode not in (ParallelMap.PROCESS, ParallelMap.THREAD):
+            raise InvalidParameter("'worker_mode' must be either process or thread.")
+        self._logger = LisboaLog.get_logger(__name__)
+        self._keys = list(keys)
+        self._buffer_size = max(int(buffer_size_mb or 1), 1) * 1024 * 1024
+        self._max_workers = int(max_workers or 1)
+        self._worker_mode = worker_mode
+        self._no_duplicate = no_duplicate
+
+    def sort(self, rows):
+        """
+        Args:
+            rows: Iterable of rows (list of strings)
+
+        Yields:
+            list: Sorted rows
+        """
+        key = _key_func(self._keys, self._no_duplicate)
+        chunks = self._chunks(rows)
+        first = next(chunks, None)
+        if first is None:
+            return
+        second = next(chunks, None)
+        if second is None:
+            # fits in memory
+            first.sort(key=key)
+            if self._no_duplicate:
+                yield from self._output(((key(row), row) for row in first))
+            else:
+                yield from first
+            return
+
+        head = deque([first, second])
+        first = second = None
+        tmp_dir = tempfile.mkdtemp(prefix="cliboa_sort_")
+        try:
+            runs = self._sort_runs(_prepend(head, chunks), tmp_dir)
+            self._logger.info("Merge %s sorted runs." % len(runs))
+            while len(runs) > self.MAX_MERGE:
+                runs = self._merge_runs(runs, tmp_dir, key)
+            readers = [_read_run(path, key) for path in runs]
+            yield from self._output(heapq.merge(*readers, key=itemgetter(0)))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _chunks(self, rows):
+        chunk = []
+        size = 0
+        for row in rows:
+            chunk.append(row)
+            # rough size of a list of strings
+            size += 64 + 57 * len(row) + sum(map(len, row))
+            if size >= self._buffer_size:
+                yield chunk
+                chunk = []
+                size = 0
+        if chunk:
+            yield chunk
+
+    def _sort_runs(self, chunks, tmp_dir):
+        """
+        Returns:
+            list: Paths of sorted runs in the order of input
+        """
+        runs = []
+        executor = self._executor()
+        if executor is None:
+            for chunk in chunks:
+                runs.append(
+                    _sort_run(
+                        chunk, self._keys, _run_path(tmp_dir, len(runs)), self._no_duplicate
+                    )
+                )
+                chunk = None
+            return runs
+
+        pending = deque()
+        try:
+            for chunk in chunks:
+                path = _run_path(tmp_dir, len(runs))
+                runs.append(path)
+                pending.append(
+                    executor.submit(_sort_run, chunk, self._keys, path, self._no_duplicate)
+                )
+                chunk = None
+                # bound the number of runs in memory
+                while len(pending) > self._max_workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        except BaseException:
+            for f in pending:
+                f.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return runs
+
+    def _executor(self):
+        if self._max_workers <= 1:
+            return None
+        if self._worker_mode == ParallelMap.PROCESS:
+            if not multiprocessing.current_process().daemon:
+                return ProcessPoolExecutor(max_workers=self._max_workers)
+            # e.g. a step of a parallel block, which is executed in a pool worker
+            self._logger.warning(
+                "Processes can not be created in a daemon process. Use threads instead."
+            )
+        return ThreadPoolExecutor(max_workers=self._max_workers)
+
+    def _merge_runs(self, runs, tmp_dir, key):
+        merged = []
+        for i in range(0, len(runs), self.MAX_MERGE):
+            group = runs[i:i + self.MAX_MERGE]
+            path = _run_path(tmp_dir, "merged_%s_%s" % (len(runs), i))
+            readers = [_read_run(p, key) for p in group]
+            _write_run((row for _, row in heapq.merge(*readers, key=itemgetter(0))), path)
+            for p in group:
+                os.remove(p)
+            merged.append(path)
+        return merged
+
+    def _output(self, pairs):
+        """
+        Args:
+            pairs: Sorted tuples of (key, row)
+        """
+        if not self._no_duplicate:
+            for _, row in pairs:
+                yield row
+            return
+
+        # rows are ordered by the whole row after the keys, so duplicated rows are adjacent
+        last = None
+        for _, row in pairs:
+            if row == last:
+                continue
+            last = row
+            yield row
+
+
+class _Desc(object):
+    """
+    String which is compared in reverse order
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_number(v):
+    try:
+        return int(v)
+    except ValueError:
+        n = float(v)
+        if n != n:
+            raise ValueError("nan can not be sorted")
+        return n
+
+
+def _date_parser(format):
+    def parse(v):
+        d = datetime.strptime(v, format) if format else parser.parse(v)
+        if d.tzinfo is not None:
+            d = d.astimezone(timezone.utc).replace(tzinfo=None)
+        delta = d - _EPOCH
+        # integer microseconds, which can be negated without losing precision
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+    return parse
+
+
+def _key_getter(key):
+    i = key.index
+    if key.type == ExternalSort.STRING:
+        if key.desc:
+            return lambda row: _Desc(row[i] if i < len(row) else "")
+        return lambda row: row[i] if i < len(row) else ""
+
+    convert = _to_number if key.type == ExternalSort.NUMBER else _date_parser(key.format)
+    sign = -1 if key.desc else 1
+
+    def getter(row):
+        try:
+            return (sign, sign * convert(row[i]))
+        except (IndexError, ValueError, OverflowError, TypeError):
+            # comes first in ascending order, last in descending order
+            return (0, 0)
+
+    return getter
+
+
+def _key_func(keys, whole_row=False):
+    """
+    Args:
+        keys (list): SortKey
+        whole_row: Compare rows of the same keys by the whole row
+    """
+    getters = [_key_getter(k) for k in keys]
+
+    def key(row):
+        k = [g(row) for g in getters]
+        if whole_row:
+            k.append(tuple(row))
+        return tuple(k)
+
+    return key
+
+
+def _prepend(head, chunks):
+    # popleft so that the chunks are not referenced after they are sorted
+    while head:
+        yield head.popleft()
+    yield from chunks
+
+
+def _run_path(tmp_dir, name):
+    return os.path.join(tmp_dir, "run_%s" % name)
+
+
+def _sort_run(rows, keys, path, whole_row=False):
+    rows.sort(key=_key_func(keys, whole_row))
+    _write_run(rows, path)
+    return path
+
+
+def _write_run(rows, path):
+    with open(path, "wb") as f:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ExternalSort.BATCH_SIZE:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path, key):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            for row in batch:
+                yield key(row), row
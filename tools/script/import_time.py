@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import argparse
+import subprocess
+import sys
+
+"""
+Report import time of cliboa with 'python -X importtime'.
+
+Compares the modules which are loaded at start up of a scenario execution
+with the modules of all the default step classes, which were loaded at start up
+before the step classes were imported lazily.
+
+Usage:
+    python tools/script/import_time.py [--top 10] [--repeat 3]
+"""
+
+TARGETS = [
+    ("start up", "import cliboa.core.worker"),
+    ("start up + CsvConvert", "import cliboa.core.worker; from cliboa.scenario import CsvConvert"),
+    ("all step classes", "import cliboa.core.worker; from cliboa.scenario import *"),
+]
+
+
+def measure(stmt):
+    """
+    Returns:
+        list: tuples of (cumulative microseconds, module name) of top level imports
+    """
+    ret = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = []
+    for line in ret.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented
+        if name.startswith("  "):
+            continue
+        modules.append((int(cumulative), name.strip()))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of cliboa")
+    parser.add_argument("--top", type=int, default=10, help="Number of modules to show")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N executions")
+    args = parser.parse_args()
+
+    for title, stmt in TARGETS:
+        results = [measure(stmt) for _ in range(args.repeat)]
+        best = min(results, key=lambda r: sum(c for c, _ in r))
+        total = sum(c for c, _ in best)
+        print("%s: %.3f sec (%s)" % (title, total / 1000000, stmt))
+        for cumulative, name in sorted(best, reverse=True)[: args.top]:
+            print("  %10.3f sec  %s" % (cumulative / 1000000, name))
+
+
+if __name__ == "__main__":
+    main()